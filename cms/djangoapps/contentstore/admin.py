@@ -5,6 +5,15 @@ Admin site bindings for contentstore
 from django.contrib import admin
 
 from config_models.admin import ConfigurationModelAdmin
-from contentstore.models import VideoUploadConfig
+from contentstore.models import CoursewareSearchIndexState, VideoUploadConfig
+
+
+class CoursewareSearchIndexStateAdmin(admin.ModelAdmin):
+    """Admin of the courseware search index states, with their timings"""
+    search_fields = ('course_id',)
+    list_display = ('course_id', 'indexed_version', 'indexed_count', 'removed_count', 'indexing_time', 'modified')
+    exclude = ('document_digests_json',)
+
 
 admin.site.register(VideoUploadConfig, ConfigurationModelAdmin)
+admin.site.register(CoursewareSearchIndexState, CoursewareSearchIndexStateAdmin)
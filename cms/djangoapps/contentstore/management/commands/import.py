@@ -45,6 +45,7 @@ class Command(BaseCommand):
             static_content_store=contentstore(), verbose=True,
             do_import_static=do_import_static,
             create_if_not_present=True,
+            bulk_import=True,
         )
 
         for course in course_items:
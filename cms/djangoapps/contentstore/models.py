@@ -3,9 +3,14 @@ Models for contentstore
 """
 # pylint: disable=no-member
 
-from django.db.models.fields import TextField
+import json
+
+from django.db.models.fields import CharField, FloatField, IntegerField, TextField
+from model_utils.models import TimeStampedModel
 
 from config_models.models import ConfigurationModel
+from util.models import CompressedTextField
+from xmodule_django.models import CourseKeyField
 
 
 class VideoUploadConfig(ConfigurationModel):
@@ -19,3 +24,34 @@ class VideoUploadConfig(ConfigurationModel):
     def get_profile_whitelist(cls):
         """Get the list of profiles to include in the encoding download"""
         return [profile for profile in cls.current().profile_whitelist.split(",") if profile]
+
+
+class CoursewareSearchIndexState(TimeStampedModel):
+    """
+    The published version of a course last added to the courseware search index, the digests of
+    its documents there, and how many documents indexing it changed and in how long.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
+    indexed_version = CharField(max_length=255, blank=True)
+    # The digests of the documents in the index, keyed by their id, as JSON
+    document_digests_json = CompressedTextField(blank=True, null=True)
+    indexed_count = IntegerField(default=0)
+    removed_count = IntegerField(default=0)
+    # Seconds indexing the version took
+    indexing_time = FloatField(default=0)
+
+    @property
+    def document_digests(self):
+        """The digests of the documents in the index, keyed by their id, or None if none was indexed"""
+        if self.document_digests_json:
+            return json.loads(self.document_digests_json)
+        return None
+
+    @document_digests.setter
+    def document_digests(self, value):  # pylint: disable=missing-docstring
+        self.document_digests_json = json.dumps(value)
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
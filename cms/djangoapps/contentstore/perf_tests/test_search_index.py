@@ -0,0 +1,80 @@
+"""
+Performance test for the courseware search index updates.
+"""
+import os
+import unittest
+
+from nose.plugins.skip import SkipTest
+
+from contentstore.signals import listen_for_course_publish
+from contentstore.tests.test_search_index import SearchIndexTestMixin
+from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
+from xmodule.modulestore.django import SignalHandler
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class SearchIndexPerformanceTest(SearchIndexTestMixin, ModuleStoreTestCase):
+    """
+    Compare the time indexing a synthetic course takes in full, and incrementally
+    when nothing or a single block changed since it was indexed.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_CHAPTERS = 5
+    NUM_SEQUENTIALS = 4
+    NUM_VERTICALS = 3
+    NUM_HTMLS = 4
+
+    def setUp(self):
+        super(SearchIndexPerformanceTest, self).setUp()
+        self.reset_index()
+        self.addCleanup(os.remove, self.TEST_INDEX_FILENAME)
+        # Index the course explicitly rather than on each publish while it is built
+        SignalHandler.course_published.disconnect(listen_for_course_publish)
+        self.addCleanup(SignalHandler.course_published.connect, listen_for_course_publish)
+
+        self.course = CourseFactory.create()
+        with self.store.bulk_operations(self.course.id):
+            for chapter_index in xrange(self.NUM_CHAPTERS):
+                chapter = ItemFactory.create(parent=self.course, category='chapter')
+                for __ in xrange(self.NUM_SEQUENTIALS):
+                    sequential = ItemFactory.create(parent=chapter, category='sequential')
+                    for __ in xrange(self.NUM_VERTICALS):
+                        vertical = ItemFactory.create(parent=sequential, category='vertical')
+                        for html_index in xrange(self.NUM_HTMLS):
+                            self.html = ItemFactory.create(
+                                parent=vertical, category='html',
+                                data="<p>Content {} of chapter {}</p>".format(html_index, chapter_index),
+                            )
+
+    def test_indexing(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        num_blocks = self.NUM_CHAPTERS * self.NUM_SEQUENTIALS * self.NUM_VERTICALS * (1 + self.NUM_HTMLS)
+
+        with CodeBlockTimer("SearchIndex:{}:full".format(num_blocks)):
+            result = CoursewareSearchIndexer.index_course(self.store, self.course.id)
+
+        with CodeBlockTimer("SearchIndex:{}:incremental_unchanged".format(num_blocks)):
+            result = CoursewareSearchIndexer.index_course(self.store, self.course.id, result.digests)
+
+        self.html.data = "<p>Changed content</p>"
+        self.store.update_item(self.html, self.user.id)
+        self.store.publish(self.html.location, self.user.id)
+        with CodeBlockTimer("SearchIndex:{}:incremental_one_change".format(num_blocks)):
+            CoursewareSearchIndexer.index_course(self.store, self.course.id, result.digests)
@@ -0,0 +1,24 @@
+"""
+Signal handlers of contentstore
+"""
+from django.conf import settings
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Refresh the metadata inheritance tree of the published course, and update its courseware
+    search index, in celery tasks.
+    """
+    # Import tasks here to avoid a circular import.
+    from .tasks import update_metadata_inheritance_tree, update_search_index
+
+    # Note: The countdown=0 kwarg is set to to ensure the tasks do not attempt to access the course
+    # before the signal emitter has finished all operations.
+    update_metadata_inheritance_tree.apply_async([unicode(course_key)], countdown=0)
+
+    if settings.FEATURES.get('ENABLE_COURSEWARE_INDEX', False):
+        update_search_index.apply_async([unicode(course_key)], countdown=0)
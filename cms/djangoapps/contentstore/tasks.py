@@ -6,11 +6,14 @@ from celery.task import task
 from django.contrib.auth.models import User
 import json
 import logging
+import time
+from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
 from xmodule.modulestore.django import modulestore
 from xmodule.course_module import CourseFields
 
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
 from course_action_state.models import CourseRerunState
+from contentstore.models import CoursewareSearchIndexState
 from contentstore.utils import initialize_permissions
 from opaque_keys.edx.keys import CourseKey
 
@@ -67,6 +70,49 @@ def rerun_course(source_course_key_string, destination_course_key_string, user_i
         return "exception: " + unicode(exc)
 
 
+@task()
+def update_search_index(course_id):
+    """
+    Updates the courseware search index of a published course, sending only the documents
+    that changed since the version indexed last to the search engine.
+    """
+    course_key = CourseKey.from_string(course_id)
+    store = modulestore()
+    state, __ = CoursewareSearchIndexState.objects.get_or_create(course_id=course_key)
+
+    version = store.get_course_published_version(course_key)
+    if version and version == state.indexed_version:
+        # Another task indexed this version already
+        return
+
+    start_time = time.time()
+    result = CoursewareSearchIndexer.do_publish_index(store, course_key, state.document_digests)
+    if result is None:
+        return
+
+    # Leave the version to index again by the next task if some documents couldn't be
+    state.indexed_version = version if not result.error_list else u''
+    state.document_digests = result.digests
+    state.indexed_count = result.indexed_count
+    state.removed_count = result.removed_count
+    state.indexing_time = time.time() - start_time
+    state.save()
+    logging.info(
+        u'Indexed course %s version %s in %.3f s: %d documents indexed, %d removed, %d errors',
+        course_id, version, state.indexing_time, result.indexed_count, result.removed_count, len(result.error_list)
+    )
+
+
+@task()
+def update_metadata_inheritance_tree(course_id):
+    """
+    Recomputes and caches the metadata inheritance tree of a published course, if its modulestore
+    caches one, so that no learner request has to compute it after the publish.
+    """
+    course_key = CourseKey.from_string(course_id)
+    modulestore().refresh_cached_metadata_inheritance_tree(course_key)
+
+
 def deserialize_fields(json_fields):
     fields = json.loads(json_fields)
     for field_name, value in fields.iteritems():
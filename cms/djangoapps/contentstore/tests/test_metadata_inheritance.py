@@ -0,0 +1,26 @@
+"""
+Tests of the task which refreshes the metadata inheritance trees of published courses.
+"""
+from mock import patch
+
+from contentstore.tasks import update_metadata_inheritance_tree
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.mongo.base import MongoModuleStore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+class UpdateMetadataInheritanceTreeTestCase(ModuleStoreTestCase):
+    def test_update_metadata_inheritance_tree(self):
+        """
+        The task refreshes the metadata inheritance tree of old Mongo courses, and ignores other courses.
+        """
+        mongo_course = CourseFactory.create(default_store=ModuleStoreEnum.Type.mongo)
+        with patch.object(MongoModuleStore, 'refresh_cached_metadata_inheritance_tree') as refresh:
+            update_metadata_inheritance_tree(unicode(mongo_course.id))
+            refresh.assert_called_once_with(mongo_course.id)
+
+            split_course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+            refresh.reset_mock()
+            update_metadata_inheritance_tree(unicode(split_course.id))
+            self.assertFalse(refresh.called)
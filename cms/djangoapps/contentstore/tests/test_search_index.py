@@ -0,0 +1,88 @@
+"""
+Tests of the courseware search index updates on publish.
+"""
+import json
+import os
+
+from mock import patch
+
+from contentstore.models import CoursewareSearchIndexState
+from contentstore.tasks import update_search_index
+from search.api import perform_search
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class SearchIndexTestMixin(object):
+    """
+    Resets the file in which the mock search engine keeps its index.
+    """
+    TEST_INDEX_FILENAME = "test_root/index_file.dat"
+
+    def reset_index(self):
+        """Empty the index of the mock search engine"""
+        with open(self.TEST_INDEX_FILENAME, "w+") as index_file:
+            json.dump({}, index_file)
+
+
+class UpdateSearchIndexTestCase(SearchIndexTestMixin, ModuleStoreTestCase):
+    def setUp(self):
+        super(UpdateSearchIndexTestCase, self).setUp()
+        self.reset_index()
+        self.addCleanup(os.remove, self.TEST_INDEX_FILENAME)
+
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter', display_name="Week 1")
+        sequential = ItemFactory.create(
+            parent_location=chapter.location, category='sequential', display_name="Lesson 1"
+        )
+        self.vertical = ItemFactory.create(
+            parent_location=sequential.location, category='vertical', display_name='Subsection 1'
+        )
+        self.html = ItemFactory.create(
+            parent_location=self.vertical.location, category="html", display_name="My HTML",
+            data="<div>This is my unique HTML content</div>",
+        )
+
+    def _search(self, phrase):
+        """Return the number of documents of the course matching the phrase"""
+        return perform_search(phrase, user=self.user, size=10, from_=0, course_id=unicode(self.course.id))['total']
+
+    def _state(self):
+        """Return the search index state of the course"""
+        return CoursewareSearchIndexState.objects.get(course_id=self.course.id)
+
+    def test_indexed_on_publish(self):
+        self.assertEqual(self._search("unique"), 1)
+        state = self._state()
+        self.assertIn(unicode(self.html.location), state.document_digests)
+        self.assertEqual(state.indexed_version, self.store.get_course_published_version(self.course.id))
+
+    def test_only_changed_documents_indexed(self):
+        self.html.data = "<div>This is my changed HTML content</div>"
+        self.store.update_item(self.html, self.user.id)
+        self.store.publish(self.html.location, self.user.id)
+
+        self.assertEqual(self._state().indexed_count, 1)
+        self.assertEqual(self._search("changed"), 1)
+
+    def test_unchanged_version_skipped(self):
+        with patch.object(CoursewareSearchIndexer, 'index_course') as index_course:
+            update_search_index(unicode(self.course.id))
+        self.assertFalse(index_course.called)
+
+    def test_unpublished_documents_removed(self):
+        self.store.delete_item(self.html.location, self.user.id, revision=ModuleStoreEnum.RevisionOption.all)
+        self.store.publish(self.vertical.location, self.user.id)
+
+        state = self._state()
+        self.assertEqual(state.removed_count, 1)
+        self.assertNotIn(unicode(self.html.location), state.document_digests)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSEWARE_INDEX': False})
+    def test_disabled(self):
+        CoursewareSearchIndexState.objects.all().delete()
+        self.store.publish(self.vertical.location, self.user.id)
+        self.assertFalse(CoursewareSearchIndexState.objects.exists())
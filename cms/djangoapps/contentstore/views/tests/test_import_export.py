@@ -9,6 +9,7 @@ import os
 import shutil
 import tarfile
 import tempfile
+from mock import patch
 from path import path
 from uuid import uuid4
 
@@ -16,7 +17,7 @@ from django.test.utils import override_settings
 from django.conf import settings
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.xml_exporter import export_library_to_xml
-from xmodule.modulestore.xml_importer import import_library_from_xml
+from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
 from xmodule.modulestore import LIBRARY_ROOT
 from contentstore.utils import reverse_course_url
 
@@ -111,6 +112,20 @@ class ImportTestCase(CourseTestCase):
 
         self.assertEquals(resp.status_code, 200)
 
+    def test_bulk_import(self):
+        """
+        Check that the children of the course are imported in bulk.
+        """
+        with patch(
+            'contentstore.views.import_export.import_course_from_xml', wraps=import_course_from_xml
+        ) as mock_import:
+            with open(self.good_tar) as gtar:
+                args = {"name": self.good_tar, "course-data": [gtar]}
+                resp = self.client.post(self.url, args)
+
+        self.assertEquals(resp.status_code, 200)
+        self.assertTrue(mock_import.call_args[1]['bulk_import'])
+
     def test_import_in_existing_course(self):
         """
         Check that course is imported successfully in existing course and users have their access roles
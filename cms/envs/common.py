@@ -344,6 +344,11 @@ MODULESTORE = {
     }
 }
 
+# Directory of the local cache of assets too large for memcached, and the most bytes it may take.
+# The cache is disabled if the directory isn't set.
+ASSET_DISK_CACHE_DIR = None
+ASSET_DISK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -730,6 +735,7 @@ INSTALLED_APPS = (
     'edx_jsme',    # Molecular Structure
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
 )
 
 
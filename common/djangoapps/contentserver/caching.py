@@ -0,0 +1,130 @@
+"""
+Cache of asset data on the local disk, shared by the processes of a server.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Size of the chunks in which cached assets are read and streamed
+CHUNK_SIZE = 64 * 1024
+
+# Prefix of the files that are still being written
+TEMP_FILE_PREFIX = '.tmp'
+
+
+class AssetDiskCache(object):
+    """
+    Stores the data of assets in files under `directory`.
+
+    Files are named after the location of the asset and the md5 digest of its data, so a changed
+    asset never gets the data of its previous version. Once the files take more than `max_size`
+    bytes, the least recently used ones are removed.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    def _path(self, content):
+        """
+        Return the path of the file caching the data of `content`.
+        """
+        key = u'{}:{}'.format(content.location, content.content_digest).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def get(self, content):
+        """
+        Return a StaticContentStream of the cached data of `content`, with the metadata of `content`,
+        or None if the data isn't cached.
+        """
+        if content.content_digest is None:
+            return None
+
+        path = self._path(content)
+        try:
+            data_file = open(path, 'rb')
+        except IOError:
+            return None
+
+        # the modification times of the files tell which were used last
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return StaticContentStream(
+            content.location, content.name, content.content_type, data_file,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest, chunk_size=CHUNK_SIZE
+        )
+
+    def can_cache(self, content):
+        """
+        Return whether the data of `content` can be cached.
+        """
+        return content.content_digest is not None and content.length is not None and content.length <= self.max_size
+
+    def set(self, content):
+        """
+        Cache the data of `content`, a StaticContentStream, and return a StaticContentStream reading it
+        from the cache, or None if it can't be cached. The stream of `content` is consumed unless
+        can_cache is False for it.
+        """
+        if not self.can_cache(content):
+            return None
+
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix=TEMP_FILE_PREFIX)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+            # other processes only ever see complete files
+            os.rename(temp_path, self._path(content))
+        except (IOError, OSError):
+            log.exception(u"Could not cache the data of %s", unicode(content.location))
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+
+        self._evict()
+        return self.get(content)
+
+    def _evict(self):
+        """
+        Remove the least recently used files until they take at most `max_size` bytes.
+        """
+        files = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if name.startswith(TEMP_FILE_PREFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        for __, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
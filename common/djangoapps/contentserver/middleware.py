@@ -4,17 +4,19 @@ Middleware to serve assets.
 
 import logging
 
+from django.conf import settings
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.caching import AssetDiskCache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -23,8 +25,17 @@ from xmodule.exceptions import NotFoundError
 
 log = logging.getLogger(__name__)
 
+# Assets up to this size are cached in memcached, larger ones in the disk cache
+MAX_CACHED_CONTENT_SIZE = 1048576
+
 
 class StaticContentServer(object):
+    def __init__(self):
+        if getattr(settings, 'ASSET_DISK_CACHE_DIR', None):
+            self.disk_cache = AssetDiskCache(settings.ASSET_DISK_CACHE_DIR, settings.ASSET_DISK_CACHE_MAX_SIZE)
+        else:
+            self.disk_cache = None
+
     def process_request(self, request):
         # look to see if the request is prefixed with an asset prefix tag
         if (
@@ -50,101 +61,167 @@ class StaticContentServer(object):
                     response.status_code = 404
                     return response
 
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
+                # since we fetched it from DB, let's cache it going forward. memcached only takes items < 1MB,
+                # so larger content only has its metadata there and its data in the disk cache.
                 if content.length is not None:
-                    if content.length < 1048576:
+                    if content.length < MAX_CACHED_CONTENT_SIZE:
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
-            else:
-                # NOP here, but we may wish to add a "cache-hit" counter in the future
-                pass
+                    elif self.disk_cache is not None and self.disk_cache.can_cache(content):
+                        set_cached_content(content.copy_metadata())
+                        content = self._cache_on_disk(loc, content)
+                        if content is None:
+                            return HttpResponse(status=404)
+            elif content.data is None:
+                # only the metadata is in memcached, the data is either in the disk cache or the DB
+                cached_content = self.disk_cache.get(content) if self.disk_cache is not None else None
+                if cached_content is None:
+                    try:
+                        content = AssetManager.find(loc, as_stream=True)
+                    except (ItemNotFoundError, NotFoundError):
+                        response = HttpResponse()
+                        response.status_code = 404
+                        return response
+                    if self.disk_cache is not None and self.disk_cache.can_cache(content):
+                        content = self._cache_on_disk(loc, content)
+                        if content is None:
+                            return HttpResponse(status=404)
+                else:
+                    content = cached_content
 
-            # Check that user has access to content
-            if getattr(content, "locked", False):
-                if not hasattr(request, "user") or not request.user.is_authenticated():
+            response = self._content_response(request, loc, content)
+            if response.status_code not in (200, 206):
+                # the data isn't streamed, so the stream of the content must be closed here
+                _close(content)
+            return response
+
+    def _cache_on_disk(self, loc, content):
+        """
+        Cache the data of `content`, a StaticContentStream fetched from the DB, in the disk cache, and
+        return the content to serve: a StaticContentStream of the cached data, or else of the data fetched
+        from the DB again, as caching consumed the stream of `content`. Return None if the asset is gone.
+        """
+        cached_content = self.disk_cache.set(content)
+        content.close()
+        if cached_content is not None:
+            return cached_content
+        try:
+            return AssetManager.find(loc, as_stream=True)
+        except (ItemNotFoundError, NotFoundError):
+            return None
+
+    def _content_response(self, request, loc, content):
+        """
+        Return the response serving `content`, the asset at `loc`, to `request`.
+        """
+        # Check that user has access to content
+        if getattr(content, "locked", False):
+            if not hasattr(request, "user") or not request.user.is_authenticated():
+                return HttpResponseForbidden('Unauthorized')
+            if not request.user.is_staff:
+                if getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled_by_partial(
+                    request.user, loc.course_key
+                ):
+                    return HttpResponseForbidden('Unauthorized')
+                if not getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled(
+                    request.user, loc.course_key
+                ):
                     return HttpResponseForbidden('Unauthorized')
-                if not request.user.is_staff:
-                    if getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled_by_partial(
-                        request.user, loc.course_key
-                    ):
-                        return HttpResponseForbidden('Unauthorized')
-                    if not getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled(
-                        request.user, loc.course_key
-                    ):
-                        return HttpResponseForbidden('Unauthorized')
-
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
-
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
-
-            # *** File streaming within a byte range ***
-            # If a Range is provided, parse Range attribute of the request
-            # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
-            # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
-            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
-            if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
 
-                header_value = request.META['HTTP_RANGE']
-                try:
-                    unit, ranges = parse_range_header(header_value, content.length)
-                except ValueError as exception:
-                    # If the header field is syntactically invalid it should be ignored.
-                    log.exception(
-                        u"%s in Range header: %s for content: %s", exception.message, header_value, unicode(loc)
+        # convert over the DB persistent last modified timestamp to a HTTP compatible
+        # timestamp, so we can simply compare the strings
+        last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+
+        # see if the client has cached this content, if so then compare the
+        # timestamps, if they are the same then just return a 304 (Not Modified)
+        if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
+            if if_modified_since == last_modified_at_str:
+                return HttpResponseNotModified()
+
+        # likewise if the client has the content with the same digest
+        etag = '"{}"'.format(content.content_digest) if getattr(content, 'content_digest', None) else None
+        if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+            if etag in [value.strip() for value in request.META['HTTP_IF_NONE_MATCH'].split(',')]:
+                return HttpResponseNotModified()
+
+        # *** File streaming within a byte range ***
+        # If a Range is provided, parse Range attribute of the request
+        # Add Content-Range in the response if Range is structurally correct
+        # Request -> Range attribute structure: "Range: bytes=first-[last]"
+        # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
+        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
+        response = None
+        if request.META.get('HTTP_RANGE'):
+            header_value = request.META['HTTP_RANGE']
+            try:
+                unit, ranges = parse_range_header(header_value, content.length)
+            except ValueError as exception:
+                # If the header field is syntactically invalid it should be ignored.
+                log.exception(
+                    u"%s in Range header: %s for content: %s", exception.message, header_value, unicode(loc)
+                )
+            else:
+                if unit != 'bytes':
+                    # Only accept ranges in bytes
+                    log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
+                elif len(ranges) > 1:
+                    # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
+                    # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                    # But we send back the full content.
+                    log.warning(
+                        u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
                     )
                 else:
-                    if unit != 'bytes':
-                        # Only accept ranges in bytes
-                        log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                    first, last = ranges[0]
+
+                    if 0 <= first <= last < content.length:
+                        # If the byte range is satisfiable
+                        response = HttpResponse(_stream_and_close(content, content.stream_data_in_range(first, last)))
+                        response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
+                            first=first, last=last, length=content.length
                         )
+                        response['Content-Length'] = str(last - first + 1)
+                        response.status_code = 206  # Partial Content
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
-
-            # If Range header is absent or syntactically invalid return a full content response.
-            if response is None:
-                response = HttpResponse(content.stream_data())
-                response['Content-Length'] = content.length
-
-            # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
-            response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
-            response['Last-Modified'] = last_modified_at_str
+                        log.warning(
+                            u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                        )
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-            return response
+        # If Range header is absent or syntactically invalid return a full content response.
+        if response is None:
+            response = HttpResponse(_stream_and_close(content, content.stream_data()))
+            response['Content-Length'] = content.length
+
+        # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Type'] = content.content_type
+        response['Last-Modified'] = last_modified_at_str
+        if etag is not None:
+            response['ETag'] = etag
+
+        return response
+
+
+def _close(content):
+    """
+    Close the stream of `content`, if it has one.
+    """
+    if isinstance(content, StaticContentStream):
+        content.close()
+
+
+def _stream_and_close(content, chunks):
+    """
+    Yield the `chunks` of data of `content`, and close its stream once the response is done with them.
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        _close(content)
 
 
 def parse_range_header(header_value, content_length):
@@ -3,21 +3,32 @@ Tests for StaticContentServer
 """
 import copy
 import ddt
+import hashlib
 import logging
+import os
+import shutil
+import StringIO
+import tempfile
 import unittest
 from uuid import uuid4
 
+from mock import patch
+
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from xmodule.contentstore.content import StaticContentStream
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from contentserver.middleware import parse_range_header
+from cache_toolbox.core import del_cached_content
+from contentserver.caching import AssetDiskCache
+from contentserver.middleware import _close, parse_range_header
 from student.models import CourseEnrollment
 
 log = logging.getLogger(__name__)
@@ -192,6 +203,144 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         )
         self.assertEqual(resp.status_code, 416)
 
+    def test_etag(self):
+        """
+        Test that assets have the md5 digest of their data as ETag, and that requests with
+        a matching If-None-Match get a 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5'))
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", {}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_disk_cache(self):
+        """
+        Test that assets too large for memcached are served from the disk cache, including
+        range requests, after being read from the DB once.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        del_cached_content(self.unlocked_asset)
+
+        with override_settings(ASSET_DISK_CACHE_DIR=cache_dir):
+            with patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 1):
+                client = Client()
+                resp = client.get(self.url_unlocked)
+                self.assertEqual(resp.status_code, 200)
+                data = ''.join(resp)
+
+                with patch('contentserver.middleware.AssetManager.find') as find:
+                    resp = client.get(self.url_unlocked)
+                    self.assertEqual(''.join(resp), data)
+
+                    resp = client.get(self.url_unlocked, HTTP_RANGE='bytes=1-3')
+                    self.assertEqual(resp.status_code, 206)
+                    self.assertEqual(''.join(resp), data[1:4])
+                self.assertFalse(find.called)
+
+    def test_disk_cache_write_error(self):
+        """
+        Test that assets which can't be written to the disk cache are served in full from the DB.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        del_cached_content(self.unlocked_asset)
+        data = self.contentstore.find(self.unlocked_asset).data
+
+        with override_settings(ASSET_DISK_CACHE_DIR=cache_dir):
+            with patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 1):
+                with patch('contentserver.caching.os.rename', side_effect=OSError):
+                    # once without any cached metadata, then with it
+                    for __ in range(2):
+                        resp = Client().get(self.url_unlocked)
+                        self.assertEqual(resp.status_code, 200)
+                        self.assertEqual(''.join(resp), data)
+                        self.assertEqual(int(resp['Content-Length']), len(data))
+
+    def test_disk_cache_streams_closed(self):
+        """
+        Test that the cached files of assets are closed once their data is served, or if it isn't.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        del_cached_content(self.unlocked_asset)
+
+        with override_settings(ASSET_DISK_CACHE_DIR=cache_dir):
+            with patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 1):
+                client = Client()
+                ''.join(client.get(self.url_unlocked))
+
+                with patch('contentserver.middleware._close', wraps=_close) as close:
+                    resp = client.get(self.url_unlocked)
+                    ''.join(resp)
+                    self.assertEqual(close.call_count, 1)
+
+                    resp = client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=resp['ETag'])
+                    self.assertEqual(resp.status_code, 304)
+                    self.assertEqual(close.call_count, 2)
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+    def _content(self, name, data):
+        """
+        Return a StaticContentStream of an asset with `data`.
+        """
+        return StaticContentStream(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', StringIO.StringIO(data),
+            length=len(data), content_digest=hashlib.md5(data).hexdigest()
+        )
+
+    def test_get_set(self):
+        cache = AssetDiskCache(self.directory, 1024)
+        content = self._content('a.txt', 'abc')
+        self.assertIsNone(cache.get(content))
+
+        cached = cache.set(content)
+        self.assertEqual(''.join(cached.stream_data()), 'abc')
+        self.assertEqual(''.join(cache.get(content).stream_data_in_range(1, 2)), 'bc')
+        self.assertEqual(cache.get(content).content_type, 'text/plain')
+
+        # changed data is cached separately
+        self.assertIsNone(cache.get(self._content('a.txt', 'abd')))
+
+    def test_eviction(self):
+        cache = AssetDiskCache(self.directory, 10)
+        first, second = self._content('a.txt', 'a' * 6), self._content('b.txt', 'b' * 6)
+        cache.set(first)
+        # make sure the first asset was used least recently
+        os.utime(cache._path(first), (1, 1))  # pylint: disable=protected-access
+        cache.set(second)
+        self.assertIsNone(cache.get(first))
+        self.assertIsNotNone(cache.get(second))
+
+    def test_too_large(self):
+        cache = AssetDiskCache(self.directory, 2)
+        self.assertFalse(cache.can_cache(self._content('a.txt', 'abc')))
+        self.assertIsNone(cache.set(self._content('a.txt', 'abc')))
+
+    def test_write_error(self):
+        cache = AssetDiskCache(self.directory, 1024)
+        content = self._content('a.txt', 'abc')
+        with patch('contentserver.caching.os.rename', side_effect=OSError):
+            self.assertIsNone(cache.set(content))
+        self.assertIsNone(cache.get(content))
+        # no temporary file is left behind
+        self.assertEqual(os.listdir(self.directory), [])
+
 
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
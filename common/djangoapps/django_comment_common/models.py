@@ -87,13 +87,32 @@ class Role(models.Model):
         course = modulestore().get_course(self.course_id)
         if course is None:
             raise ItemNotFoundError(self.course_id)
-        if self.name == FORUM_ROLE_STUDENT and \
-           (permission.startswith('edit') or permission.startswith('update') or permission.startswith('create')) and \
-           (not course.forum_posts_allowed):
+        if self._is_denied(permission, course):
             return False
 
         return self.permissions.filter(name=permission).exists()
 
+    def get_permission_names(self, course):
+        """
+        Return the names of the permissions of this role that has_permission grants,
+        given the course of this role. Uses the prefetched permissions, if any.
+        """
+        return set(
+            permission.name for permission in self.permissions.all()
+            if not self._is_denied(permission.name, course)
+        )
+
+    def _is_denied(self, permission, course):
+        """
+        Return whether the permission is denied to this role in course, whether or not
+        the role has it: students can't create or edit posts when the forum is closed.
+        """
+        return (
+            self.name == FORUM_ROLE_STUDENT and
+            (permission.startswith('edit') or permission.startswith('update') or permission.startswith('create')) and
+            (not course.forum_posts_allowed)
+        )
+
 
 class Permission(models.Model):
     name = models.CharField(max_length=30, null=False, blank=False, primary_key=True)
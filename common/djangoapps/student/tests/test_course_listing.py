@@ -12,6 +12,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.django import modulestore
 from xmodule.error_module import ErrorDescriptor
+from django.core.cache import cache
 from django.test.client import Client
 from student.models import CourseEnrollment
 from student.views import get_course_enrollment_pairs
@@ -33,6 +34,8 @@ class TestCourseListing(ModuleStoreTestCase):
         Add a student & teacher
         """
         super(TestCourseListing, self).setUp()
+        # Don't list the courses of the other tests from their cached overviews
+        cache.clear()
 
         self.student = UserFactory()
         self.teacher = UserFactory()
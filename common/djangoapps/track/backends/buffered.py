@@ -0,0 +1,150 @@
+"""Event tracker backend that sends events to another backend in batches."""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger('track.backends.buffered')
+
+
+class BufferedBackend(BaseBackend):
+    """Event tracker backend that queues events in memory.
+
+    A background thread sends the queued events in batches to the
+    wrapped backend, using its `send_many`, so that tracking an event
+    doesn't wait for the backend. For example::
+
+      TRACKING_BACKENDS = {
+          'mongo': {
+              'ENGINE': 'track.backends.buffered.BufferedBackend',
+              'OPTIONS': {
+                  'backend': {
+                      'ENGINE': 'track.backends.mongodb.MongoBackend',
+                      'OPTIONS': {...}
+                  }
+              }
+          }
+      }
+
+    The queued events are sent when the process exits.
+
+    """
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0, put_timeout=0,
+                 **kwargs):
+        """Event tracker backend that queues events in memory.
+
+        :Parameters:
+          - `backend`: configuration of the wrapped backend, with the
+            same keys as the values of TRACKING_BACKENDS.
+          - `max_queue_size`: the most events that are queued.
+          - `batch_size`: the most events that are sent at once.
+          - `flush_interval`: the most seconds an event is queued
+            before being sent, unless the wrapped backend is busy.
+          - `put_timeout`: the seconds `send` waits for room in a full
+            queue before dropping the event. Events are dropped at
+            once by default, so that tracking never slows requests.
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        # Import here to avoid a circular import.
+        from track.tracker import _instantiate_backend_from_name
+
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self.queue = Queue.Queue(max_queue_size)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+
+        atexit.register(self.flush)
+
+    def send(self, event):
+        self._ensure_flusher()
+        try:
+            if self.put_timeout:
+                self.queue.put(event, timeout=self.put_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except Queue.Full:
+            self.dropped += 1
+            dog_stats_api.increment('track.buffered.dropped')
+
+    def flush(self):
+        """Send all queued events now."""
+        while True:
+            batch = self._get_batch(timeout=None)
+            if not batch:
+                break
+            self._send_batch(batch)
+
+    def _ensure_flusher(self):
+        """Start the thread sending the queued events, unless it's running.
+
+        Threads don't survive forking, so forked worker processes each
+        start their own, with a queue of their own.
+
+        """
+        if self._flusher_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            if self._flusher_pid is not None:
+                # Events queued in the parent process are sent by it.
+                self.queue = Queue.Queue(self.max_queue_size)
+            self._flusher = threading.Thread(target=self._run, name='track-buffered-flusher')
+            self._flusher.daemon = True
+            self._flusher.start()
+            self._flusher_pid = os.getpid()
+
+    def _run(self):
+        """Send the queued events in batches, forever."""
+        while True:
+            batch = self._get_batch(timeout=self.flush_interval)
+            if batch:
+                self._send_batch(batch)
+
+    def _get_batch(self, timeout):
+        """Return up to `batch_size` queued events.
+
+        Waits up to `timeout` seconds for the first event, or not at
+        all if `timeout` is None.
+
+        """
+        batch = []
+        try:
+            if timeout is None:
+                batch.append(self.queue.get_nowait())
+            else:
+                batch.append(self.queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except Queue.Empty:
+            pass
+        return batch
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the wrapped backend."""
+        dog_stats_api.increment('track.buffered.sent', len(batch))
+        try:
+            self.backend.send_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            # The events are lost, but the thread keeps sending others.
+            log.exception('Error sending %d events to the wrapped event tracker backend', len(batch))
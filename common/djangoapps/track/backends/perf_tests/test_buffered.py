@@ -0,0 +1,68 @@
+"""
+Performance test for tracking events with the buffered backend.
+"""
+from __future__ import absolute_import
+
+import unittest
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from django.test import TransactionTestCase
+
+from track.backends.buffered import BufferedBackend
+from track.backends.django import DjangoBackend
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class BufferedBackendPerformanceTest(TransactionTestCase):
+    """
+    Compare the time requests spend tracking events with the synchronous Django
+    backend and with the buffered one, and the total throughput of both.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_EVENTS = 5000
+
+    def _events(self):
+        """Return events like the ones tracked for video and problem interactions"""
+        for index in xrange(self.NUM_EVENTS):
+            yield {
+                'username': 'user{}'.format(index % 100),
+                'event_source': 'browser',
+                'event_type': 'play_video',
+                'event': '{"id": "video", "currentTime": %d}' % index,
+                'time': '2013-01-01T12:01:00-05:00',
+            }
+
+    def test_throughput(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        with CodeBlockTimer("TrackingBackend:{}:synchronous".format(self.NUM_EVENTS)):
+            backend = DjangoBackend()
+            for event in self._events():
+                backend.send(event)
+
+        # The test database can't be shared with the flusher thread, so the
+        # queued events are all sent by flush: "send" times what requests
+        # spend tracking, and the total the throughput of batched inserts.
+        backend = BufferedBackend({'ENGINE': 'track.backends.django.DjangoBackend'}, max_queue_size=self.NUM_EVENTS)
+        with patch.object(backend, '_ensure_flusher'):
+            with CodeBlockTimer("TrackingBackend:{}:buffered".format(self.NUM_EVENTS)):
+                with CodeBlockTimer("TrackingBackend:{}:buffered:send".format(self.NUM_EVENTS)):
+                    for event in self._events():
+                        backend.send(event)
+                backend.flush()
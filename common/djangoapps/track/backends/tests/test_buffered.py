@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+
+import threading
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+from track.backends.django import DjangoBackend, TrackingLog
+
+
+class InMemoryBackend(BaseBackend):
+    """Event tracker backend that keeps the batches of events it is sent."""
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.batches = []
+        self.received = threading.Event()
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        self.batches.append(events)
+        self.received.set()
+
+
+IN_MEMORY_BACKEND = {'ENGINE': 'track.backends.tests.test_buffered.InMemoryBackend'}
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        atexit_patcher = patch('track.backends.buffered.atexit')
+        self.atexit = atexit_patcher.start()
+        self.addCleanup(atexit_patcher.stop)
+
+    def test_send_in_background(self):
+        backend = BufferedBackend(IN_MEMORY_BACKEND, flush_interval=0.01)
+        backend.send({'test': 1})
+
+        self.assertTrue(backend.backend.received.wait(5))
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+
+    def test_flush_in_batches(self):
+        backend = BufferedBackend(IN_MEMORY_BACKEND, batch_size=2)
+        with patch.object(backend, '_ensure_flusher'):
+            for index in range(5):
+                backend.send({'test': index})
+        backend.flush()
+
+        self.assertEqual(
+            backend.backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]]
+        )
+
+    def test_drop_when_full(self):
+        backend = BufferedBackend(IN_MEMORY_BACKEND, max_queue_size=2)
+        with patch.object(backend, '_ensure_flusher'):
+            for index in range(3):
+                backend.send({'test': index})
+        backend.flush()
+
+        self.assertEqual(backend.dropped, 1)
+        self.assertEqual(backend.backend.batches, [[{'test': 0}, {'test': 1}]])
+
+    def test_flush_at_exit(self):
+        backend = BufferedBackend(IN_MEMORY_BACKEND)
+        self.atexit.register.assert_called_once_with(backend.flush)
+
+    def test_django_backend(self):
+        backend = BufferedBackend({'ENGINE': 'track.backends.django.DjangoBackend'})
+        with patch.object(backend, '_ensure_flusher'):
+            for username in ('first', 'second'):
+                backend.send({'username': username, 'time': '2013-01-01T12:01:00-05:00'})
+        backend.flush()
+
+        self.assertEqual(
+            sorted(TrackingLog.objects.values_list('username', flat=True)), ['first', 'second']
+        )
@@ -4,9 +4,11 @@ Parser and evaluator for FormulaResponse and NumericalResponse
 Uses pyparsing to parse. Main function as of now is evaluator().
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
@@ -162,6 +164,17 @@ def eval_parallel(parse_result):
     return 1. / sum(reciprocals)
 
 
+def eval_parallel_values(values):
+    """
+    Compute the parallel resistors operator of the values, like `eval_parallel`.
+
+    The values may be numpy arrays, of which none may contain zeros.
+    """
+    if any(isinstance(value, numpy.ndarray) for value in values):
+        return 1. / sum(1. / value for value in values)
+    return eval_parallel(values)
+
+
 def eval_sum(parse_result):
     """
     Add the inputs, keeping in mind their sign.
@@ -228,34 +241,184 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    # Parse the tree, or get it from the cache.
+    expression = compile_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
     # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    expression.parsed.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+    return expression.evaluate(all_variables, all_functions)
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each dictionary of variables in `variables_list`.
+
+    Return the list of values `evaluator` would return for each of them. The
+    samples are evaluated all at once as numpy arrays when possible.
+    """
+    # No need to go further.
+    if math_expr.strip() == "" or not variables_list:
+        return [float('nan')] * len(variables_list)
+
+    expression = compile_expression(math_expr, case_sensitive)
+
+    samples = []
+    for variables in variables_list:
+        all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+        expression.parsed.check_variables(all_variables, all_functions)
+        samples.append(all_variables)
+
+    # Any error, even one numpy only warns about, could be raised by the
+    # evaluation of a single sample: evaluate them one by one then.
+    try:
+        with numpy.errstate(all='raise'):
+            values = expression.evaluate_vectorized(samples, all_functions)
+    except Exception:  # pylint: disable=broad-except
+        values = None
+    if values is None:
+        values = [expression.evaluate(all_variables, all_functions) for all_variables in samples]
+    return values
+
+
+# The expressions most recently compiled by `compile_expression`, keyed by the
+# expression and case sensitivity. Formula checks evaluate the same answers and
+# hints over and over.
+COMPILED_EXPRESSIONS_CACHE_SIZE = 1000
+_compiled_expressions = OrderedDict()
+_compiled_expressions_lock = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Parse an expression and return it as a `CompiledExpression`.
+
+    The most recently used expressions are cached.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        expression = _compiled_expressions.pop(key, None)
+        if expression is not None:
+            _compiled_expressions[key] = expression
+            return expression
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+    expression = CompiledExpression(math_interpreter)
+
+    with _compiled_expressions_lock:
+        _compiled_expressions[key] = expression
+        while len(_compiled_expressions) > COMPILED_EXPRESSIONS_CACHE_SIZE:
+            _compiled_expressions.popitem(last=False)
+    return expression
+
+
+class CompiledExpression(object):
+    """
+    A parsed expression, compiled into a function of the variables and functions.
+
+    It evaluates the expression as `reduce_tree` would with the evaluation
+    actions above, without walking the parse tree.
+    """
+    def __init__(self, parsed):
+        """
+        Compile the `ParseAugmenter` `parsed`, which must not be modified after.
+        """
+        self.parsed = parsed
+        if parsed.case_sensitive:
+            self.casify = lambda x: x
+        else:
+            self.casify = lambda x: x.lower()  # Lowercase for case insens.
+        self.variables_used = set(self.casify(var) for var in parsed.variables_used)
+        self.compiled = self.compile_node(parsed.tree)
+
+    def compile_node(self, node):
+        """
+        Return a function of the variables and functions dictionaries evaluating `node`.
+        """
+        node_name = node.getName()
+        if node_name == 'number':
+            value = eval_number(node)
+            return lambda variables, functions: value
+        elif node_name == 'variable':
+            varname = self.casify(node[0])
+            return lambda variables, functions: variables[varname]
+
+        # The operands of the node, leaving out its operators and parentheses.
+        operands = [self.compile_node(k) for k in node if isinstance(k, ParseResults)]
+        if node_name == 'function':
+            funcname = self.casify(node[0])
+            argument = operands[0]
+            return lambda variables, functions: functions[funcname](argument(variables, functions))
+        elif node_name == 'atom':
+            return operands[0]
+        elif node_name == 'power':
+            if len(operands) == 1:
+                return operands[0]
+            operands.reverse()
+            return lambda variables, functions: reduce(
+                lambda a, b: b ** a, [operand(variables, functions) for operand in operands]
+            )
+        elif node_name == 'parallel':
+            if len(operands) == 1:
+                return operands[0]
+            return lambda variables, functions: eval_parallel_values(
+                [operand(variables, functions) for operand in operands]
+            )
+        elif node_name in ('product', 'sum'):
+            if node_name == 'product':
+                total, ops = 1.0, {'*': operator.mul, '/': operator.truediv}
+                current_op = operator.mul
+            else:
+                total, ops = 0.0, {'+': operator.add, '-': operator.sub}
+                current_op = operator.add
+            steps = []
+            remaining_operands = iter(operands)
+            for k in node:
+                if isinstance(k, ParseResults):
+                    steps.append((current_op, next(remaining_operands)))
+                else:
+                    current_op = ops[k]
+
+            def evaluate_operations(variables, functions):
+                """
+                Apply the operations to the operands from left to right.
+                """
+                result = total
+                for op, operand in steps:
+                    result = op(result, operand(variables, functions))
+                return result
+            return evaluate_operations
+        raise Exception(u"Unknown branch name '{}'".format(node_name))  # pragma: no cover
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression, given the variables and functions with their defaults.
+        """
+        return self.compiled(variables, functions)
+
+    def evaluate_vectorized(self, variables_list, functions):
+        """
+        Evaluate the expression for each dictionary of variables in `variables_list`
+        at once, passing the values of the variables that differ as numpy arrays.
+
+        Return the list of values, or None if the result doesn't have one per sample.
+        """
+        variables = dict(variables_list[0])
+        for varname in self.variables_used:
+            values = [sample[varname] for sample in variables_list]
+            if any(value != values[0] for value in values):
+                variables[varname] = numpy.array(values)
+
+        result = numpy.asarray(self.evaluate(variables, functions))
+        if result.shape == ():
+            return [result.item()] * len(variables_list)
+        elif result.shape == (len(variables_list),):
+            return result.tolist()
+        return None
 
 
 class ParseAugmenter(object):
@@ -0,0 +1,62 @@
+"""
+Performance test for evaluating formulas with calc.py
+"""
+
+import random
+import unittest
+
+from nose.plugins.skip import SkipTest
+
+import calc
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class EvaluatorPerformanceTest(unittest.TestCase):
+    """
+    Compare the time checking formulas takes by parsing and evaluating the expressions
+    for each sample, and with compiled expressions evaluated over all samples at once.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_CHECKS = 100
+    NUM_SAMPLES = 20
+    EXPRESSIONS = ['x^2 + 2*x*y + y^2', '(x + y)^2', 'sin(x)^2 + cos(x)^2 + y/x']
+
+    def test_evaluate_samples(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        samples = [
+            {'x': random.uniform(1, 10), 'y': random.uniform(1, 10)} for __ in xrange(self.NUM_SAMPLES)
+        ]
+
+        with CodeBlockTimer("Evaluator:{}:uncached".format(self.NUM_CHECKS)):
+            for __ in xrange(self.NUM_CHECKS):
+                for math_expr in self.EXPRESSIONS:
+                    for variables in samples:
+                        math_interpreter = calc.ParseAugmenter(math_expr)
+                        math_interpreter.parse_algebra()
+                        calc.CompiledExpression(math_interpreter).evaluate(*calc.add_defaults(variables, {}, False))
+
+        with CodeBlockTimer("Evaluator:{}:cached".format(self.NUM_CHECKS)):
+            for __ in xrange(self.NUM_CHECKS):
+                for math_expr in self.EXPRESSIONS:
+                    for variables in samples:
+                        calc.evaluator(variables, {}, math_expr)
+
+        with CodeBlockTimer("Evaluator:{}:vectorized".format(self.NUM_CHECKS)):
+            for __ in xrange(self.NUM_CHECKS):
+                for math_expr in self.EXPRESSIONS:
+                    calc.evaluate_samples(samples, {}, math_expr)
@@ -8,7 +8,7 @@ Because intermediate values of the render contain more data than simply the
 string of latex, store it in a custom class `LatexRendered`.
 """
 
-from calc import ParseAugmenter, DEFAULT_VARIABLES, DEFAULT_FUNCTIONS, SUFFIXES
+from calc import compile_expression, DEFAULT_VARIABLES, DEFAULT_FUNCTIONS, SUFFIXES
 
 
 class LatexRendered(object):
@@ -363,9 +363,8 @@ def latex_preview(math_expr, variables=(), functions=(), case_sensitive=False):
     if math_expr.strip() == "":
         return ""
 
-    # Parse tree
-    latex_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    latex_interpreter.parse_algebra()
+    # Parse tree, or get it from the cache.
+    latex_interpreter = compile_expression(math_expr, case_sensitive).parsed
 
     # Get our variables together.
     variables, functions = add_defaults(variables, functions, case_sensitive)
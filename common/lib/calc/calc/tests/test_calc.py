@@ -5,6 +5,7 @@ Unit tests for calc.py
 import unittest
 import numpy
 import calc
+from mock import patch
 from pyparsing import ParseException
 
 # numpy's default behavior when it evaluates a function outside its domain
@@ -559,3 +560,53 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test the cache of compiled expressions and the evaluation of many samples at once.
+    """
+    SAMPLES = [{'x': 1.5, 'y': -2.0}, {'x': 3.0, 'y': 0.5}, {'x': 0.25, 'y': 4.0}]
+
+    def assert_samples_evaluated(self, math_expr, samples=SAMPLES):
+        """
+        Check that `evaluate_samples` gives the values `evaluator` gives for each sample.
+        """
+        expected = [calc.evaluator(variables, {}, math_expr) for variables in samples]
+        values = calc.evaluate_samples(samples, {}, math_expr)
+        self.assertEqual(len(values), len(expected))
+        for value, expected_value in zip(values, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(value))
+            else:
+                self.assertAlmostEqual(value, expected_value)
+
+    def test_cache(self):
+        expression = calc.compile_expression('x^2 + y')
+        self.assertIs(calc.compile_expression('x^2 + y'), expression)
+        self.assertIsNot(calc.compile_expression('x^2 + y', case_sensitive=True), expression)
+
+    @patch('calc.calc.COMPILED_EXPRESSIONS_CACHE_SIZE', 2)
+    def test_cache_evicts_least_recently_used(self):
+        first = calc.compile_expression('x + 1')
+        second = calc.compile_expression('x + 2')
+        calc.compile_expression('x + 1')
+        calc.compile_expression('x + 3')
+        self.assertIs(calc.compile_expression('x + 1'), first)
+        self.assertIsNot(calc.compile_expression('x + 2'), second)
+
+    def test_evaluate_samples(self):
+        for math_expr in ['x^2 + sin(y)', '-x*y/2 + 3', 'x || y', '5k', 'arccot(y)', 'fact(3)*x', 'x^y^2', '']:
+            self.assert_samples_evaluated(math_expr)
+
+        samples = [{'x': 1.0, 'y': 2.0}, {'x': 0.0, 'y': 2.0}]
+        self.assert_samples_evaluated('x || y', samples)
+        self.assert_samples_evaluated('sqrt(x - 1)', samples)
+
+    def test_evaluate_samples_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.SAMPLES + [{'x': 0.0, 'y': 1.0}], {}, '1/x')
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples(self.SAMPLES, {}, 'y^0.5')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.SAMPLES, {}, 'x + z')
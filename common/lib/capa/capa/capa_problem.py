@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,125 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The number of problem templates kept by `get_problem_template`.
+PROBLEM_TEMPLATE_CACHE_SIZE = 500
+_problem_templates = OrderedDict()
+_problem_templates_lock = threading.Lock()
+
+
+def assign_response_ids(tree, problem_id):
+    """
+    Assign IDs to all the responses of the problem `tree`, and sub-IDs to all their
+    entries (textline, schematic, solution, etc.).  In-place transformation.
+
+    Return the list of the responses, each with the list of its entries.
+    """
+    response_inputfields = []
+    response_id = 1
+    for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+        response_id_str = problem_id + "_" + str(response_id)
+        # create and save ID for this response
+        response.set('id', response_id_str)
+        response_id += 1
+
+        answer_id = 1
+        input_tags = inputtypes.registry.registered_tags()
+        inputfields = tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
+            id=response_id_str
+        )
+
+        # assign one answer_id for each input type or solution type
+        for entry in inputfields:
+            entry.attrib['response_id'] = str(response_id)
+            entry.attrib['answer_id'] = str(answer_id)
+            entry.attrib['id'] = "%s_%i_%i" % (problem_id, response_id, answer_id)
+            answer_id = answer_id + 1
+
+        response_inputfields.append((response, inputfields))
+    return response_inputfields
+
+
+class ProblemTemplate(object):
+    """
+    The preparation of a problem which depends on neither its seed nor its state: its text with
+    <startouttext /> and <endouttext /> converted, and its parsed tree with the IDs of its responses
+    and their entries assigned, unless it includes files, which are included into each problem.
+    The max score of the problem is computed along, when its response types allow it.
+
+    Problems are prepared by cloning the template.
+    """
+    def __init__(self, problem_text, problem_id):
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+        self.problem_text = problem_text
+
+        # parse problem XML file into an element tree
+        self.tree = etree.XML(problem_text)
+
+        # The responses and their entries are kept as their positions in the tree.
+        self.response_positions = None
+        # The max score of the problem, if it is known from its XML.
+        self.max_score = None
+        if not self.tree.findall('.//include'):
+            response_inputfields = assign_response_ids(self.tree, problem_id)
+            positions = {element: position for position, element in enumerate(self.tree.iter())}
+            self.response_positions = [
+                (positions[response], [positions[entry] for entry in inputfields])
+                for response, inputfields in response_inputfields
+            ]
+            max_scores = [
+                responsetypes.registry.get_class_for_tag(response.tag).get_max_score_from_xml(response, inputfields)
+                for response, inputfields in response_inputfields
+            ]
+            if None not in max_scores:
+                self.max_score = sum(max_scores)
+
+    def clone(self):
+        """
+        Return a copy of the tree, and the list of its responses each with the list of its entries,
+        or None if the IDs of the responses are not assigned since the problem includes files.
+        """
+        tree = deepcopy(self.tree)
+        if self.response_positions is None:
+            return tree, None
+        elements = list(tree.iter())
+        return tree, [
+            (elements[response], [elements[entry] for entry in inputfields])
+            for response, inputfields in self.response_positions
+        ]
+
+
+def get_problem_template(problem_text, problem_id):
+    """
+    Return the `ProblemTemplate` of the problem with `problem_text` and `problem_id`.
+
+    The templates of the most recently prepared problems are cached.
+    """
+    encoded_text = problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+    key = (hashlib.md5(encoded_text).hexdigest(), problem_id)
+    with _problem_templates_lock:
+        template = _problem_templates.pop(key, None)
+        if template is not None:
+            _problem_templates[key] = template
+            return template
+
+    template = ProblemTemplate(problem_text, problem_id)
+    with _problem_templates_lock:
+        _problem_templates[key] = template
+        while len(_problem_templates) > PROBLEM_TEMPLATE_CACHE_SIZE:
+            _problem_templates.popitem(last=False)
+    return template
+
+
+def get_problem_max_score(problem_text, problem_id):
+    """
+    Return the max score of the problem with `problem_text` and `problem_id` computed from its XML,
+    without running its scripts, or None if the problem has to be instantiated for it.
+    """
+    return get_problem_template(problem_text, problem_id).max_score
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,16 +276,15 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        # Clone the parsed problem from its template, with the IDs of its responses assigned
+        # unless it includes files.
+        template = get_problem_template(problem_text, self.problem_id)
+        self.problem_text = template.problem_text
+        self.tree, response_inputfields = template.clone()
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        if response_inputfields is None:
+            # handle any <include file="foo"> tags
+            self._process_includes()
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -172,14 +293,16 @@ class LoncapaProblem(object):
         # transformations.  This also creates the dict (self.responders) of Response
         # instances for each question in the problem. The dict has keys = xml subtree of
         # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        self._preprocess_problem(self.tree, response_inputfields)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
 
         # dictionary of InputType objects associated with this problem
         #   input_id string -> InputType object
-        self.inputs = {}
+        # They are created along with the HTML of the problem, once it is needed.
+        self._inputs = {}
+        self._extracted_tree = None
 
         # Run response late_transforms last (see MultipleChoiceResponse)
         # Sort the responses to be in *_1 *_2 ... order.
@@ -189,7 +312,23 @@ class LoncapaProblem(object):
             if hasattr(response, 'late_transforms'):
                 response.late_transforms(self)
 
-        self.extracted_tree = self._extract_html(self.tree)
+    @property
+    def extracted_tree(self):
+        """
+        The XHTML tree of the problem as it was constructed.
+        """
+        if self._extracted_tree is None:
+            self._extracted_tree = self._extract_html(self.tree)
+        return self._extracted_tree
+
+    @property
+    def inputs(self):
+        """
+        The InputType objects of the problem keyed by input id.
+        """
+        if self._extracted_tree is None:
+            self._extracted_tree = self._extract_html(self.tree)
+        return self._inputs
 
     def do_reset(self):
         """
@@ -508,7 +647,11 @@ class LoncapaProblem(object):
         Main method called externally to get the HTML to be rendered for this capa Problem.
         """
         self.do_targeted_feedback(self.tree)
-        html = contextualize_text(etree.tostring(self._extract_html(self.tree)), self.context)
+        extracted_tree = self._extract_html(self.tree)
+        if self._extracted_tree is None:
+            # The inputs were created along, so they aren't created again once needed.
+            self._extracted_tree = extracted_tree
+        html = contextualize_text(etree.tostring(extracted_tree), self.context)
         return html
 
     def handle_input_ajax(self, data):
@@ -742,8 +885,8 @@ class LoncapaProblem(object):
 
             input_type_cls = inputtypes.registry.get_class_for_tag(problemtree.tag)
             # save the input type so that we can make ajax calls on it if we need to
-            self.inputs[input_id] = input_type_cls(self.capa_system, problemtree, state)
-            return self.inputs[input_id].get_html()
+            self._inputs[input_id] = input_type_cls(self.capa_system, problemtree, state)
+            return self._inputs[input_id].get_html()
 
         # let each Response render itself
         if problemtree in self.responders:
@@ -777,39 +920,24 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _preprocess_problem(self, tree, response_inputfields=None):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
         Annoted correctness and value
         In-place transformation
 
+        `response_inputfields` are the responses and their entries, if their IDs are assigned already.
+
         Also create capa Response instances for each responsetype and save as self.responders
 
         Obtain all responder answers and save as self.responder_answers dict (key = response)
         """
-        response_id = 1
-        self.responders = {}
-        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
-            response_id_str = self.problem_id + "_" + str(response_id)
-            # create and save ID for this response
-            response.set('id', response_id_str)
-            response_id += 1
-
-            answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
-                id=response_id_str
-            )
-
-            # assign one answer_id for each input type or solution type
-            for entry in inputfields:
-                entry.attrib['response_id'] = str(response_id)
-                entry.attrib['answer_id'] = str(answer_id)
-                entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
-                answer_id = answer_id + 1
+        if response_inputfields is None:
+            response_inputfields = assign_response_ids(tree, self.problem_id)
 
+        self.responders = {}
+        for response, inputfields in response_inputfields:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
@@ -0,0 +1,71 @@
+"""
+Performance test for constructing LoncapaProblems.
+"""
+import glob
+import os
+import unittest
+
+import mock
+from nose.plugins.skip import SkipTest
+
+from capa import capa_problem
+from capa.tests import new_loncapa_problem
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class ProblemConstructionPerformanceTest(unittest.TestCase):
+    """
+    Compare the time constructing the capa problems of the test courses takes without
+    and with their templates cached, and the time getting their max scores takes from
+    the problems and from their XML.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_CONSTRUCTIONS = 20
+    DATA_DIR = os.path.join(os.path.dirname(__file__), '../../../../test/data')
+
+    def setUp(self):
+        super(ProblemConstructionPerformanceTest, self).setUp()
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        self.problem_texts = []
+        for filename in glob.glob(os.path.join(self.DATA_DIR, '*/problem/*.xml')):
+            with open(filename) as problem_file:
+                self.problem_texts.append(problem_file.read().decode('utf8'))
+
+    def test_construction(self):
+        with mock.patch('capa.capa_problem.PROBLEM_TEMPLATE_CACHE_SIZE', 0):
+            with CodeBlockTimer("ProblemConstruction:{}:uncached".format(len(self.problem_texts))):
+                for seed in xrange(self.NUM_CONSTRUCTIONS):
+                    for problem_text in self.problem_texts:
+                        new_loncapa_problem(problem_text, seed=seed)
+
+        with CodeBlockTimer("ProblemConstruction:{}:cached".format(len(self.problem_texts))):
+            for seed in xrange(self.NUM_CONSTRUCTIONS):
+                for problem_text in self.problem_texts:
+                    new_loncapa_problem(problem_text, seed=seed)
+
+    def test_max_score(self):
+        # Grading gets the max score of the problems the students have no score for yet.
+        with CodeBlockTimer("ProblemMaxScore:{}:problem".format(len(self.problem_texts))):
+            for seed in xrange(self.NUM_CONSTRUCTIONS):
+                for problem_text in self.problem_texts:
+                    new_loncapa_problem(problem_text, seed=seed).get_max_score()
+
+        with CodeBlockTimer("ProblemMaxScore:{}:xml".format(len(self.problem_texts))):
+            for __ in xrange(self.NUM_CONSTRUCTIONS):
+                for problem_text in self.problem_texts:
+                    capa_problem.get_problem_max_score(problem_text, '1')
@@ -0,0 +1,58 @@
+"""
+Performance test for running code in the pool of sandboxed Python workers.
+"""
+
+import textwrap
+import unittest
+
+from nose.plugins.skip import SkipTest
+
+from capa.safe_exec import safe_exec
+from capa.safe_exec.worker_pool import configure_worker_pool
+from codejail.jail_code import is_configured
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class WorkerPoolPerformanceTest(unittest.TestCase):
+    """
+    Compare the time running the code of a randomized problem takes in a new sandboxed
+    Python for each execution and in a pool of workers.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_EXECUTIONS = 100
+    CODE = textwrap.dedent("""\
+        a = random.randint(1, 10)
+        b = numpy.array([a, a + 1, a + 2])
+        answer = float(numpy.sum(b) * math.pi)
+    """)
+
+    def test_safe_exec(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+        if not is_configured("python"):
+            raise SkipTest("The sandbox isn't configured.")
+
+        with CodeBlockTimer("SafeExec:{}:codejail".format(self.NUM_EXECUTIONS)):
+            for seed in xrange(self.NUM_EXECUTIONS):
+                safe_exec(self.CODE, {}, random_seed=seed)
+
+        configure_worker_pool(size=1)
+        self.addCleanup(configure_worker_pool)
+        # Time the executions only, once the worker imported its modules.
+        safe_exec(self.CODE, {}, random_seed=0)
+        with CodeBlockTimer("SafeExec:{}:worker_pool".format(self.NUM_EXECUTIONS)):
+            for seed in xrange(self.NUM_EXECUTIONS):
+                safe_exec(self.CODE, {}, random_seed=seed)
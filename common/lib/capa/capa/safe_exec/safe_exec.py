@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import get_worker_pool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -46,6 +47,10 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The modules the workers of the pool import before they run any code, so that the
+# lazy imports above find them loaded already.
+WORKER_PRELOAD_MODULES = ["random"] + [modname for name, modname in ASSUMED_IMPORTS]
+
 
 def update_hash(hasher, obj):
     """
@@ -106,6 +111,9 @@ def safe_exec(
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    If a pool of sandboxed workers is configured, the code is run in one of them, unless
+    it needs `python_path` or `extra_files`, or no worker is available.
+
     """
     # Check the cache for a previous result.
     if cache:
@@ -126,6 +134,7 @@ def safe_exec(
 
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
+    all_code = code_prolog + LAZY_IMPORTS + code
 
     # Decide which code executor to use.
     if unsafely:
@@ -133,12 +142,18 @@ def safe_exec(
     else:
         exec_fn = codejail_safe_exec
 
+    # The workers of the pool only have the files of the sandbox.
+    worker_pool = None
+    if not unsafely and not python_path and not extra_files:
+        worker_pool = get_worker_pool(WORKER_PRELOAD_MODULES)
+
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        if worker_pool is None or not worker_pool.safe_exec(all_code, globals_dict, slug):
+            exec_fn(
+                all_code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
@@ -0,0 +1,155 @@
+"""A worker of the pool of sandboxed Pythons, run by the sandboxed Python.
+
+The worker imports the modules named on its command line, then reads requests from its stdin,
+one JSON-encoded list of the id of the request, the code to run, its globals and the resource
+limits per line.  It runs the code of each request in a child process forked from it, so that the
+code finds the modules imported already but none of the changes the code run before it made, and
+writes the resulting globals, or the error, back to its stdout as one JSON-encoded dictionary per
+line, with the id of the request.
+
+This file is read by worker_pool.py and run with `python -c`, so it can only use the standard
+library.
+
+"""
+
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+
+def jsonable_globals(globals_dict):
+    """Return the globals which can be sent back as JSON, as codejail's safe_exec does."""
+    ok_types = (
+        type(None), int, long, float, str, unicode, list, tuple, dict
+    )
+    bad_keys = ("__builtins__",)
+
+    def jsonable(v):
+        if not isinstance(v, ok_types):
+            return False
+        try:
+            json.dumps(v)
+        except Exception:
+            return False
+        return True
+    return dict(
+        (k, v)
+        for k, v in globals_dict.iteritems()
+        if jsonable(v) and k not in bad_keys
+    )
+
+
+def vmem_size():
+    """Return the size of the virtual memory of this process in bytes, or 0 if it can't be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except (IOError, ValueError):
+        return 0
+
+
+def set_process_limits(limits):
+    """Set the resource limits of the process running the code, as codejail does."""
+    # No subprocesses.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+
+    # The memory taken by the modules imported already doesn't count against the limit.
+    if limits.get("VMEM"):
+        vmem = vmem_size() + limits["VMEM"]
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+    if "FSIZE" in limits:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits["FSIZE"], limits["FSIZE"]))
+
+
+def run_child(code, globals_dict, limits, result_fd):
+    """Run the code in the forked child, and write the result to `result_fd`."""
+    # The code can't read the requests or write over the responses of the worker.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    try:
+        set_process_limits(limits)
+        exec code in globals_dict
+        result = {"globals": jsonable_globals(globals_dict)}
+    except BaseException:
+        result = {"error": traceback.format_exc()}
+
+    # The child never returns to the worker's loop.
+    try:
+        with os.fdopen(result_fd, "w") as result_file:
+            json.dump(result, result_file)
+    finally:
+        os._exit(0)
+
+
+def execute(code, globals_dict, limits):
+    """Run the code in a child process, and return the result dictionary."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(code, globals_dict, limits, write_fd)
+    os.close(write_fd)
+
+    # Read the result until the child exits, killing it if it runs for too long.
+    deadline = time.time() + limits["REALTIME"] if limits.get("REALTIME") else None
+    chunks = []
+    while True:
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        if not select.select([read_fd], [], [], timeout)[0]:
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    __, status = os.waitpid(pid, 0)
+
+    try:
+        return json.loads("".join(chunks))
+    except ValueError:
+        if os.WIFSIGNALED(status):
+            reason = "was killed by signal %d" % os.WTERMSIG(status)
+        else:
+            reason = "exited with status %d" % os.WEXITSTATUS(status)
+        return {"error": "The code %s before it finished running.\n" % reason}
+
+
+def main():
+    """Import the modules named on the command line, and serve requests until the stdin is closed."""
+    for modname in sys.argv[1:]:
+        try:
+            __import__(modname)
+        except Exception:
+            pass
+
+    while True:
+        request = sys.stdin.readline()
+        if not request:
+            break
+        request_id, code, globals_dict, limits = json.loads(request)
+        response = execute(code, globals_dict, limits)
+        response["id"] = request_id
+        # The code runs in children forked from the worker, so their memory use counts as the worker's.
+        maxrss = max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        )
+        response["maxrss"] = maxrss * 1024
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
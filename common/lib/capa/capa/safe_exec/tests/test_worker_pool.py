@@ -0,0 +1,117 @@
+"""Test worker_pool.py"""
+
+import importlib
+import json
+import sys
+import unittest
+
+from mock import patch
+
+from capa.safe_exec import safe_exec
+from capa.safe_exec.safe_exec import WORKER_PRELOAD_MODULES
+from capa.safe_exec.worker_pool import WorkerPool, configure_worker_pool, get_worker_pool
+from codejail.jail_code import is_configured
+from codejail.safe_exec import SafeExecException
+
+# The safe_exec module, which the safe_exec function shadows in the capa.safe_exec package.
+safe_exec_module = importlib.import_module("capa.safe_exec.safe_exec")
+
+
+class TestWorkerPool(unittest.TestCase):
+    """
+    Test the worker pool, with workers run by this Python rather than the sandboxed one.
+    """
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        self.pool = WorkerPool(
+            [sys.executable, "-E", "-B"], size=2, max_executions=3, max_memory=0, preload_modules=["math"]
+        )
+        self.pool.start()
+        self.addCleanup(self.pool.stop)
+
+    def test_set_values(self):
+        g = {"b": 2}
+        self.assertTrue(self.pool.safe_exec("import math\na = b + int(math.pi)", g))
+        self.assertEqual(g["a"], 5)
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_executions_are_isolated(self):
+        g = {}
+        self.pool.safe_exec("import math\nmath.pi = 3\na = 1", g)
+        for __ in range(self.pool.size):
+            g = {}
+            self.pool.safe_exec("import math\nb = math.pi", g)
+            self.assertEqual(g, {"b": 3.141592653589793})
+
+    def test_workers_recycled(self):
+        workers = list(self.pool.idle_workers)
+        for __ in range(self.pool.max_executions):
+            self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool.num_workers, 2)
+        self.assertNotEqual(self.pool.idle_workers, workers)
+
+    @patch.dict("codejail.jail_code.LIMITS", {"VMEM": 0})
+    def test_workers_recycled_for_memory(self):
+        # The memory used by the code run in the children forked from the worker counts as the worker's.
+        worker = self.pool.idle_workers[-1]
+        self.pool.max_memory = 64 * 1024 * 1024
+        self.pool.safe_exec("a = 1", {})
+        self.assertIn(worker, self.pool.idle_workers)
+        self.pool.safe_exec("a = ' ' * (128 * 1024 * 1024)\na = 1", {})
+        self.assertGreater(worker.maxrss, 128 * 1024 * 1024)
+        self.assertNotIn(worker, self.pool.idle_workers)
+
+    @patch.dict("codejail.jail_code.LIMITS", {"REALTIME": 1})
+    def test_realtime_limit(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("import time\ntime.sleep(10)", {})
+        self.assertIn("killed", cm.exception.message)
+        self.pool.safe_exec("a = 1", {})
+
+    def test_stale_response(self):
+        # The worker answers a request left over from before, such as one that timed out.
+        worker = self.pool.idle_workers[-1]
+        worker.process.stdin.write(json.dumps(["stale", "a = 1", {}, {}]) + "\n")
+        worker.process.stdin.flush()
+        self.assertFalse(self.pool.safe_exec("a = 2", {}))
+        self.assertNotIn(worker, self.pool.idle_workers)
+        self.assertEqual(self.pool.num_workers, 2)
+
+    def test_environment(self):
+        g = {}
+        self.pool.safe_exec("import os\nenv = dict(os.environ)", g)
+        self.assertEqual(g["env"], {})
+
+    def test_busy_workers(self):
+        # Without an idle worker, the code isn't run.
+        with patch.object(self.pool, "_acquire", return_value=None):
+            self.assertFalse(self.pool.safe_exec("a = 1", {}))
+
+
+class TestSafeExecWithWorkerPool(unittest.TestCase):
+    def setUp(self):
+        super(TestSafeExecWithWorkerPool, self).setUp()
+        configure_worker_pool(size=1)
+        self.addCleanup(configure_worker_pool)
+
+    def test_disabled_without_sandbox(self):
+        with patch("codejail.jail_code.is_configured", return_value=False):
+            self.assertIsNone(get_worker_pool(WORKER_PRELOAD_MODULES))
+
+    def test_extra_files_not_in_pool(self):
+        with patch.object(safe_exec_module, "get_worker_pool") as mock_get_worker_pool:
+            safe_exec("a = 1", {}, extra_files=[("constant.py", "THE_CONST = 23")])
+        self.assertFalse(mock_get_worker_pool.called)
+
+    def test_fallback(self):
+        # When no worker can run the code, it is run as it is without a pool.
+        with patch.object(safe_exec_module, "get_worker_pool") as mock_get_worker_pool:
+            mock_get_worker_pool.return_value.safe_exec.return_value = False
+            g = {}
+            safe_exec("a = 1/2", g)
+        self.assertTrue(mock_get_worker_pool.return_value.safe_exec.called)
+        self.assertEqual(g["a"], 0.5)
@@ -0,0 +1,244 @@
+"""A pool of sandboxed Python workers for capa's safe_exec.
+
+Starting the sandboxed Python and importing numpy, scipy and the other modules problems use
+takes much longer than running the code of most problems.  The workers of the pool are started
+once with the same command and user as codejail runs code with, import those modules, and run
+each code they're given in a process forked from them with codejail's resource limits.  See
+sandbox_worker.py for the worker's side.
+
+"""
+
+import atexit
+import json
+import logging
+import os
+import os.path
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# We'll need the code from sandbox_worker.py to start the workers, so read it now.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+SANDBOX_WORKER_PY = open(sandbox_worker_py_file).read()
+
+# How many seconds longer than the real time limit of the code to wait for a worker to respond
+# before deciding it is broken.
+WORKER_TIMEOUT_MARGIN = 5
+
+# The environment of the workers, which inherit none of ours, as codejail runs code.
+WORKER_ENV = {}
+
+
+class WorkerError(Exception):
+    """The worker didn't run the code it was given."""
+    pass
+
+
+class SandboxWorker(object):
+    """A sandboxed Python process running code over its stdin and stdout."""
+
+    def __init__(self, cmdline, preload_modules):
+        self.executions = 0
+        self.maxrss = 0
+        self.tmpdir = tempfile.mkdtemp(prefix="codejail-")
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmdline + ["-c", SANDBOX_WORKER_PY] + list(preload_modules),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                cwd=self.tmpdir, env=WORKER_ENV, close_fds=True,
+            )
+
+    def execute(self, code, globals_dict, limits):
+        """
+        Run `code` with `globals_dict` under `limits`, and return the worker's response dictionary.
+
+        Raises WorkerError if the worker doesn't respond in time, or responds to another request
+        than this one.
+        """
+        request_id = uuid.uuid4().hex
+        try:
+            self.process.stdin.write(json.dumps([request_id, code, json_safe(globals_dict), limits]) + "\n")
+            self.process.stdin.flush()
+            timeout = limits["REALTIME"] + WORKER_TIMEOUT_MARGIN if limits.get("REALTIME") else None
+            if not select.select([self.process.stdout], [], [], timeout)[0]:
+                raise WorkerError("The worker didn't respond in time")
+            response = self.process.stdout.readline()
+        except IOError as e:
+            raise WorkerError(str(e))
+        if not response:
+            raise WorkerError("The worker exited")
+
+        try:
+            response = json.loads(response)
+        except ValueError:
+            raise WorkerError("The worker's response isn't JSON")
+        if not isinstance(response, dict) or response.get("id") != request_id:
+            raise WorkerError("The worker responded to another request")
+        self.executions += 1
+        self.maxrss = response["maxrss"]
+        return response
+
+    def stop(self):
+        """Stop the worker, killing it if it is running code."""
+        # The worker exits once its stdin is closed.
+        try:
+            self.process.stdin.close()
+            self.process.kill()
+        except (IOError, OSError):
+            pass
+        self.process.wait()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class WorkerPool(object):
+    """
+    A pool of at most `size` workers, each recycled after `max_executions` executions, or once
+    its memory use exceeds `max_memory` bytes if it is not 0.
+
+    `cmdline` is the command starting the sandboxed Python, and `preload_modules` the names of the
+    modules the workers import before they run any code.
+
+    """
+
+    def __init__(self, cmdline, size, max_executions, max_memory, preload_modules):
+        self.cmdline = cmdline
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self.preload_modules = preload_modules
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.idle_workers = []
+        self.num_workers = 0
+
+    def start(self):
+        """Start the workers, which import their modules while the pool isn't used yet."""
+        with self.lock:
+            while self.num_workers < self.size:
+                self.idle_workers.append(self._start_worker())
+
+    def stop(self):
+        """Stop the idle workers."""
+        with self.lock:
+            while self.idle_workers:
+                self._stop_worker(self.idle_workers.pop())
+
+    def _start_worker(self):
+        """Start a new worker.  The lock must be held."""
+        worker = SandboxWorker(self.cmdline, self.preload_modules)
+        self.num_workers += 1
+        return worker
+
+    def _stop_worker(self, worker):
+        """Stop the worker.  The lock must be held."""
+        worker.stop()
+        self.num_workers -= 1
+
+    def _acquire(self):
+        """Return an idle worker, or a new one if there are none, or None if all workers are busy."""
+        with self.lock:
+            if self.idle_workers:
+                return self.idle_workers.pop()
+            if self.num_workers < self.size:
+                return self._start_worker()
+            return None
+
+    def _release(self, worker, broken=False):
+        """Make the worker idle again, or replace it if it is broken or is to be recycled."""
+        with self.lock:
+            if broken or worker.executions >= self.max_executions or \
+                    (self.max_memory and worker.maxrss > self.max_memory):
+                self._stop_worker(worker)
+                # The new worker imports its modules before the pool needs it.
+                worker = self._start_worker()
+            self.idle_workers.append(worker)
+
+    def safe_exec(self, code, globals_dict, slug=None):
+        """
+        Run `code` with `globals_dict` in a worker, as codejail's safe_exec does.
+
+        Returns False if no worker could run the code, which should be run by codejail then.
+
+        """
+        worker = self._acquire()
+        if worker is None:
+            return False
+
+        if slug:
+            log.debug("Executing jailed code %s in a worker", slug)
+        try:
+            response = worker.execute(code, globals_dict, dict(jail_code.LIMITS))
+        except WorkerError:
+            log.exception("Sandbox worker failed")
+            self._release(worker, broken=True)
+            return False
+        self._release(worker)
+
+        if "error" in response:
+            raise SafeExecException("Couldn't execute jailed code: %s" % response["error"])
+        globals_dict.update(response["globals"])
+        return True
+
+
+# The configuration of the worker pool, set by configure_worker_pool.  A size of 0 disables it.
+WORKER_POOL_CONFIG = {
+    "size": 0,
+    "max_executions": 100,
+    "max_memory": 0,
+}
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def configure_worker_pool(size=0, max_executions=100, max_memory=0):
+    """
+    Run the code of safe_exec in a pool of at most `size` sandboxed Python workers, each recycled
+    after `max_executions` executions, or once its memory use exceeds `max_memory` bytes if it is
+    not 0.
+
+    The workers are started with codejail's Python command once it is configured.
+
+    """
+    global _worker_pool  # pylint: disable=global-statement
+    with _worker_pool_lock:
+        if _worker_pool is not None:
+            _worker_pool.stop()
+            _worker_pool = None
+        WORKER_POOL_CONFIG.update(size=size, max_executions=max_executions, max_memory=max_memory)
+
+
+def get_worker_pool(preload_modules):
+    """
+    Return the worker pool of this process, starting it if needed, or None if it is disabled
+    or codejail isn't configured to run Python in a sandbox.
+    """
+    global _worker_pool  # pylint: disable=global-statement
+    if not WORKER_POOL_CONFIG["size"] or not jail_code.is_configured("python"):
+        return None
+
+    with _worker_pool_lock:
+        # The workers of the process this one was forked from can't be shared with it.
+        if _worker_pool is None or _worker_pool.pid != os.getpid():
+            command = jail_code.COMMANDS["python"]
+            cmdline = []
+            if command["user"]:
+                cmdline.extend(["sudo", "-u", command["user"]])
+            cmdline.extend(command["cmdline_start"])
+            _worker_pool = WorkerPool(cmdline, preload_modules=preload_modules, **WORKER_POOL_CONFIG)
+            _worker_pool.start()
+            atexit.register(_worker_pool.stop)
+        return _worker_pool
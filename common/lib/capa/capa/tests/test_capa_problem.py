@@ -0,0 +1,78 @@
+"""
+Tests of the templates LoncapaProblems are cloned from.
+"""
+import textwrap
+import unittest
+
+import mock
+
+from capa import capa_problem, responsetypes
+from .response_xml_factory import StringResponseXMLFactory
+from . import new_loncapa_problem, test_capa_system
+
+
+class ProblemTemplateTest(unittest.TestCase):
+    def setUp(self):
+        super(ProblemTemplateTest, self).setUp()
+        self.xml = StringResponseXMLFactory().build_xml(answer="Michigan", hints=None)
+
+    def test_template_cached(self):
+        problem = new_loncapa_problem(self.xml)
+        with mock.patch('capa.capa_problem.ProblemTemplate') as mock_template:
+            other_problem = new_loncapa_problem(self.xml, seed=17)
+        self.assertFalse(mock_template.called)
+
+        self.assertEqual(other_problem.get_question_answers(), problem.get_question_answers())
+        self.assertEqual(other_problem.get_answer_ids(), problem.get_answer_ids())
+
+    def test_problems_independent(self):
+        problem = new_loncapa_problem(self.xml)
+        problem.tree.set('modified', 'true')
+        other_problem = new_loncapa_problem(self.xml)
+        self.assertIsNot(other_problem.tree, problem.tree)
+        self.assertIsNone(other_problem.tree.get('modified'))
+
+        response = other_problem.responders.keys()[0]
+        self.assertIs(response.getroottree().getroot(), other_problem.tree)
+
+    def test_include_processed_per_problem(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="test_include.xml"/>
+            </problem>
+        """)
+        capa_system = test_capa_system()
+        capa_system.filestore = mock.Mock()
+        capa_system.filestore.open.return_value.read.return_value = (
+            '<stringresponse answer="1"><textline/></stringresponse>'
+        )
+
+        for __ in range(2):
+            problem = new_loncapa_problem(xml, capa_system=capa_system)
+            self.assertEqual(problem.get_question_answers(), {'1_2_1': '1'})
+        self.assertEqual(capa_system.filestore.open.call_count, 2)
+
+    def test_inputs_created_once_needed(self):
+        problem = new_loncapa_problem(self.xml)
+        with mock.patch.object(problem, '_extract_html', wraps=problem._extract_html) as extract_html:
+            problem.grade_answers({'1_2_1': 'Michigan'})
+            self.assertFalse(extract_html.called)
+            self.assertEqual(problem.inputs.keys(), ['1_2_1'])
+        self.assertTrue(extract_html.called)
+
+    @mock.patch('capa.capa_problem.PROBLEM_TEMPLATE_CACHE_SIZE', 1)
+    def test_cache_size(self):
+        template = capa_problem.get_problem_template(self.xml, '1')
+        self.assertIs(capa_problem.get_problem_template(self.xml, '1'), template)
+        capa_problem.get_problem_template(self.xml, '2')
+        self.assertIsNot(capa_problem.get_problem_template(self.xml, '1'), template)
+
+    def test_max_score_from_xml(self):
+        problem = new_loncapa_problem(self.xml)
+        self.assertEqual(capa_problem.get_problem_max_score(self.xml, '1'), problem.get_max_score())
+
+    def test_max_score_from_problem(self):
+        # Response types computing their max score differently don't allow it from the XML.
+        with mock.patch.object(responsetypes.StringResponse, 'get_max_score', lambda self: 2):
+            self.assertIsNone(capa_problem.get_problem_max_score(self.xml, 'max_score_from_problem'))
+            self.assertEqual(new_loncapa_problem(self.xml).get_max_score(), 2)
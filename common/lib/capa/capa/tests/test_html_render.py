@@ -186,11 +186,10 @@ class CapaHtmlRenderTest(unittest.TestCase):
 
         expected_solution_context = {'id': '1_solution_1'}
 
+        # The inputs are only rendered once the problem is.
         expected_calls = [
             mock.call('textline.html', expected_textline_context),
             mock.call('solutionspan.html', expected_solution_context),
-            mock.call('textline.html', expected_textline_context),
-            mock.call('solutionspan.html', expected_solution_context)
         ]
 
         self.assertEqual(
@@ -9,6 +9,7 @@ from pkg_resources import resource_string
 import dogstats_wrapper as dog_stats_api
 from .capa_base import CapaMixin, CapaFields, ComplexEncoder
 from capa import responsetypes
+from capa.capa_problem import get_problem_max_score
 from .progress import Progress
 from xmodule.x_module import XModule, module_attr, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.raw_module import RawDescriptor
@@ -186,6 +187,22 @@ class CapaDescriptor(CapaFields, RawDescriptor):
         registered_tags = responsetypes.registry.registered_tags()
         return set([node.tag for node in tree.iter() if node.tag in registered_tags])
 
+    def max_score(self):
+        """
+        Return the max score of the problem.
+
+        It is computed from the XML of the problem where its response types allow it, so that
+        grading doesn't instantiate the problem and run its scripts only for its max score.
+        """
+        try:
+            max_score = get_problem_max_score(self.data, self.location.html_id())
+        except Exception:  # pylint: disable=broad-except
+            # The errors of the problem are handled when it is instantiated.
+            max_score = None
+        if max_score is None:
+            return self._xmodule.max_score()
+        return max_score
+
     # Proxy to CapaModule for access to any of its attributes
     answer_available = module_attr('answer_available')
     check_button_name = module_attr('check_button_name')
@@ -33,6 +33,72 @@ CATALOG_VISIBILITY_ABOUT = "about"
 CATALOG_VISIBILITY_NONE = "none"
 
 
+def course_start_date_is_default(start, advertised_start):
+    """
+    Returns whether a course with these start and advertised start dates still has the default start date,
+    i.e. its start has not been modified, and its advertised start has not been set.
+    """
+    return advertised_start is None and start == DEFAULT_START_DATE
+
+
+def course_start_datetime_text(start, advertised_start, format_string, ugettext, strftime):
+    """
+    Returns the desired text corresponding a course's start date and time in UTC.  Prefers the advertised start,
+    then falls back to the start.
+
+    `ugettext` and `strftime` are the i18n service functions translating the text and formatting the dates, so that
+    the course overviews, which have no runtime, show the same text as the course descriptors.
+    """
+    def try_parse_iso_8601(text):
+        try:
+            result = Date().from_json(text)
+            if result is None:
+                result = text.title()
+            else:
+                result = strftime(result, format_string)
+                if format_string == "DATE_TIME":
+                    result = _add_timezone_string(result)
+        except ValueError:
+            result = text.title()
+
+        return result
+
+    if isinstance(advertised_start, basestring):
+        return try_parse_iso_8601(advertised_start)
+    elif course_start_date_is_default(start, advertised_start):
+        _ = ugettext
+        # Translators: TBD stands for 'To Be Determined' and is used when a course
+        # does not yet have an announced start date.
+        return _('TBD')
+    else:
+        when = advertised_start or start
+
+        if format_string == "DATE_TIME":
+            return _add_timezone_string(strftime(when, format_string))
+
+        return strftime(when, format_string)
+
+
+def course_end_datetime_text(end, format_string, strftime):
+    """
+    Returns the end date or date_time of a course formatted as a string, using the i18n service's `strftime`.
+
+    If the course does not have an end date set (end is None), an empty string will be returned.
+    """
+    if end is None:
+        return ''
+    else:
+        date_time = strftime(end, format_string)
+        return date_time if format_string == "SHORT_DATE" else _add_timezone_string(date_time)
+
+
+def _add_timezone_string(date_time):
+    """
+    Adds 'UTC' string to the end of start/end date and time texts.
+    """
+    return date_time + u" UTC"
+
+
 class StringOrDate(Date):
     def from_json(self, value):
         """
@@ -1257,36 +1323,9 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         then falls back to .start
         """
         i18n = self.runtime.service(self, "i18n")
-        _ = i18n.ugettext
-        strftime = i18n.strftime
-
-        def try_parse_iso_8601(text):
-            try:
-                result = Date().from_json(text)
-                if result is None:
-                    result = text.title()
-                else:
-                    result = strftime(result, format_string)
-                    if format_string == "DATE_TIME":
-                        result = self._add_timezone_string(result)
-            except ValueError:
-                result = text.title()
-
-            return result
-
-        if isinstance(self.advertised_start, basestring):
-            return try_parse_iso_8601(self.advertised_start)
-        elif self.start_date_is_still_default:
-            # Translators: TBD stands for 'To Be Determined' and is used when a course
-            # does not yet have an announced start date.
-            return _('TBD')
-        else:
-            when = self.advertised_start or self.start
-
-            if format_string == "DATE_TIME":
-                return self._add_timezone_string(strftime(when, format_string))
-
-            return strftime(when, format_string)
+        return course_start_datetime_text(
+            self.start, self.advertised_start, format_string, i18n.ugettext, i18n.strftime
+        )
 
     @property
     def start_date_is_still_default(self):
@@ -1294,7 +1333,7 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         Checks if the start date set for the course is still default, i.e. .start has not been modified,
         and .advertised_start has not been set.
         """
-        return self.advertised_start is None and self.start == CourseFields.start.default
+        return course_start_date_is_default(self.start, self.advertised_start)
 
     def end_datetime_text(self, format_string="SHORT_DATE"):
         """
@@ -1302,18 +1341,7 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
 
         If the course does not have an end date set (course.end is None), an empty string will be returned.
         """
-        if self.end is None:
-            return ''
-        else:
-            strftime = self.runtime.service(self, "i18n").strftime
-            date_time = strftime(self.end, format_string)
-            return date_time if format_string == "SHORT_DATE" else self._add_timezone_string(date_time)
-
-    def _add_timezone_string(self, date_time):
-        """
-        Adds 'UTC' string to the end of start/end date and time texts.
-        """
-        return date_time + u" UTC"
+        return course_end_datetime_text(self.end, format_string, self.runtime.service(self, "i18n").strftime)
 
     @property
     def forum_posts_allowed(self):
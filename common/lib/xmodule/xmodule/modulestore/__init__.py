@@ -22,7 +22,7 @@ from abc import ABCMeta, abstractmethod
 from contracts import contract, new_contract
 from xblock.plugin import default_select
 
-from .exceptions import InvalidLocationError, InsufficientSpecificationError
+from .exceptions import InvalidLocationError, InsufficientSpecificationError, ItemNotFoundError
 from xmodule.errortracker import make_error_tracker
 from xmodule.assetstore import AssetMetadata
 from opaque_keys.edx.keys import CourseKey, UsageKey, AssetKey
@@ -286,6 +286,11 @@ class EditInfo(object):
     """
     Encapsulates the editing info of a block.
     """
+    __slots__ = (
+        'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+        'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -349,16 +354,100 @@ class BlockData(object):
     Wrap the block data in an object instead of using a straight Python dictionary.
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
+
+    BlockData created with `lazy` keep their stored `fields` and `edit_info`
+    undecoded until either of them is first accessed, so that loading a large
+    structure only pays for decoding the blocks that are actually used.
     """
+    __slots__ = (
+        'block_type', 'definition', 'defaults', 'definition_loaded',
+        '_fields', '_edit_info', '_storable', '_decode_fields',
+    )
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
         self.from_storable(kwargs)
 
+    @classmethod
+    def lazy(cls, block_data, decode_fields=None):
+        """
+        Return a BlockData for the Mongo-storable `block_data`, whose fields
+        and edit_info are decoded when first accessed. `decode_fields`, if
+        given, is then called to convert the stored fields.
+        """
+        block = cls.__new__(cls)
+        block.definition_loaded = False
+        block.block_type = block_data.get('block_type', None)
+        block.definition = block_data.get('definition', None)
+        block.defaults = block_data.get('defaults', {})
+        block._storable = block_data  # pylint: disable=protected-access
+        block._decode_fields = decode_fields  # pylint: disable=protected-access
+        return block
+
+    def _decode(self):
+        """
+        Decode the stored fields and edit_info of a lazy BlockData.
+        """
+        block_data = self._storable
+        fields = block_data.get('fields', {})
+        if self._decode_fields is not None:
+            fields = self._decode_fields(fields)
+        self._fields = fields
+        self._edit_info = EditInfo(**block_data.get('edit_info', {}))
+        self._storable = None
+        self._decode_fields = None
+
+    @property
+    def is_decoded(self):
+        """
+        Whether the fields and edit_info of this block have been decoded.
+        """
+        return self._storable is None
+
+    @property
+    def fields(self):
+        """
+        The Scope.settings and 'children' field values.
+        """
+        if self._storable is not None:
+            self._decode()
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):  # pylint: disable=missing-docstring
+        if self._storable is not None:
+            self._decode()
+        self._fields = value
+
+    @property
+    def edit_info(self):
+        """
+        The EditInfo of this block.
+        """
+        if self._storable is not None:
+            self._decode()
+        return self._edit_info
+
+    @edit_info.setter
+    def edit_info(self, value):  # pylint: disable=missing-docstring
+        if self._storable is not None:
+            self._decode()
+        self._edit_info = value
+
     def to_storable(self):
         """
         Serialize to a Mongo-storable format.
         """
+        if self._storable is not None:
+            # Never decoded, so nothing changed since it was stored.
+            return {
+                'fields': self._storable.get('fields', {}),
+                'block_type': self.block_type,
+                'definition': self.definition,
+                'defaults': self.defaults,
+                'edit_info': self._storable.get('edit_info', {}),
+            }
         return {
             'fields': self.fields,
             'block_type': self.block_type,
@@ -371,6 +460,9 @@ class BlockData(object):
         """
         De-serialize from Mongo-storable format to an object.
         """
+        self._storable = None
+        self._decode_fields = None
+
         # Contains the Scope.settings and 'children' field values.
         # 'children' are stored as a list of (block_type, block_id) pairs.
         self.fields = block_data.get('fields', {})
@@ -762,7 +854,13 @@ class ModuleStoreRead(ModuleStoreAssetBase):
             xblock, fields = (block, block.fields)
         elif isinstance(block, BlockData):
             # BlockData is an object - compare its attributes in dict form.
-            xblock, fields = (None, block.__dict__)
+            xblock, fields = (None, {
+                'block_type': block.block_type,
+                'definition': block.definition,
+                'fields': block.fields,
+                'edit_info': block.edit_info,
+                'defaults': block.defaults,
+            })
         else:
             xblock, fields = (None, block)
 
@@ -843,6 +941,15 @@ class ModuleStoreRead(ModuleStoreAssetBase):
         '''
         pass
 
+    @abstractmethod
+    def get_courses_by_ids(self, course_ids, depth=0, **kwargs):
+        '''
+        Look for the courses with the given ids (:class:`CourseKey`), with as few queries as
+        the modulestore allows.
+        Returns the course descriptors that were found, in no particular order.
+        '''
+        pass
+
     @abstractmethod
     def has_course(self, course_id, ignore_case=False, **kwargs):
         '''
@@ -1110,6 +1217,37 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
                 return course
         return None
 
+    def get_course_published_version(self, course_key):
+        """
+        Return a string identifying the published version of the course, which changes
+        whenever the course is published, or an empty string if the course doesn't exist
+        or this modulestore doesn't tell its versions apart.
+
+        Default impl--when the course's subtree was last edited, if its runtime knows
+        """
+        course = self.get_course(course_key)
+        if course is None:
+            return u''
+        get_subtree_edited_on = getattr(course.runtime, 'get_subtree_edited_on', None)
+        version = get_subtree_edited_on(course) if get_subtree_edited_on is not None else None
+        return unicode(version) if version is not None else u''
+
+    def get_courses_by_ids(self, course_ids, depth=0, **kwargs):
+        """
+        See ModuleStoreRead.get_courses_by_ids
+
+        Default impl--one get_course per course
+        """
+        courses = []
+        for course_id in course_ids:
+            try:
+                course = self.get_course(course_id, depth=depth, **kwargs)
+            except ItemNotFoundError:
+                course = None
+            if course is not None:
+                courses.append(course)
+        return courses
+
     def has_course(self, course_id, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
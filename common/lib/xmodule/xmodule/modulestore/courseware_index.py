@@ -1,6 +1,9 @@
 """ Code to allow module store to interface with courseware index """
 from __future__ import absolute_import
 
+from collections import namedtuple
+import hashlib
+import json
 import logging
 
 from django.utils.translation import ugettext as _
@@ -19,6 +22,11 @@ DOCUMENT_TYPE = "courseware_content"
 log = logging.getLogger('edx.modulestore')
 
 
+# The outcome of indexing a course: the digests of the documents in the index keyed by their id,
+# the numbers of documents sent to the search engine and removed from it, and the errors met
+IndexingResult = namedtuple('IndexingResult', ['digests', 'indexed_count', 'removed_count', 'error_list'])
+
+
 class SearchIndexingError(Exception):
     """ Indicates some error(s) occured during indexing """
 
@@ -33,45 +41,67 @@ class CoursewareSearchIndexer(object):
     """
 
     @staticmethod
-    def add_to_search_index(modulestore, location, delete=False, raise_on_error=False):
+    def _fetch_item(modulestore, item_location):
+        """ Fetch the item from the modulestore location, log if not found, but continue """
+        try:
+            if isinstance(item_location, CourseLocator):
+                item = modulestore.get_course(item_location)
+            else:
+                item = modulestore.get_item(item_location, revision=ModuleStoreEnum.RevisionOption.published_only)
+        except ItemNotFoundError:
+            log.warning('Cannot find: %s', item_location)
+            return None
+
+        return item
+
+    @classmethod
+    def remove_from_search_index(cls, modulestore, location):
         """
-        Add to courseware search index from given location and its children
+        Remove from courseware search index the given location and its children
         """
-        error_list = []
-        indexed_count = 0
-        # TODO - inline for now, need to move this out to a celery task
         searcher = SearchEngine.get_search_engine(INDEX_NAME)
         if not searcher:
             return
 
-        if isinstance(location, CourseLocator):
-            course_key = location
-        else:
-            course_key = location.course_key
+        def remove_index_item_location(item_location):
+            """ remove this item from the search index """
+            item = cls._fetch_item(modulestore, item_location)
+            if item:
+                if item.has_children:
+                    for child_loc in item.children:
+                        remove_index_item_location(child_loc)
+
+                searcher.remove(DOCUMENT_TYPE, unicode(item.scope_ids.usage_id))
+
+        try:
+            remove_index_item_location(location)
+        except Exception as err:  # pylint: disable=broad-except
+            # broad exception so that index operation does not prevent the rest of the application from working
+            log.exception(
+                "Indexing error encountered, courseware index may be out of date %s - %s",
+                location,
+                unicode(err)
+            )
+
+    @staticmethod
+    def _document_digest(document):
+        """
+        Return a digest of the contents of a document, to tell whether it changed since it was indexed.
+        """
+        return hashlib.md5(json.dumps(document, sort_keys=True, default=unicode)).hexdigest()
 
+    @staticmethod
+    def _get_documents(course, error_list):
+        """
+        Return the documents of the published content of the course, keyed by their id.
+        """
         location_info = {
-            "course": unicode(course_key),
+            "course": unicode(course.id),
         }
+        documents = {}
 
-        def _fetch_item(item_location):
-            """ Fetch the item from the modulestore location, log if not found, but continue """
-            try:
-                if isinstance(item_location, CourseLocator):
-                    item = modulestore.get_course(item_location)
-                else:
-                    item = modulestore.get_item(item_location, revision=ModuleStoreEnum.RevisionOption.published_only)
-            except ItemNotFoundError:
-                log.warning('Cannot find: %s', item_location)
-                return None
-
-            return item
-
-        def index_item_location(item_location, current_start_date):
-            """ add this item to the search index """
-            item = _fetch_item(item_location)
-            if not item:
-                return
-
+        def add_item_documents(item, current_start_date):
+            """ add the documents of this item and its children """
             is_indexable = hasattr(item, "index_dictionary")
             # if it's not indexable and it does not have children, then ignore
             if not is_indexable and not item.has_children:
@@ -82,43 +112,79 @@ class CoursewareSearchIndexer(object):
                 current_start_date = item.start
 
             if item.has_children:
-                for child_loc in item.children:
-                    index_item_location(child_loc, current_start_date)
+                for child in item.get_children():
+                    add_item_documents(child, current_start_date)
 
-            item_index = {}
-            item_index_dictionary = item.index_dictionary() if is_indexable else None
+            if not is_indexable:
+                return
 
-            # if it has something to add to the index, then add it
-            if item_index_dictionary:
-                try:
+            try:
+                item_index_dictionary = item.index_dictionary()
+                # if it has something to add to the index, then add it
+                if item_index_dictionary:
+                    item_index = {}
                     item_index.update(location_info)
                     item_index.update(item_index_dictionary)
                     item_index['id'] = unicode(item.scope_ids.usage_id)
                     if current_start_date:
                         item_index['start_date'] = current_start_date
+                    documents[item_index['id']] = item_index
+            except Exception as err:  # pylint: disable=broad-except
+                # broad exception so that index operation does not fail on one item of many
+                log.warning('Could not index item: %s - %s', item.location, unicode(err))
+                error_list.append(_('Could not index item: {}').format(item.location))
 
-                    searcher.index(DOCUMENT_TYPE, item_index)
-                except Exception as err:  # pylint: disable=broad-except
-                    # broad exception so that index operation does not fail on one item of many
-                    log.warning('Could not index item: %s - %s', item_location, unicode(err))
-                    error_list.append(_('Could not index item: {}').format(item_location))
+        add_item_documents(course, None)
+        return documents
 
-        def remove_index_item_location(item_location):
-            """ remove this item from the search index """
-            item = _fetch_item(item_location)
-            if item:
-                if item.has_children:
-                    for child_loc in item.children:
-                        remove_index_item_location(child_loc)
+    @classmethod
+    def index_course(cls, modulestore, course_key, indexed_digests=None, raise_on_error=False):
+        """
+        Index the published content of the course, and remove from the index the content no longer published.
 
-                searcher.remove(DOCUMENT_TYPE, unicode(item.scope_ids.usage_id))
+        `indexed_digests` are the digests of the documents indexed the last time, keyed by their id:
+        only the documents that changed since are sent to the search engine, or all of them if None.
+
+        Returns an `IndexingResult`, or None if there is no search engine.
+        """
+        searcher = SearchEngine.get_search_engine(INDEX_NAME)
+        if not searcher:
+            return None
 
+        if indexed_digests is None:
+            indexed_digests = {}
+        digests = {}
+        indexed_count = removed_count = 0
+        error_list = []
         try:
-            if delete:
-                remove_index_item_location(location)
+            # Load the whole published course at once, rather than fetching its items one by one
+            with modulestore.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                course = modulestore.get_course(course_key, depth=None)
+            if course is None:
+                log.warning('Cannot find: %s', course_key)
+                documents = {}
             else:
-                index_item_location(location, None)
-            indexed_count += 1
+                documents = cls._get_documents(course, error_list)
+
+            for document_id, document in documents.iteritems():
+                digest = cls._document_digest(document)
+                if indexed_digests.get(document_id) != digest:
+                    try:
+                        searcher.index(DOCUMENT_TYPE, document)
+                    except Exception as err:  # pylint: disable=broad-except
+                        log.warning('Could not index item: %s - %s', document_id, unicode(err))
+                        error_list.append(_('Could not index item: {}').format(document_id))
+                        continue
+                    indexed_count += 1
+                digests[document_id] = digest
+
+            for document_id in set(indexed_digests) - set(documents):
+                try:
+                    searcher.remove(DOCUMENT_TYPE, document_id)
+                except Exception as err:  # pylint: disable=broad-except
+                    # it may have been removed when it was deleted already
+                    log.warning('Could not remove item from index: %s - %s', document_id, unicode(err))
+                removed_count += 1
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -131,23 +197,25 @@ class CoursewareSearchIndexer(object):
         if raise_on_error and error_list:
             raise SearchIndexingError(_('Error(s) present during indexing'), error_list)
 
-        return indexed_count
+        return IndexingResult(digests, indexed_count, removed_count, error_list)
 
     @classmethod
-    def do_publish_index(cls, modulestore, location, delete=False, raise_on_error=False):
+    def do_publish_index(cls, modulestore, course_key, indexed_digests=None):
         """
-        Add to courseware search index published section and children
+        Update the courseware search index of a published course, only indexing its content that changed
         """
-        indexed_count = cls.add_to_search_index(modulestore, location, delete, raise_on_error)
-        cls._track_index_request('edx.course.index.published', indexed_count, str(location))
-        return indexed_count
+        result = cls.index_course(modulestore, course_key, indexed_digests)
+        if result is not None:
+            cls._track_index_request('edx.course.index.published', result.indexed_count, unicode(course_key))
+        return result
 
     @classmethod
     def do_course_reindex(cls, modulestore, course_key):
         """
         (Re)index all content within the given course
         """
-        indexed_count = cls.add_to_search_index(modulestore, course_key, delete=False, raise_on_error=True)
+        result = cls.index_course(modulestore, course_key, raise_on_error=True)
+        indexed_count = result.indexed_count if result is not None else 0
         cls._track_index_request('edx.course.index.reindexed', indexed_count)
         return indexed_count
 
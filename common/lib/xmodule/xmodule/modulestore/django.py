@@ -23,6 +23,7 @@ import django.utils
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -149,6 +150,12 @@ def create_modulestore_instance(
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        try:
+            _options['structure_cache_subsystem'] = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            pass
+
     if HAS_USER_SERVICE and not user_service:
         xb_user_service = DjangoXBlockUserService(get_current_user())
     else:
@@ -328,6 +328,30 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except ItemNotFoundError:
             return None
 
+    @strip_key
+    def get_courses_by_ids(self, course_keys, depth=0, **kwargs):
+        """
+        Returns the course modules of the given course_keys that exist, in no particular order,
+        asking each modulestore for all its courses at once.
+
+        :param course_keys: must be CourseKeys
+        """
+        keys_by_store = []
+        for course_key in course_keys:
+            assert isinstance(course_key, CourseKey)
+            store = self._get_modulestore_for_courselike(course_key)
+            for store_keys in keys_by_store:
+                if store_keys[0] is store:
+                    store_keys[1].append(course_key)
+                    break
+            else:
+                keys_by_store.append((store, [course_key]))
+
+        courses = []
+        for store, store_keys in keys_by_store:
+            courses.extend(store.get_courses_by_ids(store_keys, depth=depth, **kwargs))
+        return courses
+
     @strip_key
     @contract(library_key='LibraryLocator')
     def get_library(self, library_key, depth=0, **kwargs):
@@ -539,6 +563,35 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_course_published_version(self, course_key):
+        """
+        See ModuleStoreReadBase.get_course_published_version
+        """
+        store = self._get_modulestore_for_courselike(course_key)
+        return store.get_course_published_version(course_key)
+
+    def get_block_versions(self, course_key):
+        """
+        Returns the published version of the course, the usage key of its root and the versions of
+        its blocks keyed by usage key, if its modulestore versions blocks. Returns None otherwise.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_block_versions')
+            return store.get_block_versions(course_key)
+        except NotImplementedError:
+            return None
+
+    def refresh_cached_metadata_inheritance_tree(self, course_key):
+        """
+        Recomputes and caches the metadata inheritance tree of the course, if its modulestore
+        caches one. Does nothing otherwise.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'refresh_cached_metadata_inheritance_tree')
+        except NotImplementedError:
+            return
+        store.refresh_cached_metadata_inheritance_tree(course_key)
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
@@ -707,6 +760,16 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._verify_modulestore_support(course_key, 'import_xblock')
         return store.import_xblock(user_id, course_key, block_type, block_id, fields, runtime)
 
+    @strip_key
+    def import_xblocks(self, user_id, course_key, blocks, **kwargs):
+        """
+        See :py:meth `DraftVersioningModuleStore.import_xblocks`
+
+        Defer to the course's modulestore if it supports this method
+        """
+        store = self._verify_modulestore_support(course_key, 'import_xblocks')
+        return store.import_xblocks(user_id, course_key, blocks)
+
     @strip_key
     def copy_from_template(self, source_keys, dest_key, user_id, **kwargs):
         """
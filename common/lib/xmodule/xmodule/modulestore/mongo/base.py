@@ -16,7 +16,11 @@ import pymongo
 import sys
 import logging
 import copy
+import cPickle as pickle
 import re
+import time
+import zlib
+from itertools import izip
 from uuid import uuid4
 
 from bson.son import SON
@@ -68,6 +72,15 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# seconds a worker may hold the lock for computing the metadata inheritance tree of a course, at most
+# seconds other workers wait for it, and seconds between their checks whether the tree has been cached
+INHERITANCE_TREE_LOCK_TIMEOUT = 60
+INHERITANCE_TREE_WAIT_TIMEOUT = 10
+INHERITANCE_TREE_POLL_INTERVAL = 0.1
+
+# the largest item memcached stores by default
+MEMCACHED_MAX_ITEM_SIZE = 1024 * 1024
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -444,6 +457,42 @@ def as_published(location):
     return location.replace(revision=MongoRevisionKey.published)
 
 
+def _pack_inheritance_tree(tree):
+    """
+    Return the metadata inheritance tree `tree` in the compact form stored in the
+    metadata_inheritance_cache_subsystem.
+
+    Blocks that inherit the same metadata, like the problems of a unit, share one copy of it, and
+    the whole is compressed, so that the trees of big courses fit in a single memcached item.
+    """
+    urls = []
+    metadata_indices = []
+    unique_metadata = []
+    metadata_index_by_repr = {}
+    for url, metadata in tree.iteritems():
+        index = metadata_index_by_repr.setdefault(repr(sorted(metadata.iteritems())), len(unique_metadata))
+        if index == len(unique_metadata):
+            unique_metadata.append(metadata)
+        urls.append(url)
+        metadata_indices.append(index)
+    return zlib.compress(pickle.dumps((urls, metadata_indices, unique_metadata), pickle.HIGHEST_PROTOCOL))
+
+
+def _unpack_inheritance_tree(packed):
+    """
+    Return the metadata inheritance tree packed by _pack_inheritance_tree.
+    """
+    urls, metadata_indices, unique_metadata = pickle.loads(zlib.decompress(packed))
+    tree = {}
+    for url, index in izip(urls, metadata_indices):
+        # give every block its own copy of the shared metadata
+        metadata = dict(unique_metadata[index])
+        if 'parent' in metadata:
+            metadata['parent'] = dict(metadata['parent'])
+        tree[url] = metadata
+    return tree
+
+
 class MongoBulkOpsRecord(BulkOpsRecord):
     """
     Tracks whether there've been any writes per course and disables inheritance generation
@@ -754,7 +803,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                tree = self._get_shared_metadata_inheritance_tree(course_id)
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
@@ -762,12 +811,14 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 )
 
         if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self._compute_metadata_inheritance_tree(course_id)
-
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+            if self.metadata_inheritance_cache_subsystem is not None and not force_refresh:
+                # on a miss, only compute the tree once even if many workers are asking for it
+                tree = self._compute_shared_metadata_inheritance_tree(course_id)
+            else:
+                # if not in subsystem, or we are on force refresh, then we have to compute. Any
+                # previously cached tree keeps being served to other workers until this one is stored.
+                tree = self._compute_metadata_inheritance_tree(course_id)
+                self._set_shared_metadata_inheritance_tree(course_id, tree)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
@@ -781,6 +832,66 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return tree
 
+    def _get_shared_metadata_inheritance_tree(self, course_id):
+        """
+        Return the metadata inheritance tree of the course from the metadata_inheritance_cache_subsystem,
+        or an empty dict if it isn't there.
+        """
+        packed = self.metadata_inheritance_cache_subsystem.get(unicode(course_id))
+        if not packed:
+            return {}
+        if isinstance(packed, dict):
+            # stored before trees were packed
+            return packed
+        return _unpack_inheritance_tree(packed)
+
+    def _set_shared_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Write the metadata inheritance tree of the course to the metadata_inheritance_cache_subsystem,
+        if available.
+        """
+        if self.metadata_inheritance_cache_subsystem is None:
+            return
+        packed = _pack_inheritance_tree(tree)
+        if len(packed) > MEMCACHED_MAX_ITEM_SIZE:
+            log.warning(
+                'Metadata inheritance tree of %s is %d bytes, which may be too large to cache.', course_id, len(packed)
+            )
+        self.metadata_inheritance_cache_subsystem.set(unicode(course_id), packed)
+
+    def _compute_shared_metadata_inheritance_tree(self, course_id):
+        """
+        Compute the metadata inheritance tree of the course after it was missing from the
+        metadata_inheritance_cache_subsystem, and write it there.
+
+        Only one worker at a time computes the tree of a course. The others wait for it to be
+        written, and only compute it themselves if that takes longer than INHERITANCE_TREE_WAIT_TIMEOUT
+        or the computation fails.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        lock_key = u'{}.lock'.format(course_id)
+        locked = cache.add(lock_key, True, INHERITANCE_TREE_LOCK_TIMEOUT)
+        if not locked:
+            deadline = time.time() + INHERITANCE_TREE_WAIT_TIMEOUT
+            while time.time() < deadline:
+                time.sleep(INHERITANCE_TREE_POLL_INTERVAL)
+                tree = self._get_shared_metadata_inheritance_tree(course_id)
+                if tree:
+                    return tree
+                if cache.get(lock_key) is None:
+                    # the other worker gave up without writing the tree
+                    break
+            else:
+                log.warning('Timed out waiting for the metadata inheritance tree of %s to be computed.', course_id)
+
+        try:
+            tree = self._compute_metadata_inheritance_tree(course_id)
+            self._set_shared_metadata_inheritance_tree(course_id, tree)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return tree
+
     def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
@@ -1017,6 +1128,43 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         except ItemNotFoundError:
             return None
 
+    @autoretry_read()
+    def get_course_published_version(self, course_key):
+        """
+        See ModuleStoreReadBase.get_course_published_version
+
+        Old mongo courses record when the subtree of their published version was last edited,
+        which is read without loading the course.
+        """
+        assert isinstance(course_key, CourseKey)
+        course_key = self.fill_in_run(course_key)
+        location = course_key.make_usage_key('course', course_key.run)
+        course = self.collection.find_one(
+            {'_id': location.to_deprecated_son()}, {'edit_info.subtree_edited_on': True}
+        )
+        if course is None:
+            return u''
+        version = course.get('edit_info', {}).get('subtree_edited_on')
+        return unicode(version) if version is not None else u''
+
+    @autoretry_read()
+    def get_courses_by_ids(self, course_keys, depth=0, **kwargs):
+        """
+        Get the courses with the given courseids (org/course/run) that exist, with one query for
+        the courses.
+        """
+        course_keys = [self.fill_in_run(course_key) for course_key in course_keys]
+        locations = [course_key.make_usage_key('course', course_key.run) for course_key in course_keys]
+        course_records = self.collection.find({
+            '_id': {'$in': [location.to_deprecated_son() for location in locations]}
+        })
+
+        courses = []
+        for course in course_records:
+            course_key = SlashSeparatedCourseKey(course['_id']['org'], course['_id']['course'], course['_id']['name'])
+            courses.extend(self._load_items(course_key, [course], depth))
+        return courses
+
     def has_course(self, course_key, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
@@ -111,6 +111,16 @@ class DraftModuleStore(MongoModuleStore):
         else:
             raise UnsupportedRevisionError()
 
+    def get_courses_by_ids(self, course_keys, depth=0, **kwargs):
+        """
+        Returns the courses with the given course_keys that exist. Courses are direct-only,
+        so there is only their published version.
+        """
+        return [
+            wrap_draft(course)
+            for course in super(DraftModuleStore, self).get_courses_by_ids(course_keys, depth=depth, **kwargs)
+        ]
+
     def has_item(self, usage_key, revision=None):
         """
         Returns True if location exists in this ModuleStore.
@@ -552,7 +562,7 @@ class DraftModuleStore(MongoModuleStore):
 
         # Remove this location from the courseware search index so that searches
         # will refrain from showing it as a result
-        CoursewareSearchIndexer.add_to_search_index(self, location, delete=True)
+        CoursewareSearchIndexer.remove_from_search_index(self, location)
 
     def _delete_subtree(self, location, as_functions, draft_only=False):
         """
@@ -731,9 +741,6 @@ class DraftModuleStore(MongoModuleStore):
         if self.signal_handler and not bulk_record.active:
             self.signal_handler.send("course_published", course_key=course_key)
 
-        # Now it's been published, add the object to the courseware search index so that it appears in search results
-        CoursewareSearchIndexer.do_publish_index(self, location)
-
         return self.get_item(as_published(location))
 
     def unpublish(self, location, user_id, **kwargs):
@@ -9,12 +9,13 @@ from shutil import rmtree
 from bson.code import Code
 import datetime
 import ddt
+from mock import patch
 #from nose.plugins.attrib import attr
 
 from nose.plugins.skip import SkipTest
 from xmodule.assetstore import AssetMetadata
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.xml_importer import import_course_from_xml
+from xmodule.modulestore.xml_importer import import_course_from_xml, import_static_content
 from xmodule.modulestore.xml_exporter import export_course_to_xml
 from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
     MODULESTORE_SETUPS,
@@ -33,6 +34,9 @@ except ImportError:
 # Number of assets saved in the modulestore per test run.
 ASSET_AMOUNT_PER_TEST = (0, 1, 10, 100, 1000, 10000)
 
+# Numbers of threads importing the static assets per test run.
+ASSET_IMPORT_THREADS_PER_TEST = (1, 4, 8)
+
 # Use only this course in asset metadata performance testing.
 COURSE_NAME = 'manual-testing-complete'
 
@@ -143,6 +147,49 @@ class CrossStoreXMLRoundtrip(unittest.TestCase):
                         )
 
 
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StaticContentImportTest(unittest.TestCase):
+    """
+    This class exists to time the import of static assets into the contentstores of
+    different modulestore setups with different numbers of threads.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(
+        MODULESTORE_SETUPS,
+        ASSET_IMPORT_THREADS_PER_TEST,
+    ))
+    @ddt.unpack
+    def test_generate_static_import_timings(self, source_ms, num_threads):
+        """
+        Generate timings for importing static assets, and importing them again unchanged.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        desc = "StaticContentImport:{}:{}".format(
+            SHORT_NAME_MAP[source_ms],
+            num_threads,
+        )
+
+        with CodeBlockTimer(desc):
+            with source_ms.build() as (source_content, source_store):
+                source_course_key = source_store.make_course_key('a', 'course', 'course')
+
+                with patch('xmodule.modulestore.xml_importer.ASSET_IMPORT_THREADS', num_threads):
+                    with CodeBlockTimer("initial_import"):
+                        import_static_content(COURSE_DATA_DIR, source_content, source_course_key)
+
+                    with CodeBlockTimer("unchanged_import"):
+                        import_static_content(COURSE_DATA_DIR, source_content, source_course_key)
+
+
 @ddt.ddt
 # Eventually, exclude this attribute from regular unittests while running *only* tests
 # with this attribute during regular performance tests.
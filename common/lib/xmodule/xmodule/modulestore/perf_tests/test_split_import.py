@@ -0,0 +1,78 @@
+"""
+Performance test for importing XML courses into the split modulestore block by block
+and in bulk.
+"""
+import itertools
+import unittest
+import ddt
+#from nose.plugins.attrib import attr
+
+from nose.plugins.skip import SkipTest
+from xmodule.modulestore.xml_importer import import_course_from_xml
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    COURSE_DATA_NAMES,
+    MIXED_MODULESTORE_SETUPS,
+    SHORT_NAME_MAP,
+    TEST_DATA_DIR,
+)
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# The mixed modulestore with only split beneath it.
+SPLIT_MODULESTORE_SETUP = MIXED_MODULESTORE_SETUPS[1]
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class SplitImportTest(unittest.TestCase):
+    """
+    This class exists to time the import of the test courses into the split modulestore,
+    with one call to import_xblock per block and with all the blocks imported at once.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(
+        COURSE_DATA_NAMES,
+        (False, True),
+    ))
+    @ddt.unpack
+    def test_generate_import_timings(self, course_data_name, bulk_import):
+        """
+        Generate timings for importing a course, and importing it again unchanged.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        desc = "SplitImport:{}:{}:{}".format(
+            SHORT_NAME_MAP[SPLIT_MODULESTORE_SETUP],
+            course_data_name,
+            'bulk' if bulk_import else 'block_by_block',
+        )
+
+        with CodeBlockTimer(desc):
+            with SPLIT_MODULESTORE_SETUP.build() as (source_content, source_store):
+                source_course_key = source_store.make_course_key('a', 'course', 'course')
+
+                for import_desc in ("initial_import", "unchanged_import"):
+                    with CodeBlockTimer(import_desc):
+                        import_course_from_xml(
+                            source_store,
+                            'test_user',
+                            TEST_DATA_DIR,
+                            source_dirs=[course_data_name],
+                            static_content_store=source_content,
+                            target_id=source_course_key,
+                            create_if_not_present=True,
+                            raise_on_failure=True,
+                            bulk_import=bulk_import,
+                        )
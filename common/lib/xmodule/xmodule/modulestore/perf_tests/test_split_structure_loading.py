@@ -0,0 +1,145 @@
+"""
+Performance test for converting large split modulestore structures from their
+Mongo format.
+"""
+import copy
+import unittest
+#from nose.plugins.attrib import attr
+
+from bson.objectid import ObjectId
+import contracts
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from xmodule.modulestore.split_mongo import _skip_check
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo, structure_to_mongo
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of blocks in the synthetic course, and the shape of its tree.
+NUM_BLOCKS = 20000
+CHAPTERS = 20
+SEQUENTIALS_PER_CHAPTER = 10
+VERTICALS_PER_SEQUENTIAL = 10
+
+
+def make_mongo_structure():
+    """
+    Return a structure, in its Mongo format, of a course with about NUM_BLOCKS
+    blocks: chapters of sequentials of verticals of problems.
+    """
+    edit_info = {
+        'previous_version': ObjectId(),
+        'update_version': ObjectId(),
+        'source_version': None,
+        'edited_on': None,
+        'edited_by': 'test_user',
+        'original_usage': None,
+        'original_usage_version': None,
+    }
+
+    def block(block_type, block_id, children=()):
+        """Return a block in its Mongo format"""
+        return {
+            'block_type': block_type,
+            'block_id': block_id,
+            'definition': ObjectId(),
+            'defaults': {},
+            'fields': {
+                'display_name': u'{} {}'.format(block_type, block_id),
+                'children': [list(child) for child in children],
+            },
+            'edit_info': dict(edit_info),
+        }
+
+    blocks = []
+    problems_per_vertical = max(
+        NUM_BLOCKS // (CHAPTERS * SEQUENTIALS_PER_CHAPTER * VERTICALS_PER_SEQUENTIAL) - 1, 1
+    )
+    chapters = []
+    for chapter_index in range(CHAPTERS):
+        sequentials = []
+        for sequential_index in range(SEQUENTIALS_PER_CHAPTER):
+            verticals = []
+            for vertical_index in range(VERTICALS_PER_SEQUENTIAL):
+                prefix = '{}_{}_{}'.format(chapter_index, sequential_index, vertical_index)
+                problems = [('problem', '{}_{}'.format(prefix, index)) for index in range(problems_per_vertical)]
+                blocks.extend(block(*problem) for problem in problems)
+                verticals.append(('vertical', prefix))
+                blocks.append(block('vertical', prefix, problems))
+            sequential_id = '{}_{}'.format(chapter_index, sequential_index)
+            sequentials.append(('sequential', sequential_id))
+            blocks.append(block('sequential', sequential_id, verticals))
+        chapters.append(('chapter', str(chapter_index)))
+        blocks.append(block('chapter', str(chapter_index), sequentials))
+    blocks.append(block('course', 'course', chapters))
+
+    return {
+        '_id': ObjectId(),
+        'root': ['course', 'course'],
+        'blocks': blocks,
+    }
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureLoadingPerformanceTest(unittest.TestCase):
+    """
+    Time loading a large structure, comparing loading a single unit with
+    loading every block of the course, and loading with contract checks
+    with loading without them.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(StructureLoadingPerformanceTest, self).setUp()
+        self.mongo_structure = make_mongo_structure()
+
+    def _load_unit(self, structure):
+        """Decode the blocks of a single unit, as rendering it does"""
+        vertical = structure['blocks'][('vertical', '0_0_0')]
+        for child in vertical.fields['children']:
+            structure['blocks'][child].fields  # pylint: disable=pointless-statement
+
+    def _load_all(self, structure):
+        """Decode every block of the structure, as loading the whole course does"""
+        for block in structure['blocks'].itervalues():
+            block.fields  # pylint: disable=pointless-statement
+
+    def test_structure_loading(self):
+        """
+        Generate timings for loading a unit and the whole course.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        for desc, load in (('unit', self._load_unit), ('course', self._load_all)):
+            mongo_structure = copy.deepcopy(self.mongo_structure)
+            with CodeBlockTimer("StructureLoading:{}:{}".format(NUM_BLOCKS, desc)):
+                structure = structure_from_mongo(mongo_structure)
+                load(structure)
+
+    def test_contract_checks(self):
+        """
+        Generate timings for loading and saving the whole course with the
+        explicit contract checks of the split modulestore on and off.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        for desc, check in (('checks_on', contracts.check), ('checks_off', _skip_check)):
+            mongo_structure = copy.deepcopy(self.mongo_structure)
+            with patch('xmodule.modulestore.split_mongo.mongo_connection.check', check):
+                with CodeBlockTimer("StructureContracts:{}:{}".format(NUM_BLOCKS, desc)):
+                    structure = structure_from_mongo(mongo_structure)
+                    self._load_all(structure)
+                    structure_to_mongo(structure)
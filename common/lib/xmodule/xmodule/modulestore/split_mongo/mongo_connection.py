@@ -1,23 +1,43 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+from collections import OrderedDict
+import cPickle as pickle
+import logging
 import re
+import threading
+import zlib
+
+import dogstats_wrapper as dog_stats_api
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
-from contracts import check, new_contract
+from contracts import new_contract
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
-from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo import BlockKey, check
 import datetime
 import pytz
 
 
 new_contract('BlockData', BlockData)
 
+log = logging.getLogger(__name__)
+
+
+def fields_from_mongo(fields):
+    """
+    Converts 'children' in the stored fields of a block from
+        [[block_type, block_id]] to [BlockKey].
+    """
+    if 'children' in fields:
+        check('list(list[2])', fields['children'])
+        fields['children'] = [BlockKey(*child) for child in fields['children']]
+    return fields
+
 
 def structure_from_mongo(structure):
     """
@@ -26,19 +46,20 @@ def structure_from_mongo(structure):
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
+
+    The fields and edit_info of each block are only converted when the block
+    is first used, see BlockData.lazy.
     """
     check('seq[2]', structure['root'])
-    check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
+    check('list', structure['blocks'])
 
     structure['root'] = BlockKey(*structure['root'])
     new_blocks = {}
     for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
+        # The stored block keys were validated when they were written, so skip
+        # the contract check of BlockKey.__new__.
+        block_key = BlockKey._make((block['block_type'], block.pop('block_id')))  # pylint: disable=protected-access
+        new_blocks[block_key] = BlockData.lazy(block, fields_from_mongo)
     structure['blocks'] = new_blocks
 
     return structure
@@ -55,7 +76,8 @@ def structure_to_mongo(structure):
     check('BlockKey', structure['root'])
     check('dict(BlockKey: BlockData)', structure['blocks'])
     for block in structure['blocks'].itervalues():
-        if 'children' in block.fields:
+        # Blocks that were never decoded still hold their children as stored.
+        if block.is_decoded and 'children' in block.fields:
             check('list(BlockKey)', block.fields['children'])
 
     new_structure = dict(structure)
@@ -70,17 +92,112 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A cache of structures keyed by their ids.
+
+    Structures are never modified once written, so cached structures never go
+    stale. They are cached as pickles, which caps the memory the cache uses
+    and hands every caller a copy of its own to modify: a process-local LRU
+    holds up to `max_size` bytes of pickles, and `shared_cache`, if given, holds
+    compressed pickles for all processes. `shared_cache` can be any object
+    with the `get` and `set` methods of a Django cache.
+    """
+    METRIC_NAME = 'split.structure_cache'
+
+    def __init__(self, max_size=0, shared_cache=None):
+        self.max_size = max_size
+        self.shared_cache = shared_cache
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+        self._local = OrderedDict()
+        self._local_size = 0
+        self._lock = threading.Lock()
+
+    def _record(self, result):
+        """
+        Count a lookup that ended with `result`, one of the keys of `stats`.
+        """
+        self.stats[result] += 1
+        dog_stats_api.increment(self.METRIC_NAME, tags=[u'result:{}'.format(result)])
+
+    def _store_local(self, key, pickled):
+        """
+        Store `pickled` as the most recently used entry of the local LRU,
+        evicting the least recently used entries to stay within max_size.
+        """
+        if len(pickled) > self.max_size:
+            return
+        with self._lock:
+            previous = self._local.pop(key, None)
+            if previous is not None:
+                self._local_size -= len(previous)
+            self._local[key] = pickled
+            self._local_size += len(pickled)
+            while self._local_size > self.max_size:
+                __, evicted = self._local.popitem(last=False)
+                self._local_size -= len(evicted)
+
+    @staticmethod
+    def _shared_key(key):
+        """
+        Return the key of the structure with id `key` in the shared cache.
+        """
+        return u'split_structure.{}'.format(key)
+
+    def get(self, structure_id):
+        """
+        Return a copy of the cached structure with id `structure_id`, or None.
+        """
+        key = unicode(structure_id)
+        with self._lock:
+            pickled = self._local.pop(key, None)
+            if pickled is not None:
+                self._local[key] = pickled
+        if pickled is not None:
+            self._record('local_hits')
+            return pickle.loads(pickled)
+
+        if self.shared_cache is not None:
+            compressed = self.shared_cache.get(self._shared_key(key))
+            if compressed is not None:
+                pickled = zlib.decompress(compressed)
+                self._store_local(key, pickled)
+                self._record('shared_hits')
+                return pickle.loads(pickled)
+
+        self._record('misses')
+        return None
+
+    def set(self, structure_id, structure):
+        """
+        Cache `structure` as the structure with id `structure_id`.
+        """
+        key = unicode(structure_id)
+        try:
+            pickled = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError):
+            log.warning(u"Unable to cache structure %s", key, exc_info=True)
+            return
+        self._store_local(key, pickled)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), zlib.compress(pickled, 1))
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If `structure_cache` is given, it is a StructureCache consulted for
+        structures before reading them from the database.
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +239,15 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure
+
+        structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -132,7 +257,24 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        if self.structure_cache is None:
+            return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+
+        structures = []
+        uncached_ids = []
+        for structure_id in ids:
+            structure = self.structure_cache.get(structure_id)
+            if structure is None:
+                uncached_ids.append(structure_id)
+            else:
+                structures.append(structure)
+
+        if uncached_ids:
+            for structure in self.structures.find({'_id': {'$in': uncached_ids}}):
+                structure = structure_from_mongo(structure)
+                self.structure_cache.set(structure['_id'], structure)
+                structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -191,6 +333,19 @@ class MongoConnection(object):
             }
         return self.course_index.find_one(query)
 
+    def find_course_indexes(self, keys):
+        """
+        Get the course_indexes from the persistence mechanism whose ids are the given keys, with a single query
+        """
+        if not keys:
+            return []
+        return self.course_index.find({
+            '$or': [
+                {key_attr: getattr(key, key_attr) for key_attr in ('org', 'course', 'run')}
+                for key in keys
+            ]
+        })
+
     def find_matching_course_indexes(self, branch=None, search_targets=None, org_target=None):
         """
         Find the course_index matching particular conditions.
@@ -272,6 +427,13 @@ class MongoConnection(object):
         """
         self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions):
+        """
+        Create the definitions in the db with a single multi-document insert. If any of them are
+        already there, the others are still inserted before DuplicateKeyError is raised.
+        """
+        self.definitions.insert(definitions, continue_on_error=True)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -79,10 +79,10 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError, StructureCache
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -248,16 +248,22 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
+        # Write all the new definitions at once, as importing a course creates one for most of its blocks.
+        new_definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+            if bulk_write_record.definitions[_id] is not None
+        ]
+        if new_definitions:
             dirty = True
 
             try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id])
+                self.db_connection.insert_definitions(new_definitions)
             except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+                # We may not have looked up some of these definitions inside this bulk operation, and
+                # thus didn't realize that they were already in the database. That's OK, the store is
+                # append only, and the others were still inserted, so we can just keep going.
+                log.debug("Attempted to insert duplicate definitions")
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             dirty = True
@@ -281,6 +287,25 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             return self.db_connection.get_course_index(course_key, ignore_case)
 
+    def find_course_indexes(self, course_keys):
+        """
+        Return the indexes of course_keys that exist, keyed by (org, course, run), looking up
+        the ones that aren't in a bulk operation with a single query.
+        """
+        indexes = {}
+        unbulked_keys = []
+        for course_key in course_keys:
+            if self._is_in_bulk_operation(course_key):
+                index = self.get_course_index(course_key)
+                if index is not None:
+                    indexes[(course_key.org, course_key.course, course_key.run)] = index
+            else:
+                unbulked_keys.append(course_key)
+
+        for index in self.db_connection.find_course_indexes(unbulked_keys):
+            indexes[(index['org'], index['course'], index['run'])] = index
+        return indexes
+
     def delete_course_index(self, course_key):
         """
         Delete the course index from cache and the db
@@ -425,9 +450,10 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if len(ids):
             # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids))
+            defs_from_db = list(self.db_connection.get_definitions(list(ids)))
             # Add the retrieved definitions to the cache.
             bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
+            bulk_write_record.definitions_in_db.update(d.get('_id') for d in defs_from_db)
             definitions.extend(defs_from_db)
         return definitions
 
@@ -637,14 +663,21 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None,
+                 structure_cache_subsystem=None, structure_cache_size=0, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_subsystem: a Django cache shared between processes to cache structures in.
+        :param structure_cache_size: the number of bytes of structures to cache in this process.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        if structure_cache_subsystem is not None or structure_cache_size > 0:
+            structure_cache = StructureCache(structure_cache_size, structure_cache_subsystem)
+        else:
+            structure_cache = None
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
 
         if default_class is not None:
@@ -957,6 +990,58 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(course_id)
         return self._get_structure(course_id, depth, **kwargs)
 
+    def get_course_published_version(self, course_key):
+        """
+        See ModuleStoreReadBase.get_course_published_version
+
+        Split courses are versioned by the structure at the head of their published branch,
+        which their index records, so no structure is read.
+        """
+        if not isinstance(course_key, CourseLocator) or course_key.deprecated:
+            return u''
+        index = self.get_course_index(course_key)
+        if index is None:
+            return u''
+        versions = index['versions']
+        version = versions.get(ModuleStoreEnum.BranchName.published, versions.get(ModuleStoreEnum.BranchName.draft))
+        return unicode(version) if version is not None else u''
+
+    @autoretry_read()
+    def get_courses_by_ids(self, course_ids, depth=0, **kwargs):
+        """
+        Gets the course descriptors for the courses identified by the locators that exist,
+        with one query for their indexes and one for their structures.
+
+        Locators without a branch, or whose version isn't the head of their branch, are skipped.
+        """
+        course_ids = [
+            course_id for course_id in course_ids
+            if isinstance(course_id, CourseLocator) and not course_id.deprecated and course_id.branch is not None
+        ]
+        indexes = self.find_course_indexes(course_ids)
+
+        version_guids = OrderedDict()
+        for course_id in course_ids:
+            index = indexes.get((course_id.org, course_id.course, course_id.run))
+            if index is None or course_id.branch not in index['versions']:
+                continue
+            version_guid = index['versions'][course_id.branch]
+            if course_id.version_guid is None or course_id.version_guid == version_guid:
+                version_guids[course_id] = version_guid
+
+        structures = {
+            structure['_id']: structure
+            for structure in self.find_structures_by_id(list(set(version_guids.values())))
+        }
+        courses = []
+        for course_id, version_guid in version_guids.iteritems():
+            entry = structures.get(version_guid)
+            if entry is None:
+                continue
+            envelope = CourseEnvelope(course_id.replace(version_guid=version_guid), entry)
+            courses.append(self._load_items(envelope, [entry['root']], depth, **kwargs)[0])
+        return courses
+
     def get_library(self, library_id, depth=0, **kwargs):
         """
         Gets the 'library' root block for the library identified by the locator
@@ -1333,6 +1418,28 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return usage_key, block.edit_info.original_usage_version
         return None, None
 
+    def get_block_versions(self, course_key):
+        """
+        Returns the version of the published structure of the course, the usage key of its root
+        and the versions of the blocks in its tree, which are the versions of the structures that
+        last changed them, keyed by usage key. The orphans of the course aren't included.
+        """
+        course_key = course_key.replace(branch=ModuleStoreEnum.BranchName.published, version_guid=None)
+        structure = self._lookup_course(course_key).structure
+
+        block_versions = {}
+        blocks_stack = [structure['root']]
+        while blocks_stack:
+            block_key = blocks_stack.pop()
+            block = structure['blocks'].get(block_key)
+            usage_key = course_key.make_usage_key(block_key.type, block_key.id)
+            if block is None or usage_key in block_versions:
+                continue
+            block_versions[usage_key] = block.edit_info.update_version
+            blocks_stack.extend(block.fields.get('children', []))
+        root = course_key.make_usage_key(structure['root'].type, structure['root'].id)
+        return structure['_id'], root, block_versions
+
     def create_definition_from_data(self, course_key, new_def_data, category, user_id):
         """
         Pull the definition fields out of descriptor and save to the db as a new definition
@@ -1483,14 +1590,6 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             index_entry = self._get_index_if_valid(course_key, force)
             structure = self._lookup_course(course_key).structure
 
-            partitioned_fields = self.partition_fields_by_scope(block_type, fields)
-            new_def_data = partitioned_fields.get(Scope.content, {})
-            # persist the definition if persisted != passed
-            if (definition_locator is None or isinstance(definition_locator.definition_id, LocalId)):
-                definition_locator = self.create_definition_from_data(course_key, new_def_data, block_type, user_id)
-            elif new_def_data:
-                definition_locator, _ = self.update_definition_from_data(course_key, definition_locator, new_def_data, user_id)
-
             # copy the structure and modify the new one
             new_structure = self.version_structure(course_key, structure, user_id)
 
@@ -1504,24 +1603,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             else:
                 block_key = self._generate_block_key(new_structure['blocks'], block_type)
 
-            block_fields = partitioned_fields.get(Scope.settings, {})
-            if Scope.children in partitioned_fields:
-                block_fields.update(partitioned_fields[Scope.children])
-            self._update_block_in_structure(new_structure, block_key, self._new_block(
-                user_id,
-                block_type,
-                block_fields,
-                definition_locator.definition_id,
-                new_id,
-            ))
+            self._create_block_from_fields(
+                user_id, course_key, new_structure, block_key,
+                self.partition_fields_by_scope(block_type, fields), definition_locator, index_entry
+            )
 
             self.update_structure(course_key, new_structure)
 
             # update the index entry if appropriate
             if index_entry is not None:
-                # see if any search targets changed
-                if fields is not None:
-                    self._update_search_targets(index_entry, fields)
                 self._update_head(course_key, index_entry, course_key.branch, new_id)
                 item_loc = BlockUsageLocator(
                     course_key.version_agnostic(),
@@ -1832,43 +1922,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 else:
                     raise ItemNotFoundError(course_key.make_usage_key(block_key.type, block_key.id))
 
-            is_updated = False
-            definition_fields = partitioned_fields[Scope.content]
-            if definition_locator is None:
-                definition_locator = DefinitionLocator(original_entry.block_type, original_entry.definition)
-            if definition_fields:
-                definition_locator, is_updated = self.update_definition_from_data(
-                    course_key, definition_locator, definition_fields, user_id
-                )
-
-            # check metadata
-            settings = partitioned_fields[Scope.settings]
-            settings = self._serialize_fields(block_key.type, settings)
-            if not is_updated:
-                is_updated = self._compare_settings(settings, original_entry.fields)
-
-            # check children
-            if partitioned_fields.get(Scope.children, {}):  # purposely not 'is not None'
-                serialized_children = [BlockKey.from_usage_key(child) for child in partitioned_fields[Scope.children]['children']]
-                is_updated = is_updated or original_entry.fields.get('children', []) != serialized_children
-                if is_updated:
-                    settings['children'] = serialized_children
+            new_structure = self._update_block_from_fields(
+                user_id, course_key, original_structure, block_key, partitioned_fields, definition_locator,
+                index_entry
+            )
 
             # if updated, rev the structure
-            if is_updated:
-                new_structure = self.version_structure(course_key, original_structure, user_id)
-                block_data = self._get_block_from_structure(new_structure, block_key)
-
-                block_data.definition = definition_locator.definition_id
-                block_data.fields = settings
-
+            if new_structure is not None:
                 new_id = new_structure['_id']
-                self.version_block(block_data, user_id, new_id)
                 self.update_structure(course_key, new_structure)
                 # update the index entry if appropriate
                 if index_entry is not None:
-                    self._update_search_targets(index_entry, definition_fields)
-                    self._update_search_targets(index_entry, settings)
                     if isinstance(course_key, LibraryLocator):
                         course_key = LibraryLocator(
                             org=index_entry['org'],
@@ -1896,6 +1960,135 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             else:
                 return None
 
+    def _update_items_from_fields(self, user_id, course_key, blocks):
+        """
+        Create or update each of the blocks, given as (block_type, block_id, fields) triples, as
+        _update_item_from_fields does with allow_not_found and force, but read the existing definitions
+        all at once, and version the structure and update the index once for all the blocks. Unlike
+        _update_item_from_fields, this doesn't fetch any of the items.
+
+        Returns the BlockKeys of the blocks.
+        """
+        with self.bulk_operations(course_key):
+            structure = self._lookup_course(course_key).structure
+            index_entry = self._get_index_if_valid(course_key, force=True)
+            is_versioned = False
+
+            block_keys = [BlockKey(block_type, block_id) for block_type, block_id, __ in blocks]
+            self.get_definitions(course_key, [
+                structure['blocks'][block_key].definition
+                for block_key in block_keys
+                if block_key in structure['blocks']
+            ])
+
+            for block_key, (__, __, fields) in zip(block_keys, blocks):
+                partitioned_fields = self.partition_fields_by_scope(block_key.type, fields)
+                if block_key in structure['blocks']:
+                    new_structure = self._update_block_from_fields(
+                        user_id, course_key, structure, block_key, partitioned_fields, None, index_entry
+                    )
+                    if new_structure is None:
+                        continue
+                    structure = new_structure
+                else:
+                    structure = self.version_structure(course_key, structure, user_id)
+                    self._create_block_from_fields(
+                        user_id, course_key, structure, block_key, partitioned_fields, None, index_entry
+                    )
+                is_versioned = True
+
+            if is_versioned:
+                self.update_structure(course_key, structure)
+                if index_entry is not None:
+                    self._update_head(course_key, index_entry, course_key.branch, structure['_id'])
+
+            return block_keys
+
+    def _create_block_from_fields(
+        self, user_id, course_key, structure, block_key, partitioned_fields, definition_locator, index_entry
+    ):
+        """
+        Add the block `block_key` to `structure`, which must be versioned already, with its definition
+        and settings from `partitioned_fields`. `definition_locator` is None or has a LocalId for a new
+        definition, or points to the existing definition to update with the content fields.
+
+        Updates the search targets of `index_entry` if it isn't None.
+        """
+        new_def_data = partitioned_fields.get(Scope.content, {})
+        # persist the definition if persisted != passed
+        if (definition_locator is None or isinstance(definition_locator.definition_id, LocalId)):
+            definition_locator = self.create_definition_from_data(course_key, new_def_data, block_key.type, user_id)
+        elif new_def_data:
+            definition_locator, _ = self.update_definition_from_data(
+                course_key, definition_locator, new_def_data, user_id
+            )
+
+        block_fields = partitioned_fields.get(Scope.settings, {})
+        if Scope.children in partitioned_fields:
+            block_fields.update(partitioned_fields[Scope.children])
+        self._update_block_in_structure(structure, block_key, self._new_block(
+            user_id,
+            block_key.type,
+            block_fields,
+            definition_locator.definition_id,
+            structure['_id'],
+        ))
+
+        # see if any search targets changed
+        if index_entry is not None:
+            self._update_search_targets(index_entry, new_def_data)
+            self._update_search_targets(index_entry, block_fields)
+
+    def _update_block_from_fields(
+        self, user_id, course_key, structure, block_key, partitioned_fields, definition_locator, index_entry
+    ):
+        """
+        Update the block `block_key` of `structure` and its definition from `partitioned_fields`, versioning
+        the structure only if they changed. `definition_locator` is None to use the block's definition.
+
+        Updates the search targets of `index_entry` if it isn't None.
+
+        Returns the versioned structure, or None if nothing changed.
+        """
+        original_entry = self._get_block_from_structure(structure, block_key)
+        is_updated = False
+        definition_fields = partitioned_fields[Scope.content]
+        if definition_locator is None:
+            definition_locator = DefinitionLocator(original_entry.block_type, original_entry.definition)
+        if definition_fields:
+            definition_locator, is_updated = self.update_definition_from_data(
+                course_key, definition_locator, definition_fields, user_id
+            )
+
+        # check metadata
+        settings = partitioned_fields[Scope.settings]
+        settings = self._serialize_fields(block_key.type, settings)
+        if not is_updated:
+            is_updated = self._compare_settings(settings, original_entry.fields)
+
+        # check children
+        if partitioned_fields.get(Scope.children, {}):  # purposely not 'is not None'
+            serialized_children = [
+                BlockKey.from_usage_key(child) for child in partitioned_fields[Scope.children]['children']
+            ]
+            is_updated = is_updated or original_entry.fields.get('children', []) != serialized_children
+            if is_updated:
+                settings['children'] = serialized_children
+
+        if not is_updated:
+            return None
+
+        new_structure = self.version_structure(course_key, structure, user_id)
+        block_data = self._get_block_from_structure(new_structure, block_key)
+        block_data.definition = definition_locator.definition_id
+        block_data.fields = settings
+        self.version_block(block_data, user_id, new_structure['_id'])
+
+        if index_entry is not None:
+            self._update_search_targets(index_entry, definition_fields)
+            self._update_search_targets(index_entry, settings)
+        return new_structure
+
     # pylint: disable=unused-argument
     def create_xblock(
             self, runtime, course_key, block_type, block_id=None, fields=None,
@@ -58,6 +58,10 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_id = self._map_revision_to_branch(course_id)
         return super(DraftVersioningModuleStore, self).get_course(course_id, depth=depth, **kwargs)
 
+    def get_courses_by_ids(self, course_ids, depth=0, **kwargs):
+        course_ids = [self._map_revision_to_branch(course_id) for course_id in course_ids]
+        return super(DraftVersioningModuleStore, self).get_courses_by_ids(course_ids, depth=depth, **kwargs)
+
     def get_library(self, library_id, depth=0, **kwargs):
         library_id = self._map_revision_to_branch(library_id)
         return super(DraftVersioningModuleStore, self).get_library(library_id, depth=depth, **kwargs)
@@ -211,7 +215,7 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
 
         # Remove this location from the courseware search index so that searches
         # will refrain from showing it as a result
-        CoursewareSearchIndexer.add_to_search_index(self, location, delete=True)
+        CoursewareSearchIndexer.remove_from_search_index(self, location)
 
     def _map_revision_to_branch(self, key, revision=None):
         """
@@ -356,9 +360,6 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
             blacklist=blacklist
         )
 
-        # Now it's been published, add the object to the courseware search index so that it appears in search results
-        CoursewareSearchIndexer.do_publish_index(self, location)
-
         return self.get_item(location.for_branch(ModuleStoreEnum.BranchName.published), **kwargs)
 
     def unpublish(self, location, user_id, **kwargs):
@@ -507,6 +508,41 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
                 user_id, course_key, BlockKey(block_type, block_id), partitioned_fields, None, allow_not_found=True, force=True
             ) or self.get_item(new_usage_key)
 
+    def import_xblocks(self, user_id, course_key, blocks, **kwargs):
+        """
+        Import the blocks, each given as a (block_type, block_id, fields) triple, and return their usage keys.
+
+        This has the same effect as calling import_xblock on each of the blocks in turn, but versions
+        each branch once for all of them, and doesn't construct any of the blocks.
+        """
+        with self.bulk_operations(course_key):
+            # hardcode course root block id
+            root_block_ids = {
+                'course': self.DEFAULT_ROOT_COURSE_BLOCK_ID,
+                'library': self.DEFAULT_ROOT_LIBRARY_BLOCK_ID,
+            }
+            blocks = [
+                (block_type, root_block_ids.get(block_type, block_id), fields)
+                for block_type, block_id, fields in blocks
+            ]
+
+            if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
+                # override existing drafts as import_xblock does, then publish the blocks without their
+                # children, in the same order
+                draft_course = course_key.for_branch(ModuleStoreEnum.BranchName.draft)
+                block_keys = self._update_items_from_fields(user_id, draft_course, blocks)
+                super(DraftVersioningModuleStore, self).copy(
+                    user_id,
+                    draft_course,
+                    course_key.for_branch(ModuleStoreEnum.BranchName.published),
+                    [draft_course.make_usage_key(block_key.type, block_key.id) for block_key in block_keys],
+                    blacklist=EXCLUDE_ALL
+                )
+            else:
+                block_keys = self._update_items_from_fields(user_id, self._map_revision_to_branch(course_key), blocks)
+
+            return [course_key.make_usage_key(block_key.type, block_key.id) for block_key in block_keys]
+
     def compute_published_info_internal(self, xblock):
         """
         Get the published branch and find when it was published if it was. Cache the results in the xblock
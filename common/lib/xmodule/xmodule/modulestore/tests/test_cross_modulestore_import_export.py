@@ -75,6 +75,32 @@ class MemoryCache(object):
         """
         self._data[key] = value
 
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """
+        Set a key in the cache, unless it has been set previously.
+
+        Args:
+            key: The key to update.
+            value: The value change the key to.
+            timeout: Ignored.
+
+        Returns:
+            Whether the key was set.
+        """
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    def delete(self, key):
+        """
+        Remove a key from the cache.
+
+        Args:
+            key: The key to remove.
+        """
+        self._data.pop(key, None)
+
 
 class MongoContentstoreBuilder(object):
     """
@@ -448,3 +474,37 @@ class CrossStoreXMLRoundtrip(CourseComparisonTest, PartitionTestCase):
                             dest_store,
                             dest_course_key,
                         )
+
+
+@ddt.ddt
+@attr('mongo')
+class SplitBulkImportTest(CourseComparisonTest, PartitionTestCase):
+    """
+    This class exists to test that importing courses into the split modulestore in bulk
+    gives the same courses as importing them block by block.
+    """
+
+    @ddt.data(*COURSE_DATA_NAMES)
+    def test_bulk_import(self, course_data_name):
+        with MongoContentstoreBuilder().build() as contentstore:
+            with MIXED_MODULESTORE_SETUPS[1].build(contentstore=contentstore) as store:
+                course_keys = {}
+                for bulk_import in (False, True):
+                    course_keys[bulk_import] = store.make_course_key('a', 'course', 'bulk_{}'.format(bulk_import))
+                    import_course_from_xml(
+                        store,
+                        'test_user',
+                        TEST_DATA_DIR,
+                        source_dirs=[course_data_name],
+                        static_content_store=contentstore,
+                        target_id=course_keys[bulk_import],
+                        raise_on_failure=True,
+                        create_if_not_present=True,
+                        bulk_import=bulk_import,
+                    )
+
+                self.exclude_field(None, 'wiki_slug')
+                self.exclude_field(None, 'xml_attributes')
+                self.exclude_field(None, 'parent')
+
+                self.assertCoursesEqual(store, course_keys[False], store, course_keys[True])
@@ -845,6 +845,22 @@ class TestMixedModuleStore(CourseComparisonTest):
             published_courses = self.store.get_courses(remove_branch=True)
         self.assertEquals([c.id for c in draft_courses], [c.id for c in published_courses])
 
+    @ddt.data('draft', 'split')
+    def test_get_courses_by_ids(self, default_ms):
+        """
+        Test that get_courses_by_ids returns the courses of all the stores that exist
+        """
+        self.initdb(default_ms)
+        mongo_course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        xml_course_key = self.course_locations[self.XML_COURSEID1].course_key
+        missing_course_key = mongo_course_key.replace(course='not_a_course')
+        courses = self.store.get_courses_by_ids([mongo_course_key, xml_course_key, missing_course_key])
+        self.assertItemsEqual(
+            [course.id for course in courses],
+            [mongo_course_key.replace(branch=None), xml_course_key]
+        )
+        self.assertEqual(self.store.get_courses_by_ids([]), [])
+
     @ddt.data('draft', 'split')
     def test_create_child_detached_tabs(self, default_ms):
         """
@@ -907,6 +923,26 @@ class TestMixedModuleStore(CourseComparisonTest):
         course = self.store.get_item(self.course_locations[self.XML_COURSEID1])
         self.assertEqual(course.id, self.course_locations[self.XML_COURSEID1].course_key)
 
+    # draft: the edit info of the published course only
+    # split: active_versions only, no structure
+    @ddt.data(('draft', 1, 0), ('split', 1, 0))
+    @ddt.unpack
+    def test_get_course_published_version(self, default_ms, max_find, max_send):
+        self.initdb(default_ms)
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        with check_mongo_calls(max_find, max_send):
+            version = self.store.get_course_published_version(course_key)
+        self.assertNotEqual(version, u'')
+        self.assertEqual(self.store.get_course_published_version(course_key), version)
+
+        # Chapters are published as they are created.
+        self.store.create_child(self.user_id, self.course_locations[self.MONGO_COURSEID], 'chapter')
+        self.assertNotEqual(self.store.get_course_published_version(course_key), version)
+
+        self.assertEqual(
+            self.store.get_course_published_version(self.course_locations[self.XML_COURSEID1].course_key), u''
+        )
+
     @ddt.data('draft', 'split')
     def test_get_library(self, default_ms):
         """
@@ -17,6 +17,7 @@ from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
 import unittest
+from mock import patch
 from xblock.core import XBlock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -39,10 +40,11 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, _pack_inheritance_tree, _unpack_inheritance_tree
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -881,6 +883,73 @@ class TestMongoKeyValueStore(unittest.TestCase):
                 self.kvs.delete(KeyValueStore.Key(scope, None, None, 'foo'))
 
 
+class TestMetadataInheritanceTreeCache(TestMongoModuleStoreBase):
+    """
+    Tests of caching the metadata inheritance trees of courses in the metadata_inheritance_cache_subsystem.
+    """
+    def setUp(self):
+        super(TestMetadataInheritanceTreeCache, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.cache = MemoryCache()
+        patcher = patch.multiple(self.draft_store, metadata_inheritance_cache_subsystem=self.cache, request_cache=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pack_tree(self):
+        metadata = {'graded': True, 'parent': {'draft-preferred': 'i4x://edX/toy/vertical/unit'}}
+        tree = {'i4x://edX/toy/problem/{}'.format(index): dict(metadata) for index in range(3)}
+        packed = _pack_inheritance_tree(tree)
+        assert_true(len(packed) < len(repr(tree)))
+
+        unpacked = _unpack_inheritance_tree(packed)
+        assert_equals(unpacked, tree)
+        # every block gets its own copy of the shared metadata
+        unpacked['i4x://edX/toy/problem/0']['parent'].clear()
+        assert_equals(unpacked['i4x://edX/toy/problem/1'], metadata)
+
+    def test_miss(self):
+        tree = self.draft_store._get_cached_metadata_inheritance_tree(self.course_key)
+        assert_true(tree)
+        assert_equals(_unpack_inheritance_tree(self.cache.get(unicode(self.course_key))), tree)
+        assert_is_none(self.cache.get(u'{}.lock'.format(self.course_key)))
+
+    def test_hit(self):
+        tree = self.draft_store._get_cached_metadata_inheritance_tree(self.course_key)
+        with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as compute:
+            assert_equals(self.draft_store._get_cached_metadata_inheritance_tree(self.course_key), tree)
+        assert_false(compute.called)
+
+    def test_wait_for_other_worker(self):
+        tree = self.draft_store._compute_metadata_inheritance_tree(self.course_key)
+        self.cache.add(u'{}.lock'.format(self.course_key), True)
+
+        def other_worker_done(_seconds):
+            """Store the tree as if computed by the worker holding the lock"""
+            self.cache.set(unicode(self.course_key), _pack_inheritance_tree(tree))
+
+        with patch('xmodule.modulestore.mongo.base.time.sleep', side_effect=other_worker_done):
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as compute:
+                assert_equals(self.draft_store._get_cached_metadata_inheritance_tree(self.course_key), tree)
+        assert_false(compute.called)
+
+    def test_other_worker_failed(self):
+        self.cache.add(u'{}.lock'.format(self.course_key), True)
+
+        def other_worker_failed(_seconds):
+            """Release the lock without storing the tree"""
+            self.cache.delete(u'{}.lock'.format(self.course_key))
+
+        with patch('xmodule.modulestore.mongo.base.time.sleep', side_effect=other_worker_failed):
+            assert_true(self.draft_store._get_cached_metadata_inheritance_tree(self.course_key))
+        assert_true(self.cache.get(unicode(self.course_key)))
+
+    def test_force_refresh_ignores_lock(self):
+        self.cache.add(u'{}.lock'.format(self.course_key), True)
+        with patch('xmodule.modulestore.mongo.base.time.sleep') as sleep:
+            assert_true(self.draft_store._get_cached_metadata_inheritance_tree(self.course_key, force_refresh=True))
+        assert_false(sleep.called)
+
+
 def _build_requested_filter(requested_filter):
     """
     Returns requested filter_params string.
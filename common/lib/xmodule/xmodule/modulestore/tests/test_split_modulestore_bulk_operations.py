@@ -2,7 +2,7 @@ import copy
 import ddt
 import unittest
 from bson.objectid import ObjectId
-from mock import MagicMock, Mock, call
+from mock import ANY, MagicMock, Mock, call
 from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 
@@ -154,7 +154,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition),
+            call.insert_definitions([self.definition]),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index
@@ -171,17 +171,12 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition),
-                call.insert_definition(other_definition),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index
-                )
-            ],
-            self.conn.mock_calls
+        self.conn.update_course_index.assert_called_once_with(
+            {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+            from_index=original_index
         )
+        self.conn.insert_definitions.assert_called_once_with(ANY)
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
 
     def test_write_definition_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -190,7 +185,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition))
+        self.assertConnCalls(call.insert_definitions([self.definition]))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -201,10 +196,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [call.insert_definition(self.definition), call.insert_definition(other_definition)],
-            self.conn.mock_calls
-        )
+        self.conn.insert_definitions.assert_called_once_with(ANY)
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -423,6 +416,15 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
             else:
                 self.assertNotIn(db_definition(_id), results)
 
+    def test_get_definitions_not_written_on_close(self):
+        self.conn.get_course_index.return_value = None
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.conn.get_definitions.return_value = iter([self.definition])
+        results = self.bulk.get_definitions(self.course_key, [self.definition['_id']])
+        self.assertEqual(results, [self.definition])
+        self.bulk._end_bulk_operation(self.course_key)
+        self.assertFalse(self.conn.insert_definitions.called)
+
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
         self.conn.find_structures_derived_from.return_value = [MagicMock(name='result')]
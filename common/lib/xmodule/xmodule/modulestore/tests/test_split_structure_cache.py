@@ -0,0 +1,259 @@
+"""
+Tests for loading and caching split modulestore structures.
+"""
+import copy
+import cPickle as pickle
+import unittest
+
+from bson.objectid import ObjectId
+from contracts import ContractNotRespected
+from mock import MagicMock, patch
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    MongoConnection, StructureCache, structure_from_mongo, structure_to_mongo
+)
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+
+
+class DictCache(object):
+    """
+    A stand-in for a Django cache.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):  # pylint: disable=missing-docstring
+        return self.data.get(key)
+
+    def set(self, key, value):  # pylint: disable=missing-docstring
+        self.data[key] = value
+
+
+def make_structure(structure_id=None, num_blocks=1):
+    """
+    Return a structure, as returned by structure_from_mongo, with `num_blocks` blocks.
+    """
+    return {
+        '_id': structure_id or ObjectId(),
+        'root': BlockKey('course', 'course'),
+        'blocks': {
+            BlockKey('problem', 'problem{}'.format(index)): BlockData(
+                block_type='problem', fields={'weight': index}, edit_info={}
+            )
+            for index in range(num_blocks)
+        },
+    }
+
+
+def make_mongo_structure():
+    """
+    Return a structure of a course with one problem in the format stored in mongo.
+    """
+    return {
+        '_id': ObjectId(),
+        'root': ['course', 'course'],
+        'blocks': [
+            {
+                'block_type': 'course', 'block_id': 'course', 'definition': ObjectId(),
+                'fields': {'children': [['problem', 'problem']]}, 'edit_info': {'edited_by': 'author'},
+            },
+            {
+                'block_type': 'problem', 'block_id': 'problem', 'definition': ObjectId(),
+                'fields': {'weight': 2}, 'edit_info': {'edited_by': 'author'},
+            },
+        ],
+    }
+
+
+class TestLazyStructure(unittest.TestCase):
+    """
+    Tests that blocks of structures loaded from mongo are decoded lazily.
+    """
+    def test_blocks_decoded_on_access(self):
+        structure = structure_from_mongo(make_mongo_structure())
+        course = structure['blocks'][BlockKey('course', 'course')]
+        problem = structure['blocks'][BlockKey('problem', 'problem')]
+        self.assertEqual(problem.block_type, 'problem')
+        self.assertFalse(course.is_decoded)
+
+        self.assertEqual(course.fields['children'], [BlockKey('problem', 'problem')])
+        self.assertIsInstance(course.fields['children'][0], BlockKey)
+        self.assertEqual(course.edit_info.edited_by, 'author')
+        self.assertTrue(course.is_decoded)
+        self.assertFalse(problem.is_decoded)
+
+    def test_setting_fields(self):
+        structure = structure_from_mongo(make_mongo_structure())
+        problem = structure['blocks'][BlockKey('problem', 'problem')]
+        problem.fields = {'weight': 3}
+        self.assertEqual(problem.fields, {'weight': 3})
+        self.assertEqual(problem.edit_info.edited_by, 'author')
+
+    def test_round_trip(self):
+        mongo_structure = make_mongo_structure()
+        structure = structure_from_mongo(copy.deepcopy(mongo_structure))
+        structure['blocks'][BlockKey('problem', 'problem')].fields  # pylint: disable=pointless-statement
+
+        stored_blocks = {
+            block['block_id']: block for block in structure_to_mongo(copy.deepcopy(structure))['blocks']
+        }
+        self.assertEqual(stored_blocks['course']['fields'], {'children': [['problem', 'problem']]})
+        self.assertEqual(stored_blocks['problem']['fields'], {'weight': 2})
+        self.assertEqual(stored_blocks['problem']['edit_info']['edited_by'], 'author')
+
+    def test_contracts_checked(self):
+        # Contracts are enabled in tests, even though they are off in production.
+        mongo_structure = make_mongo_structure()
+        mongo_structure['root'] = ['course']
+        with self.assertRaises(ContractNotRespected):
+            structure_from_mongo(mongo_structure)
+
+    def test_pickle_lazy_blocks(self):
+        structure = structure_from_mongo(make_mongo_structure())
+        unpickled = pickle.loads(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL))
+        course = unpickled['blocks'][BlockKey('course', 'course')]
+        self.assertEqual(course.fields['children'], [BlockKey('problem', 'problem')])
+
+
+class TestGetItemsLazyStructure(unittest.TestCase):
+    """
+    Tests that SplitMongoModuleStore.get_items matches the blocks of structures loaded lazily from mongo.
+    """
+    def setUp(self):
+        super(TestGetItemsLazyStructure, self).setUp()
+        self.store = SplitMongoModuleStore.__new__(SplitMongoModuleStore)
+        course = MagicMock(structure=structure_from_mongo(make_mongo_structure()))
+        for method, return_value in (('_lookup_course', course), ('_load_items', None)):
+            patcher = patch.object(SplitMongoModuleStore, method, return_value=return_value)
+            setattr(self, method, patcher.start())
+            self.addCleanup(patcher.stop)
+        self._load_items.side_effect = lambda course, block_ids, **kwargs: block_ids
+        self.course_key = CourseLocator('org', 'course', 'run', branch='draft-branch')
+
+    def test_category(self):
+        self.assertEqual(
+            self.store.get_items(self.course_key, qualifiers={'category': 'problem'}),
+            [BlockKey('problem', 'problem')]
+        )
+        self.assertEqual(self.store.get_items(self.course_key, qualifiers={'category': 'html'}), [])
+
+    def test_settings(self):
+        self.assertEqual(
+            self.store.get_items(self.course_key, qualifiers={'category': 'problem'}, settings={'weight': 2}),
+            [BlockKey('problem', 'problem')]
+        )
+
+    def test_get_block_versions(self):
+        structure = self._lookup_course.return_value.structure
+        for block in structure['blocks'].values():
+            block.edit_info.update_version = structure['_id']
+        version, root, block_versions = self.store.get_block_versions(self.course_key)
+        self._lookup_course.assert_called_once_with(self.course_key.for_branch('published-branch'))
+        self.assertEqual(version, structure['_id'])
+        self.assertEqual(root, self.course_key.for_branch('published-branch').make_usage_key('course', 'course'))
+        self.assertEqual(
+            sorted(usage_key.block_id for usage_key in block_versions), ['course', 'problem']
+        )
+        self.assertEqual(set(block_versions.values()), {structure['_id']})
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of StructureCache.
+    """
+    def test_local_cache(self):
+        cache = StructureCache(max_size=1024 * 1024)
+        structure = make_structure()
+        self.assertIsNone(cache.get(structure['_id']))
+        cache.set(structure['_id'], structure)
+
+        cached = cache.get(structure['_id'])
+        self.assertEqual(cached['root'], structure['root'])
+        self.assertEqual(cached['blocks'].keys(), structure['blocks'].keys())
+        self.assertEqual(cache.stats, {'local_hits': 1, 'shared_hits': 0, 'misses': 1})
+
+    def test_returns_copies(self):
+        cache = StructureCache(max_size=1024 * 1024)
+        structure = make_structure()
+        cache.set(structure['_id'], structure)
+
+        cache.get(structure['_id'])['blocks'].clear()
+        self.assertEqual(len(cache.get(structure['_id'])['blocks']), 1)
+
+    def test_size_cap(self):
+        structures = [make_structure(num_blocks=10) for __ in range(3)]
+        structure_size = len(pickle.dumps(structures[0], pickle.HIGHEST_PROTOCOL))
+        cache = StructureCache(max_size=structure_size * 2 + structure_size // 2)
+        for structure in structures[:2]:
+            cache.set(structure['_id'], structure)
+
+        # Use the first structure, so that the second is evicted for the third.
+        self.assertIsNotNone(cache.get(structures[0]['_id']))
+        cache.set(structures[2]['_id'], structures[2])
+        self.assertIsNotNone(cache.get(structures[0]['_id']))
+        self.assertIsNone(cache.get(structures[1]['_id']))
+        self.assertIsNotNone(cache.get(structures[2]['_id']))
+
+    def test_structure_larger_than_cap(self):
+        cache = StructureCache(max_size=10)
+        structure = make_structure()
+        cache.set(structure['_id'], structure)
+        self.assertIsNone(cache.get(structure['_id']))
+
+    def test_shared_cache(self):
+        shared_cache = DictCache()
+        structure = make_structure()
+        StructureCache(max_size=1024 * 1024, shared_cache=shared_cache).set(structure['_id'], structure)
+
+        # A cache in another process only finds the structure in the shared cache.
+        cache = StructureCache(max_size=1024 * 1024, shared_cache=shared_cache)
+        self.assertEqual(cache.get(structure['_id'])['root'], structure['root'])
+        self.assertEqual(cache.get(structure['_id'])['root'], structure['root'])
+        self.assertEqual(cache.stats, {'local_hits': 1, 'shared_hits': 1, 'misses': 0})
+
+
+class TestMongoConnectionStructureCache(unittest.TestCase):
+    """
+    Tests that MongoConnection reads structures through its StructureCache.
+    """
+    def setUp(self):
+        super(TestMongoConnectionStructureCache, self).setUp()
+        patcher = patch('xmodule.modulestore.split_mongo.mongo_connection.pymongo')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cache = StructureCache(max_size=1024 * 1024)
+        self.connection = MongoConnection('db', 'collection', 'host', structure_cache=self.cache)
+        self.connection.structures = MagicMock()
+
+    def _mongo_structure(self, structure_id):
+        """
+        Return a structure with id `structure_id` in the format stored in mongo.
+        """
+        return {
+            '_id': structure_id,
+            'root': ['course', 'course'],
+            'blocks': [{'block_type': 'course', 'block_id': 'course', 'fields': {}, 'edit_info': {}}],
+        }
+
+    def test_get_structure(self):
+        structure_id = ObjectId()
+        self.connection.structures.find_one.return_value = self._mongo_structure(structure_id)
+
+        self.assertEqual(self.connection.get_structure(structure_id)['_id'], structure_id)
+        self.assertEqual(self.connection.get_structure(structure_id)['_id'], structure_id)
+        self.assertEqual(self.connection.structures.find_one.call_count, 1)
+
+    def test_find_structures_by_id(self):
+        cached_id, uncached_id = ObjectId(), ObjectId()
+        self.connection.structures.find_one.return_value = self._mongo_structure(cached_id)
+        self.connection.get_structure(cached_id)
+
+        self.connection.structures.find.return_value = [self._mongo_structure(uncached_id)]
+        structures = self.connection.find_structures_by_id([cached_id, uncached_id])
+        self.assertItemsEqual([structure['_id'] for structure in structures], [cached_id, uncached_id])
+        self.connection.structures.find.assert_called_once_with({'_id': {'$in': [uncached_id]}})
+        self.assertIsNotNone(self.cache.get(uncached_id))
@@ -20,14 +20,19 @@ Modulestore virtual   |          XML physical (draft, published)
              (a, a)   |  (a, a) | (x, a) | (x, x) | (x, y) | (a, x)
              (a, b)   |  (a, b) | (x, b) | (x, x) | (x, y) | (a, x)
 """
+from contextlib import contextmanager
+import hashlib
 import logging
 from abc import abstractmethod
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
 from path import path
 import json
 import re
+import threading
+import time
 from lxml import etree
 
 from xmodule.modulestore.xml import XMLModuleStore, LibraryXMLModuleStore, ImportSystem
@@ -52,10 +57,131 @@ from xmodule.modulestore.store_utilities import draft_node_constructor, get_draf
 log = logging.getLogger(__name__)
 
 
+# The number of threads importing static assets at the same time.
+ASSET_IMPORT_THREADS = 4
+
+# Static assets larger than this many bytes are streamed to the contentstore rather than read into memory.
+ASSET_IMPORT_STREAM_SIZE = 1024 * 1024
+
+# The size of the chunks static assets are hashed and streamed in.
+ASSET_IMPORT_CHUNK_SIZE = 256 * 1024
+
+
+class _AssetImportTimer(object):
+    """
+    Accumulates the time the threads importing static assets spend in each stage of the import.
+    """
+    STAGES = ('read', 'thumbnail', 'save')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(self.STAGES, 0.0)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Add the time the block takes to the duration of the stage `name`.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.durations[name] += time.time() - start
+
+
+def _read_chunks(content_path):
+    """
+    Yield the content of the file at `content_path` in chunks.
+    """
+    with open(content_path, 'rb') as content_file:
+        for chunk in iter(lambda: content_file.read(ASSET_IMPORT_CHUNK_SIZE), ''):
+            yield chunk
+
+
+def _is_unchanged(content, existing_asset):
+    """
+    Return whether the asset already in the contentstore, described by `existing_asset`, has the
+    same data and metadata as `content`.
+    """
+    if existing_asset is None or existing_asset.get('md5') != content.content_digest:
+        return False
+    if content.content_type is not None and content.content_type.split('/')[0] == 'image' and \
+            not existing_asset.get('thumbnail_location'):
+        return False
+    return (
+        existing_asset.get('contentType') == content.content_type and
+        existing_asset.get('displayname') == content.name and
+        existing_asset.get('locked', False) == content.locked and
+        existing_asset.get('import_path') == content.import_path
+    )
+
+
+def _import_static_asset(static_content_store, content_path, asset_key, displayname, mime_type, import_path, locked,
+                         existing_asset, timer):
+    """
+    Read the static asset at `content_path`, and save it with its thumbnail into `static_content_store`
+    unless `existing_asset`, the asset already there, has the same data and metadata.
+
+    Returns whether the asset was saved, or None if the file is to be skipped.
+    """
+    with timer.stage('read'):
+        try:
+            if os.path.getsize(content_path) > ASSET_IMPORT_STREAM_SIZE:
+                md5 = hashlib.md5()
+                for chunk in _read_chunks(content_path):
+                    md5.update(chunk)
+                # The file is read again as it is saved.
+                data = _read_chunks(content_path)
+            else:
+                with open(content_path, 'rb') as f:
+                    data = f.read()
+                md5 = hashlib.md5(data)
+        except (IOError, OSError):
+            if os.path.basename(content_path).startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=import_path, locked=locked, content_digest=md5.hexdigest()
+    )
+    if _is_unchanged(content, existing_asset):
+        return False
+
+    # first let's save a thumbnail so we can get back a thumbnail location
+    with timer.stage('thumbnail'):
+        thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+            content, tempfile_path=content_path
+        )
+
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
+
+    # then commit the content
+    with timer.stage('save'):
+        try:
+            static_content_store.save(content)
+        except Exception as err:
+            log.exception(u'Error importing {0}, error={1}'.format(
+                import_path, err
+            ))
+    return True
+
+
 def import_static_content(
         course_data_path, static_content_store,
         target_id, subpath='static', verbose=False):
+    """
+    Import the static assets of the course at `course_data_path` into `static_content_store`,
+    in a pool of threads. The assets already in the contentstore with the same data and metadata
+    are not saved again.
 
+    Returns the asset keys of the assets by their paths in the static directory.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -74,6 +200,11 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    # The assets of the course already in the contentstore, as they were imported before.
+    existing_assets, __ = static_content_store.get_all_content_for_course(target_id)
+    existing_assets = {asset['asset_key'].path: asset for asset in existing_assets}
+
+    assets = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -87,17 +218,6 @@ def import_static_content(
             if verbose:
                 log.debug('importing static content %s...', content_path)
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
             # strip away leading path from the name
             fullname_with_subpath = content_path.replace(static_dir, '')
             if fullname_with_subpath.startswith('/'):
@@ -112,29 +232,34 @@ def import_static_content(
             # Check extracted contentType in list of all valid mimetypes
             if not mime_type or mime_type not in mimetypes_list:
                 mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
-
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+            assets.append((content_path, asset_key, displayname, mime_type, fullname_with_subpath, locked))
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
-
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+    # The assets are read, hashed and saved with their thumbnails by a pool of threads.
+    timer = _AssetImportTimer()
+    start = time.time()
+    pool = ThreadPool(ASSET_IMPORT_THREADS)
+    try:
+        saved = pool.map(
+            lambda asset: _import_static_asset(
+                static_content_store, *asset, existing_asset=existing_assets.get(asset[1].path), timer=timer
+            ),
+            assets
+        )
+    finally:
+        pool.close()
+        pool.join()
 
+    for (__, asset_key, __, __, fullname_with_subpath, __), asset_saved in zip(assets, saved):
+        if asset_saved is not None:
             # store the remapping information which will be needed
             # to subsitute in the module data
             remap_dict[fullname_with_subpath] = asset_key
 
+    log.info(
+        u'Imported %d static assets of %s in %.2fs, %d of them unchanged (read: %.2fs, thumbnail: %.2fs, save: %.2fs)',
+        len(remap_dict), target_id, time.time() - start, saved.count(False),
+        timer.durations['read'], timer.durations['thumbnail'], timer.durations['save']
+    )
     return remap_dict
 
 
@@ -170,6 +295,10 @@ class ImportManager(object):
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        bulk_import: If True, and the courselike is in a split modulestore, then write all the children
+            of the courselike with a single call to the modulestore's import_xblocks, rather than one call
+            to import_xblock per child.
     """
     store_class = XMLModuleStore
 
@@ -179,7 +308,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, bulk_import=False
     ):
         self.store = store
         self.user_id = user_id
@@ -192,6 +321,7 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.bulk_import = bulk_import
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -364,6 +494,30 @@ class ImportManager(object):
         all_locs = set(self.xml_module_store.modules[courselike_key].keys())
         all_locs.remove(source_courselike.location)
 
+        bulk_import = self.bulk_import and self.store.get_modulestore_type(dest_id) == ModuleStoreEnum.Type.split
+        blocks = []
+
+        def import_module(module):
+            """
+            Import the module, or only add it to the blocks to import at once if bulk importing.
+            """
+            if self.verbose:
+                log.debug('importing module location %s', module.location)
+
+            if bulk_import:
+                fields = _update_module_references(module, courselike_key, dest_id, self.do_import_static)
+                blocks.append((module.location.category, module.location.block_id, fields))
+            else:
+                _import_module_and_update_references(
+                    module,
+                    self.store,
+                    self.user_id,
+                    courselike_key,
+                    dest_id,
+                    do_import_static=self.do_import_static,
+                    runtime=courselike.runtime,
+                )
+
         def depth_first(subtree):
             """
             Import top down just so import code can make assumptions about parents always being available
@@ -376,36 +530,16 @@ class ImportManager(object):
                         # tolerate same child occurring under 2 parents such as in
                         # ContentStoreTest.test_image_import
                         pass
-                    if self.verbose:
-                        log.debug('importing module location %s', child.location)
-
-                    _import_module_and_update_references(
-                        child,
-                        self.store,
-                        self.user_id,
-                        courselike_key,
-                        dest_id,
-                        do_import_static=self.do_import_static,
-                        runtime=courselike.runtime,
-                    )
-
+                    import_module(child)
                     depth_first(child)
 
         depth_first(source_courselike)
 
         for leftover in all_locs:
-            if self.verbose:
-                log.debug('importing module location %s', leftover)
+            import_module(self.xml_module_store.get_item(leftover))
 
-            _import_module_and_update_references(
-                self.xml_module_store.get_item(leftover),
-                self.store,
-                self.user_id,
-                courselike_key,
-                dest_id,
-                do_import_static=self.do_import_static,
-                runtime=courselike.runtime,
-            )
+        if blocks:
+            self.store.import_xblocks(self.user_id, dest_id, blocks)
 
     def run_imports(self):
         """
@@ -623,6 +757,18 @@ def _import_module_and_update_references(
         source_course_id, dest_course_id,
         do_import_static=True, runtime=None):
 
+    fields = _update_module_references(module, source_course_id, dest_course_id, do_import_static)
+    return store.import_xblock(
+        user_id, dest_course_id, module.location.category,
+        module.location.block_id, fields, runtime
+    )
+
+
+def _update_module_references(module, source_course_id, dest_course_id, do_import_static=True):
+    """
+    Return the fields set on the module to import into dest_course_id, with its references
+    to blocks of source_course_id moved to dest_course_id.
+    """
     logging.debug(u'processing import of module %s...', unicode(module.location))
 
     if do_import_static and 'data' in module.fields and isinstance(module.fields['data'], xblock.fields.String):
@@ -682,10 +828,7 @@ def _import_module_and_update_references(
             else:
                 fields[field_name] = field.read_from(module)
 
-    return store.import_xblock(
-        user_id, dest_course_id, module.location.category,
-        module.location.block_id, fields, runtime
-    )
+    return fields
 
 
 def _import_course_draft(
@@ -13,7 +13,7 @@ import textwrap
 import unittest
 import ddt
 
-from mock import Mock, patch, DEFAULT
+from mock import Mock, patch, DEFAULT, PropertyMock
 import webob
 from webob.multidict import MultiDict
 
@@ -1668,7 +1668,8 @@ class CapaModuleTest(unittest.TestCase):
 class CapaDescriptorTest(unittest.TestCase):
     def _create_descriptor(self, xml):
         """ Creates a CapaDescriptor to run test against """
-        descriptor = CapaDescriptor(get_test_system(), scope_ids=1)
+        location = Location("edX", "capa_test", "2012_Fall", "problem", "SampleProblem", None)
+        descriptor = CapaDescriptor(get_test_system(), scope_ids=ScopeIds(None, None, location, location))
         descriptor.data = xml
         return descriptor
 
@@ -1720,6 +1721,35 @@ class CapaDescriptorTest(unittest.TestCase):
         descriptor = self._create_descriptor(xml)
         self.assertEquals(descriptor.problem_types, {"multiplechoiceresponse", "optionresponse"})
 
+    def test_max_score_from_xml(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <script type="loncapa/python">raise Exception("The script was run")</script>
+                <stringresponse answer="Michigan">
+                    <textline points="3"/>
+                </stringresponse>
+                <optionresponse>
+                    <optioninput options="('1','2')" correct="2"/>
+                </optionresponse>
+            </problem>
+        """)
+        descriptor = self._create_descriptor(xml)
+        with patch.object(CapaDescriptor, '_xmodule', new_callable=PropertyMock) as mock_xmodule:
+            self.assertEquals(descriptor.max_score(), 4)
+        self.assertFalse(mock_xmodule.called)
+
+    def test_max_score_from_module(self):
+        # The max score of problems including files is the one of their module.
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="problem.xml"/>
+            </problem>
+        """)
+        descriptor = self._create_descriptor(xml)
+        with patch.object(CapaDescriptor, '_xmodule', new_callable=PropertyMock) as mock_xmodule:
+            mock_xmodule.return_value.max_score.return_value = 2
+            self.assertEquals(descriptor.max_score(), 2)
+
 
 class ComplexEncoderTest(unittest.TestCase):
     def test_default(self):
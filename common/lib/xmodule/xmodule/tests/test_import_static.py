@@ -1,8 +1,16 @@
 """
-Tests that check that we ignore the appropriate files when importing courses.
+Tests that check that we ignore the appropriate files when importing courses,
+and how the static assets are imported.
 """
+import hashlib
+from shutil import rmtree
+from tempfile import mkdtemp
 import unittest
-from mock import Mock
+
+from mock import Mock, patch
+from path import path
+
+from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore.xml_importer import import_static_content
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -15,6 +23,7 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
         import_static_content(course_dir, content_store, course_id)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
         name_val = {sc.name: sc.data for sc in saved_static_content}
@@ -30,6 +39,7 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
         import_static_content(course_dir, content_store, course_id)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
         name_val = {sc.name: sc.data for sc in saved_static_content}
@@ -39,3 +49,54 @@ class IgnoredFilesTestCase(unittest.TestCase):
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+
+class ImportStaticContentTestCase(unittest.TestCase):
+    "Tests for the import of static assets"
+    def setUp(self):
+        super(ImportStaticContentTestCase, self).setUp()
+        self.course_dir = path(mkdtemp())
+        self.addCleanup(rmtree, self.course_dir)
+        (self.course_dir / "static").makedirs()
+        (self.course_dir / "static" / "example.txt").write_bytes("GREEN")
+
+        self.course_id = SlashSeparatedCourseKey("edX", "static", "2015_Spring")
+        self.asset_key = StaticContent.compute_location(self.course_id, "example.txt")
+        self.content_store = Mock()
+        self.content_store.generate_thumbnail.return_value = (None, None)
+        self.content_store.get_all_content_for_course.return_value = ([], 0)
+
+    def _set_existing_asset(self, data):
+        """
+        Make the contentstore hold example.txt with `data`.
+        """
+        self.content_store.get_all_content_for_course.return_value = ([{
+            "asset_key": self.asset_key,
+            "md5": hashlib.md5(data).hexdigest(),
+            "contentType": "text/plain",
+            "displayname": "example.txt",
+            "locked": False,
+            "import_path": "example.txt",
+        }], 1)
+
+    def test_unchanged_asset_skipped(self):
+        self._set_existing_asset("GREEN")
+        remap_dict = import_static_content(self.course_dir, self.content_store, self.course_id)
+        self.assertFalse(self.content_store.save.called)
+        self.assertEqual(remap_dict, {"example.txt": self.asset_key})
+
+    def test_changed_asset_saved(self):
+        self._set_existing_asset("BLUE")
+        remap_dict = import_static_content(self.course_dir, self.content_store, self.course_id)
+        content = self.content_store.save.call_args[0][0]
+        self.assertEqual(content.data, "GREEN")
+        self.assertEqual(content.content_digest, hashlib.md5("GREEN").hexdigest())
+        self.assertEqual(remap_dict, {"example.txt": self.asset_key})
+
+    @patch("xmodule.modulestore.xml_importer.ASSET_IMPORT_CHUNK_SIZE", 2)
+    @patch("xmodule.modulestore.xml_importer.ASSET_IMPORT_STREAM_SIZE", 4)
+    def test_large_asset_streamed(self):
+        import_static_content(self.course_dir, self.content_store, self.course_id)
+        content = self.content_store.save.call_args[0][0]
+        self.assertEqual(list(content.data), ["GR", "EE", "N"])
+        self.assertEqual(content.content_digest, hashlib.md5("GREEN").hexdigest())
@@ -4,6 +4,7 @@ Run these tests @ Devstack:
 """
 # pylint: disable=missing-docstring,invalid-name,maybe-no-member,attribute-defined-outside-init
 from datetime import datetime
+import urllib
 
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -350,6 +351,28 @@ class CourseStructureTests(CourseDetailMixin, CourseViewTestsMixin, ModuleStoreT
         self.maxDiff = None
         self.assertDictEqual(response.data, expected)
 
+    def test_get_filtered(self):
+        """
+        The view should only return the blocks of the types and of the subtree requested.
+        """
+        uri = reverse(self.view, kwargs={'course_id': self.course_id})
+        response = self.http_get(uri + '?block_type=problem,sequential')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['root'], unicode(self.course.location))
+        blocks = response.data['blocks']
+        self.assertEqual(sorted(block['type'] for block in blocks.itervalues()), ['problem', 'sequential'])
+
+        sequential_id = next(block_id for block_id, block in blocks.iteritems() if block['type'] == 'sequential')
+        response = self.http_get(uri + '?' + urllib.urlencode({'root': sequential_id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['root'], sequential_id)
+        self.assertEqual(response.data['blocks'], blocks)
+
+        response = self.http_get(
+            uri + '?' + urllib.urlencode({'root': unicode(self.course.location.replace(name='missing'))})
+        )
+        self.assertEqual(response.status_code, 404)
+
 
 class CourseGradingPolicyTests(CourseDetailMixin, CourseViewTestsMixin, ModuleStoreTestCase):
     view = 'course_structure_api:v0:grading_policy'
@@ -171,17 +171,20 @@ class CourseStructure(CourseViewMixin, RetrieveAPIView):
     """
     **Use Case**
 
-        Retrieves course structure.
+        Retrieves course structure, or only the blocks of some types or of a subtree of it.
 
     **Example requests**:
 
         GET /api/course_structure/v0/course_structures/{course_id}/
+        GET /api/course_structure/v0/course_structures/{course_id}/?block_type={block_type1},{block_type2}
+        GET /api/course_structure/v0/course_structures/{course_id}/?root={usage_key}
 
     **Response Values**
 
-        * root: ID of the root node of the structure
+        * root: ID of the root node of the structure, or of the subtree if requested
 
-        * blocks: Dictionary mapping IDs to block nodes.
+        * blocks: Dictionary mapping IDs to block nodes, restricted to the subtree and block types
+          if requested.
     """
     serializer_class = serializers.CourseStructureSerializer
     course = None
@@ -197,8 +200,23 @@ class CourseStructure(CourseViewMixin, RetrieveAPIView):
     def get_object(self, queryset=None):
         # Make sure the course exists and the user has permissions to view it.
         self.course = self.get_course_or_404()
-        course_structure = models.CourseStructure.objects.get(course_id=self.course.id)
-        return course_structure.structure
+        # Structures whose blocks were not generated yet are missing too.
+        course_structure = models.CourseStructure.objects.exclude(root='').get(course_id=self.course.id)
+
+        root = self.request.QUERY_PARAMS.get('root', None)
+        block_types = self.request.QUERY_PARAMS.get('block_type', None)
+        if root is None and block_types is None:
+            return course_structure.structure
+
+        # Only read the blocks requested from the stored structure
+        if root is not None and not course_structure.blocks.filter(usage_key=root).exists():
+            raise Http404
+        return {
+            'root': root or course_structure.root,
+            'blocks': course_structure.get_blocks(
+                root=root, block_types=block_types.split(',') if block_types else None
+            ),
+        }
 
 
 class CourseGradingPolicy(CourseViewMixin, ListAPIView):
@@ -18,11 +18,13 @@ from xmodule.course_module import (
     CourseDescriptor, CATALOG_VISIBILITY_CATALOG_AND_ABOUT,
     CATALOG_VISIBILITY_ABOUT)
 from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore.django import modulestore
 from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.split_test_module import get_split_user_partitions
-from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPartitionGroupError
+from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 
 from external_auth.models import ExternalAuthMap
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
 from student import auth
 from student.roles import (
@@ -59,7 +61,7 @@ def has_access(user, action, obj, course_key=None):
     user: a Django user object. May be anonymous. If none is passed,
                     anonymous is assumed
 
-    obj: The object to check access for.  A module, descriptor, location, or
+    obj: The object to check access for.  A module, descriptor, course overview, location, or
                     certain special strings (e.g. 'global')
 
     action: A string specifying the action that the client is trying to perform.
@@ -83,6 +85,9 @@ def has_access(user, action, obj, course_key=None):
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, action, obj)
 
+    if isinstance(obj, CourseOverview):
+        return _has_access_course_overview(user, action, obj)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, action, obj, course_key)
 
@@ -276,24 +281,9 @@ def _has_access_course_desc(user, action, course):
             _has_staff_access_to_descriptor(user, course, course.id)
         )
 
-    def can_view_courseware_with_prerequisites():  # pylint: disable=invalid-name
-        """
-        Checks if prerequisite courses feature is enabled and course has prerequisites
-        and user is neither staff nor anonymous then it returns False if user has not
-        passed prerequisite courses otherwise return True.
-        """
-        if settings.FEATURES['ENABLE_PREREQUISITE_COURSES'] \
-                and not _has_staff_access_to_descriptor(user, course, course.id) \
-                and course.pre_requisite_courses \
-                and not user.is_anonymous() \
-                and get_pre_requisite_courses_not_completed(user, [course.id]):
-            return False
-        else:
-            return True
-
     checkers = {
         'load': can_load,
-        'view_courseware_with_prerequisites': can_view_courseware_with_prerequisites,
+        'view_courseware_with_prerequisites': lambda: _can_view_courseware_with_prerequisites(user, course),
         'load_forum': can_load_forum,
         'load_mobile': can_load_mobile,
         'load_mobile_no_enrollment_check': can_load_mobile_no_enroll_check,
@@ -308,6 +298,67 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _has_access_course_overview(user, action, course_overview):
+    """
+    Check if user has access to a course from its overview, without loading the course
+    descriptor, for the pages listing many courses.
+
+    Valid actions:
+
+    'load' -- load the courseware, see inside the course
+    'view_courseware_with_prerequisites' -- load the courseware, having passed its prerequisite courses
+    'staff' -- staff access to course.
+    """
+    def has_group_access():
+        """
+        Do the user's groups satisfy the group access of the course?  Checking it needs the
+        user partitions of the course, so its descriptor is only loaded if it restricts access.
+        """
+        if not course_overview.group_access:
+            return True
+        return _has_group_access(modulestore().get_course(course_overview.id), user, course_overview.id)
+
+    def can_load():
+        """
+        Can this user load this course?
+
+        NOTE: this is not checking whether user is actually enrolled in the course.
+        """
+        return _can_load_descriptor(
+            user,
+            course_overview,
+            course_overview.id,
+            has_staff_access=lambda: _has_access_to_course(user, 'staff', course_overview.id),
+            has_group_access=has_group_access,
+        )
+
+    checkers = {
+        'load': can_load,
+        'view_courseware_with_prerequisites': lambda: _can_view_courseware_with_prerequisites(user, course_overview),
+        'staff': lambda: _has_access_to_course(user, 'staff', course_overview.id),
+    }
+
+    return _dispatch(checkers, action, user, course_overview)
+
+
+def _can_view_courseware_with_prerequisites(user, course):  # pylint: disable=invalid-name
+    """
+    Checks if prerequisite courses feature is enabled and course has prerequisites
+    and user is neither staff nor anonymous then it returns False if user has not
+    passed prerequisite courses otherwise return True.
+
+    `course` is a course descriptor or overview.
+    """
+    if settings.FEATURES['ENABLE_PREREQUISITE_COURSES'] \
+            and not _has_access_to_course(user, 'staff', course.id) \
+            and course.pre_requisite_courses \
+            and not user.is_anonymous() \
+            and get_pre_requisite_courses_not_completed(user, [course.id]):
+        return False
+    else:
+        return True
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -341,25 +392,37 @@ def _has_group_access(descriptor, user, course_key):
 
     # use merged_group_access which takes group access on the block's
     # parents / ancestors into account
-    merged_access = descriptor.merged_group_access
-    # check for False in merged_access, which indicates that at least one
+    return _has_group_access_to_partitions(
+        descriptor.merged_group_access,
+        descriptor.user_partitions,
+        lambda partition: partition.scheme.get_group_for_user(course_key, user, partition),
+    )
+
+
+def _has_group_access_to_partitions(group_access, user_partitions, get_user_group):
+    """
+    Return whether the groups of a user satisfy `group_access`, which maps the ids of
+    `user_partitions` to the ids of the groups allowed access. `get_user_group` returns
+    the group of the user in a partition.
+    """
+    # check for False in group_access, which indicates that at least one
     # partition's group list excludes all students.
-    if False in merged_access.values():
+    if False in group_access.values():
         log.warning("Group access check excludes all students, access will be denied.", exc_info=True)
         return False
 
     # resolve the partition IDs in group_access to actual
     # partition objects, skipping those which contain empty group directives.
     # if a referenced partition could not be found, access will be denied.
-    try:
-        partitions = [
-            descriptor._get_user_partition(partition_id)  # pylint:disable=protected-access
-            for partition_id, group_ids in merged_access.items()
-            if group_ids is not None
-        ]
-    except NoSuchUserPartitionError:
-        log.warning("Error looking up user partition, access will be denied.", exc_info=True)
-        return False
+    partitions_by_id = dict((partition.id, partition) for partition in user_partitions)
+    partitions = []
+    for partition_id, group_ids in group_access.items():
+        if group_ids is None:
+            continue
+        if partition_id not in partitions_by_id:
+            log.warning("Error looking up user partition %s, access will be denied.", partition_id)
+            return False
+        partitions.append(partitions_by_id[partition_id])
 
     # next resolve the group IDs specified within each partition
     partition_groups = []
@@ -367,7 +430,7 @@ def _has_group_access(descriptor, user, course_key):
         for partition in partitions:
             groups = [
                 partition.get_group(group_id)
-                for group_id in merged_access[partition.id]
+                for group_id in group_access[partition.id]
             ]
             if groups:
                 partition_groups.append((partition, groups))
@@ -378,11 +441,7 @@ def _has_group_access(descriptor, user, course_key):
     # look up the user's group for each partition
     user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        user_groups[partition.id] = get_user_group(partition)
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
@@ -412,38 +471,14 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
         students to see modules.  If not, views should check the course, so we
         don't have to hit the enrollments table on every module load.
         """
-        if descriptor.visible_to_staff_only and not _has_staff_access_to_descriptor(user, descriptor, course_key):
-            return False
-
-        # enforce group access
-        if not _has_group_access(descriptor, user, course_key):
-            # if group_access check failed, deny access unless the requestor is staff,
-            # in which case immediately grant access.
-            return _has_staff_access_to_descriptor(user, descriptor, course_key)
-
-        # If start dates are off, can always load
-        if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
-            debug("Allow: DISABLE_START_DATES")
-            return True
-
-        # Check start date
-        if 'detached' not in descriptor._class_tags and descriptor.start is not None:
-            now = datetime.now(UTC())
-            effective_start = _adjust_start_date_for_beta_testers(
-                user,
-                descriptor,
-                course_key=course_key
-            )
-            if now > effective_start:
-                # after start date, everyone can see it
-                debug("Allow: now > effective start date")
-                return True
-            # otherwise, need staff access
-            return _has_staff_access_to_descriptor(user, descriptor, course_key)
-
-        # No start date, so can always load.
-        debug("Allow: no start date")
-        return True
+        return _can_load_descriptor(
+            user,
+            descriptor,
+            course_key,
+            has_staff_access=lambda: _has_staff_access_to_descriptor(user, descriptor, course_key),
+            has_group_access=lambda: _has_group_access(descriptor, user, course_key),
+            check_start_date='detached' not in descriptor._class_tags,
+        )
 
     checkers = {
         'load': can_load,
@@ -454,6 +489,49 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     return _dispatch(checkers, action, user, descriptor)
 
 
+def _can_load_descriptor(user, descriptor, course_key, has_staff_access, has_group_access, check_start_date=True):
+    """
+    Return whether `user` may load `descriptor`, which only needs the fields its access
+    depends on: visible_to_staff_only, start and days_early_for_beta.
+
+    `has_staff_access` and `has_group_access` are called without arguments to tell whether
+    the user has staff access to the descriptor, and whether their groups satisfy its group
+    access, so that callers checking many descriptors can look them up once.
+    """
+    if descriptor.visible_to_staff_only and not has_staff_access():
+        return False
+
+    # enforce group access
+    if not has_group_access():
+        # if group_access check failed, deny access unless the requestor is staff,
+        # in which case immediately grant access.
+        return has_staff_access()
+
+    # If start dates are off, can always load
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    # Check start date
+    if check_start_date and descriptor.start is not None:
+        now = datetime.now(UTC())
+        effective_start = _adjust_start_date_for_beta_testers(
+            user,
+            descriptor,
+            course_key=course_key
+        )
+        if now > effective_start:
+            # after start date, everyone can see it
+            debug("Allow: now > effective start date")
+            return True
+        # otherwise, need staff access
+        return has_staff_access()
+
+    # No start date, so can always load.
+    debug("Allow: no start date")
+    return True
+
+
 def _has_access_xmodule(user, action, xmodule, course_key):
     """
     Check if user has access to this xmodule.
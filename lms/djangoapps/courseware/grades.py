@@ -1,34 +1,339 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from datetime import datetime, timedelta
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
+from pytz import UTC
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.access import has_access
+from courseware.model_data import FieldDataCache, MultiUserFieldDataCache, chunks
 from student.models import anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendents
 from xmodule import graders
+from xmodule.fields import Date
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, StudentModule, persistent_grades_enabled
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
+from submissions.models import ScoreSummary
 from opaque_keys import InvalidKeyError
 
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose scores are fetched together by iterate_grades_for
+# when grading in batches.
+GRADING_BATCH_SIZE = 500
+
+
+class GradingBatch(object):
+    """
+    Scores for a batch of students in a course, fetched up front with a few
+    bulk queries instead of one query per section per student.
+
+    Grading with a GradingBatch only builds XModules where the stored scores
+    are not enough: for sections with dynamic children, for problems that
+    always recalculate their grades, and for problems that have no stored
+    max_grade yet.
+    """
+    def __init__(self, course, students):
+        """
+        Arguments:
+            course: The CourseDescriptor being graded
+            students: A list of User objects to prefetch scores for
+        """
+        self.course_id = course.id
+        self._course = course
+        self._students = students
+        self._student_modules = defaultdict(dict)
+        self._submissions_scores = {}
+
+        # Dict of usage_key -> max score of problems that had to be
+        # instantiated because their StudentModule carried no max_grade.
+        self.max_scores = {}
+
+        scored_locations = set(
+            descriptor.location
+            for sections in course.grading_context['graded_sections'].itervalues()
+            for section in sections
+            for descriptor in section['xmoduledescriptors']
+        )
+
+        student_modules = StudentModule.objects.filter(
+            course_id=self.course_id,
+            student_id__in=[student.id for student in students],
+        ).only('student', 'module_state_key', 'grade', 'max_grade')
+        for student_module in student_modules:
+            location = student_module.module_state_key.map_into_course(self.course_id)
+            if location in scored_locations:
+                self._student_modules[student_module.student_id][location] = student_module
+
+        # The submissions API knows the students by their anonymous ids, which are computed
+        # from the ids of the students, so there's no need to query or save them here.
+        anonymous_ids = {
+            student.id: anonymous_id_for_user(student, self.course_id, save=False) for student in students
+        }
+        submissions_scores = _get_submissions_scores(self.course_id.to_deprecated_string(), anonymous_ids.values())
+        for student in students:
+            self._submissions_scores[student.id] = submissions_scores[anonymous_ids[student.id]]
+
+        # Fetched when a module is first built for a student
+        self._field_data_cache = None
+        self._student_field_data_caches = {}
+
+        self._course_grades = {}
+        self._subsection_grades = defaultdict(dict)
+        if persistent_grades_enabled():
+            student_ids = [student.id for student in students]
+            self._course_grades = {
+                course_grade.user_id: course_grade
+                for course_grade in PersistentCourseGrade.objects.filter(
+                    course_id=self.course_id, user_id__in=student_ids
+                )
+            }
+            for subsection_grade in PersistentSubsectionGrade.objects.filter(
+                    course_id=self.course_id, user_id__in=student_ids
+            ):
+                usage_key = subsection_grade.usage_key.map_into_course(self.course_id)
+                self._subsection_grades[subsection_grade.user_id][usage_key] = subsection_grade
+
+    def field_data_cache_for(self, student):
+        """
+        Return a FieldDataCache of `student` for all the modules that can
+        affect grading.
+
+        The first call fetches the data of all the students of the batch.
+        """
+        if self._field_data_cache is None:
+            self._field_data_cache = MultiUserFieldDataCache(
+                self._course.grading_context['all_descriptors'], self.course_id, self._students
+            )
+        if student.id not in self._student_field_data_caches:
+            self._student_field_data_caches[student.id] = self._field_data_cache.for_user(student)
+        return self._student_field_data_caches[student.id]
+
+    def student_modules_for(self, student):
+        """
+        Return a dict of usage_key -> StudentModule for the scored
+        problems that `student` has state for.
+        """
+        return self._student_modules.get(student.id, {})
+
+    def submissions_scores_for(self, student):
+        """
+        Return the submissions API scores of `student`, in the format of
+        `submissions.api.get_scores`.
+        """
+        return self._submissions_scores.get(student.id, {})
+
+    def persisted_grades_for(self, student):
+        """
+        Return the PersistentCourseGrade (or None) and the dict of usage_key ->
+        PersistentSubsectionGrade stored for `student`.
+        """
+        return self._course_grades.get(student.id), self._subsection_grades.get(student.id, {})
+
+
+def _get_submissions_scores(course_id_string, anonymous_ids):
+    """
+    Return a dict of anonymous student id -> the submissions API scores of
+    the student in the course, in the format of `submissions.api.get_scores`,
+    fetched with a single query for all the students.
+    """
+    scores = {anonymous_id: {} for anonymous_id in anonymous_ids}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=course_id_string,
+        student_item__student_id__in=list(anonymous_ids),
+    ).select_related('latest', 'student_item')
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            scores[summary.student_item.student_id][summary.student_item.item_id] = (
+                summary.latest.points_earned, summary.latest.points_possible
+            )
+    return scores
+
+
+def _submissions_digest(submissions_scores, descriptors=None):
+    """
+    Return a digest of the submissions API scores, restricted to the scores of
+    `descriptors` if they are given.
+    """
+    if descriptors is None:
+        items = submissions_scores.items()
+    else:
+        items = []
+        for descriptor in descriptors:
+            item_id = descriptor.location.to_deprecated_string()
+            if item_id in submissions_scores:
+                items.append((item_id, submissions_scores[item_id]))
+    return hashlib.sha1(json.dumps(sorted(items))).hexdigest()
+
+
+def _is_current(persisted_grade, version, submissions_digest):
+    """
+    Return whether `persisted_grade` was computed for the given course version
+    and submissions API scores.
+    """
+    return (
+        persisted_grade is not None and
+        persisted_grade.course_version == version and
+        persisted_grade.submissions_digest == submissions_digest
+    )
+
+
+def _load_course_grade(student, course_id):
+    """
+    Return the PersistentCourseGrade stored for `student` in `course_id`, or None.
+    """
+    try:
+        return PersistentCourseGrade.objects.get(user=student, course_id=course_id)
+    except PersistentCourseGrade.DoesNotExist:
+        return None
+
+
+def _load_persisted_grades(student, course_id):
+    """
+    Return the PersistentCourseGrade (or None) and the dict of usage_key ->
+    PersistentSubsectionGrade stored for `student` in `course_id`.
+    """
+    course_grade = _load_course_grade(student, course_id)
+    subsection_grades = {
+        subsection_grade.usage_key.map_into_course(course_id): subsection_grade
+        for subsection_grade in PersistentSubsectionGrade.objects.filter(user=student, course_id=course_id)
+    }
+    return course_grade, subsection_grades
+
+
+def _store_subsection_grades(student, course_id, subsection_grades):
+    """
+    Replace the persisted grades of `student` for the subsections of the
+    given (unsaved) PersistentSubsectionGrades with them.
+    """
+    if not subsection_grades:
+        return
+    try:
+        PersistentSubsectionGrade.objects.filter(
+            user=student,
+            course_id=course_id,
+            usage_key__in=[subsection_grade.usage_key for subsection_grade in subsection_grades],
+        ).delete()
+        PersistentSubsectionGrade.objects.bulk_create(subsection_grades)
+    except IntegrityError:
+        # The same grades were stored concurrently, keep those.
+        transaction.rollback()
+        log.info(u"Subsection grades of user %s in %s were stored concurrently.", student.id, course_id)
+    else:
+        transaction.commit()
+
+
+def _store_course_summary(student, course, version, submissions_digest, course_grade=None, **summaries):
+    """
+    Persist `summaries` (grade_summary and/or progress_summary, already
+    serialized) as the current summaries of `student` in `course`.
+
+    `course_grade` is the PersistentCourseGrade of the student, if it has
+    already been loaded.
+    """
+    if course_grade is None:
+        course_grade = _load_course_grade(student, course.id) or PersistentCourseGrade(user=student, course_id=course.id)
+
+    if not _is_current(course_grade, version, submissions_digest):
+        course_grade.course_version = version
+        course_grade.submissions_digest = submissions_digest
+        course_grade.grade_summary = None
+        course_grade.grade_computed = None
+        course_grade.progress_summary = None
+        course_grade.progress_computed = None
+    for field_name, value in summaries.iteritems():
+        setattr(course_grade, field_name, value)
+    if 'grade_summary' in summaries:
+        course_grade.grade_computed = datetime.now(UTC)
+    if 'progress_summary' in summaries:
+        course_grade.progress_computed = datetime.now(UTC)
+
+    try:
+        course_grade.save()
+    except IntegrityError:
+        # The summary was stored concurrently, keep that one.
+        transaction.rollback()
+        log.info(u"Course grade of user %s in %s was stored concurrently.", student.id, course.id)
+    else:
+        transaction.commit()
+
+
+def _load_grade_summary(serialized_summary):
+    """
+    Deserialize a grade summary stored by `_grade`.
+    """
+    grade_summary = json.loads(serialized_summary)
+    grade_summary['totaled_scores'] = {
+        section_format: [Score(*score) for score in scores]
+        for section_format, scores in grade_summary['totaled_scores'].iteritems()
+    }
+    return grade_summary
+
+
+def _dump_progress_summary(chapters):
+    """
+    Serialize a progress summary computed by `_progress_summary`.
+    """
+    date_field = Date()
+    return json.dumps([
+        dict(chapter, sections=[
+            dict(section, due=date_field.to_json(section['due']))
+            for section in chapter['sections']
+        ])
+        for chapter in chapters
+    ])
+
+
+def _load_progress_summary(serialized_summary):
+    """
+    Deserialize a progress summary stored by `_progress_summary`.
+    """
+    date_field = Date()
+    chapters = json.loads(serialized_summary)
+    for chapter in chapters:
+        for section in chapter['sections']:
+            section['scores'] = [Score(*score) for score in section['scores']]
+            section['section_total'] = Score(*section['section_total'])
+            section['due'] = date_field.from_json(section['due'])
+    return chapters
+
+
+def _released_since(course, since):
+    """
+    Return whether a chapter or section of `course` has been released to
+    students after `since`, which changes what their grade and progress
+    summary show.
+    """
+    now = datetime.now(UTC)
+    for chapter in course.get_children():
+        for block in [chapter] + chapter.get_children():
+            if block.start is None or block.start <= since:
+                continue
+            # Beta testers see content days_early_for_beta before its start.
+            released = block.start
+            if block.days_early_for_beta is not None:
+                released -= timedelta(days=block.days_early_for_beta)
+            if released <= now:
+                return True
+    return False
+
 
 def answer_distributions(course_key):
     """
@@ -122,16 +427,16 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, grading_batch=None, force_recompute=False):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, grading_batch, force_recompute)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, grading_batch=None, force_recompute=False):
     """
     Unwrapped version of "grade"
 
@@ -150,17 +455,57 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If `grading_batch` is given, the student's scores are read from that
+    GradingBatch instead of being queried for here.
+
+    If persistent grades are enabled, the grade summary and the scores of
+    each subsection are read from and stored in PersistentCourseGrade and
+    PersistentSubsectionGrade, so only subsections whose scores changed are
+    graded again. As with the progress summary, the grade summary is not
+    reused once content was released after it was computed, and grades of
+    staff are not persisted. Pass `force_recompute` to ignore the persisted
+    grades.
+
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
     raw_scores = []
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
-    )
+    if grading_batch is not None:
+        submissions_scores = grading_batch.submissions_scores_for(student)
+        student_modules = grading_batch.student_modules_for(student)
+        max_scores = grading_batch.max_scores
+    else:
+        # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+        # scores that were registered with the submissions API, which for the moment
+        # means only openassessment (edx-ora2)
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
+        student_modules = None
+        max_scores = None
+
+    # Staff see content that students don't, which changes their grades, and may be
+    # masquerading as students, so their grades are not persisted.
+    persist = persistent_grades_enabled() and not has_access(student, 'staff', course)
+    if persist:
+        version = modulestore().get_course_published_version(course.id)
+        submissions_digest = _submissions_digest(submissions_scores)
+        if grading_batch is not None:
+            course_grade, subsection_grades = grading_batch.persisted_grades_for(student)
+        else:
+            course_grade, subsection_grades = _load_persisted_grades(student, course.id)
+
+        if not (force_recompute or keep_raw_scores) and _is_current(course_grade, version, submissions_digest):
+            # Summaries stored before grade_computed was recorded can't be validated.
+            if course_grade.grade_summary is not None and course_grade.grade_computed is not None:
+                if not _released_since(course, course_grade.grade_computed):
+                    return _load_grade_summary(course_grade.grade_summary)
+
+        # Grades of sections with problems that always recalculate their grades
+        # can't be persisted, and neither can a course grade depending on them.
+        persist_course_grade = True
+        new_subsection_grades = []
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -174,31 +519,52 @@ def _grade(student, request, course, keep_raw_scores):
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
+            should_grade_section = always_recalculate
+
+            # The persisted scores of the section, which are None if the
+            # student never attempted it.
+            persisted_scores = False
+            if persist and always_recalculate:
+                persist_course_grade = False
+            elif persist:
+                section_digest = _submissions_digest(submissions_scores, section['xmoduledescriptors'])
+                subsection_grade = subsection_grades.get(section_descriptor.location)
+                if not force_recompute and _is_current(subsection_grade, version, section_digest):
+                    scores = json.loads(subsection_grade.scores)
+                    if scores is not None:
+                        scores = [Score(*score) for score in scores]
+                    persisted_scores = True
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
             # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
+            if not (should_grade_section or persisted_scores):
                 should_grade_section = any(
                     descriptor.location.to_deprecated_string() in submissions_scores
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+            if not (should_grade_section or persisted_scores):
+                if student_modules is not None:
+                    should_grade_section = any(
+                        descriptor.location in student_modules
+                        for descriptor in section['xmoduledescriptors']
+                    )
+                else:
+                    with manual_transaction():
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=[
+                                descriptor.location for descriptor in section['xmoduledescriptors']
+                            ]
+                        ).exists()
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
+            if should_grade_section and not persisted_scores:
                 scores = []
 
                 def create_module(descriptor):
@@ -206,13 +572,22 @@ def _grade(student, request, course, keep_raw_scores):
                     # TODO: We need the request to pass into here. If we could forego that, our arguments
                     # would be simpler
                     with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
+                        if grading_batch is not None:
+                            field_data_cache = grading_batch.field_data_cache_for(student)
+                        else:
+                            field_data_cache = FieldDataCache([descriptor], course.id, student)
                     return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
 
                 for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id,
+                        student,
+                        module_descriptor,
+                        create_module,
+                        scores_cache=submissions_scores,
+                        student_modules_cache=student_modules,
+                        max_scores_cache=max_scores,
                     )
                     if correct is None and total is None:
                         continue
@@ -229,7 +604,23 @@ def _grade(student, request, course, keep_raw_scores):
                         graded = False
 
                     scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
-
+            elif not persisted_scores:
+                scores = None
+
+            if persist and not (always_recalculate or persisted_scores):
+                new_subsection_grades.append(PersistentSubsectionGrade(
+                    user=student,
+                    course_id=course.id,
+                    usage_key=section_descriptor.location,
+                    course_version=version,
+                    submissions_digest=section_digest,
+                    scores=json.dumps(scores),
+                    scored_blocks=json.dumps([
+                        unicode(descriptor.location) for descriptor in section['xmoduledescriptors']
+                    ]),
+                ))
+
+            if scores is not None:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -256,6 +647,15 @@ def _grade(student, request, course, keep_raw_scores):
     letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
     grade_summary['grade'] = letter_grade
     grade_summary['totaled_scores'] = totaled_scores  	# make this available, eg for instructor download & debugging
+
+    if persist:
+        _store_subsection_grades(student, course.id, new_subsection_grades)
+        if persist_course_grade:
+            _store_course_summary(
+                student, course, version, submissions_digest, course_grade,
+                grade_summary=json.dumps(grade_summary),
+            )
+
     if keep_raw_scores:
         # way to get all RAW scores out to instructor
         # so grader can be double-checked
@@ -286,19 +686,19 @@ def grade_for_percentage(grade_cutoffs, percentage):
 
 
 @transaction.commit_manually
-def progress_summary(student, request, course):
+def progress_summary(student, request, course, force_recompute=False):
     """
     Wraps "_progress_summary" with the manual_transaction context manager just
     in case there are unanticipated errors.
     """
     with manual_transaction():
-        return _progress_summary(student, request, course)
+        return _progress_summary(student, request, course, force_recompute)
 
 
 # TODO: This method is not very good. It was written in the old course style and
 # then converted over and performance is not good. Once the progress page is redesigned
 # to not have the progress summary this method should be deleted (so it won't be copied).
-def _progress_summary(student, request, course):
+def _progress_summary(student, request, course, force_recompute=False):
     """
     Unwrapped version of "progress_summary".
 
@@ -318,7 +718,23 @@ def _progress_summary(student, request, course):
     If the student does not have access to load the course module, this function
     will return None.
 
+    If persistent grades are enabled, the summary is read from and stored in
+    the student's PersistentCourseGrade. Pass `force_recompute` to ignore the
+    persisted summary.
     """
+    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+
+    # Staff see content regardless of its release dates, and may be
+    # masquerading as students, so their summaries are not persisted.
+    persist = persistent_grades_enabled() and not has_access(student, 'staff', course)
+    if persist:
+        version = modulestore().get_course_published_version(course.id)
+        submissions_digest = _submissions_digest(submissions_scores)
+        course_grade = _load_course_grade(student, course.id)
+        if not force_recompute and _is_current(course_grade, version, submissions_digest):
+            if course_grade.progress_summary is not None and not _released_since(course, course_grade.progress_computed):
+                return _load_progress_summary(course_grade.progress_summary)
+
     with manual_transaction():
         field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
             course.id, student, course, depth=None
@@ -330,8 +746,6 @@ def _progress_summary(student, request, course):
             # This student must not have access to the course.
             return None
 
-    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
-
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
     for chapter_module in course_module.get_display_items():
@@ -359,6 +773,9 @@ def _progress_summary(student, request, course):
                     )
                     if correct is None and total is None:
                         continue
+                    if module_descriptor.always_recalculate_grades:
+                        # This score can change without the student doing anything.
+                        persist = False
 
                     scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
@@ -384,10 +801,17 @@ def _progress_summary(student, request, course):
             'sections': sections
         })
 
+    if persist:
+        _store_course_summary(
+            student, course, version, submissions_digest, course_grade,
+            progress_summary=_dump_progress_summary(chapters),
+        )
+
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None,
+              student_modules_cache=None, max_scores_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -401,6 +825,12 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_modules_cache: A dict of usage_keys to the user's StudentModules.
+           If given, it is used instead of querying for the StudentModule.
+    max_scores_cache: A dict of usage_keys to max scores, shared between users.
+           If given, problems without any state for the user are only
+           instantiated the first time their max score is needed. The access
+           of the user to them is still checked every time.
     """
     scores_cache = scores_cache or {}
 
@@ -427,18 +857,29 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_modules_cache is not None:
+        student_module = student_modules_cache.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
         total = student_module.max_grade
+    elif student_module is None and problem_descriptor.location in (max_scores_cache or {}):
+        # A problem the user has no state for scores like any other fresh
+        # instance of it, so reuse the max score computed for another user,
+        # as long as this user may load it, as module_creator checks.
+        if not has_access(user, 'load', problem_descriptor, course_id):
+            return (None, None)
+        correct = 0.0
+        total = max_scores_cache[problem_descriptor.location]
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
         # we need to instantiate the problem.
@@ -455,6 +896,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         if total is None:
             return (None, None)
 
+        if student_module is None and max_scores_cache is not None:
+            max_scores_cache[problem_descriptor.location] = total
+
     # Now we re-weight the problem, if specified
     weight = problem_descriptor.weight
     if weight is not None:
@@ -480,7 +924,7 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def iterate_grades_for(course_id, students, batched=False):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -497,9 +941,28 @@ def iterate_grades_for(course_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If `batched` is True, students are graded in chunks of GRADING_BATCH_SIZE,
+    with the scores of each chunk fetched up front by a GradingBatch.
     """
     course = courses.get_course_by_id(course_id)
 
+    if batched:
+        for student_chunk in chunks(students, GRADING_BATCH_SIZE):
+            grading_batch = GradingBatch(course, student_chunk)
+            for result in _iterate_grades_for(course, student_chunk, grading_batch):
+                yield result
+    else:
+        for result in _iterate_grades_for(course, students):
+            yield result
+
+
+def _iterate_grades_for(course, students, grading_batch=None):
+    """
+    Unwrapped version of "iterate_grades_for", for an already loaded course.
+    """
+    course_id = course.id
+
     # We make a fake request because grading code expects to be able to look at
     # the request. We have to attach the correct user to the request before
     # grading that student.
@@ -514,7 +977,10 @@ def iterate_grades_for(course_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                if grading_batch is not None:
+                    gradeset = grade(student, request, course, grading_batch=grading_batch)
+                else:
+                    gradeset = grade(student, request, course)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
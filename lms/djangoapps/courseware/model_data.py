@@ -3,7 +3,8 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 from itertools import chain
 from .models import (
     StudentModule,
@@ -19,7 +20,7 @@ from opaque_keys.edx.asides import AsideUsageKeyV1
 from django.db import DatabaseError
 
 from xblock.runtime import KeyValueStore
-from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
+from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError, XBlockSaveError
 from xblock.fields import Scope, UserScope
 from xmodule.modulestore.django import modulestore
 from xblock.core import XBlockAside
@@ -42,6 +43,38 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def _get_descriptor_descendents(descriptor, depth, descriptor_filter):
+    """
+    Return a list of `descriptor` and its descendents down to `depth`, which match
+    `descriptor_filter`. See FieldDataCache.add_descriptor_descendents.
+    """
+    def get_child_descriptors(descriptor, depth, descriptor_filter):
+        """
+        Return a list of all child descriptors down to the specified depth
+        that match the descriptor filter. Includes `descriptor`
+
+        descriptor: The parent to search inside
+        depth: The number of levels to descend, or None for infinite depth
+        descriptor_filter(descriptor): A function that returns True
+            if descriptor should be included in the results
+        """
+        if descriptor_filter(descriptor):
+            descriptors = [descriptor]
+        else:
+            descriptors = []
+
+        if depth is None or depth > 0:
+            new_depth = depth - 1 if depth is not None else depth
+
+            for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+                descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
+
+        return descriptors
+
+    with modulestore().bulk_operations(descriptor.location.course_key):
+        return get_child_descriptors(descriptor, depth, descriptor_filter)
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
@@ -63,6 +96,9 @@ class FieldDataCache(object):
         '''
         self.cache = {}
         self.select_for_update = select_for_update
+        # Maps id(field_object) to the field objects written while writes are buffered,
+        # and the names of the fields written to them; None while writes aren't buffered
+        self._buffered_writes = None
 
         if asides is None:
             self.asides = []
@@ -95,34 +131,7 @@ class FieldDataCache(object):
             descriptor_filter is a function that accepts a descriptor and return wether the StudentModule
                 should be cached
         """
-
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
-        with modulestore().bulk_operations(descriptor.location.course_key):
-            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
-
-        self.add_descriptors_to_cache(descriptors)
+        self.add_descriptors_to_cache(_get_descriptor_descendents(descriptor, depth, descriptor_filter))
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -321,6 +330,250 @@ class FieldDataCache(object):
         self.cache[cache_key] = field_object
         return field_object
 
+    @contextmanager
+    def buffer_writes(self):
+        """
+        Buffer the writes of field objects made in the block, and save them all at its end.
+
+        All the writes to the same row are combined into a single UPDATE, and the new rows
+        of each model are inserted together. Nested blocks save the writes at the end of
+        the outermost one. If the block raises, its writes are dropped instead.
+
+        Raises XBlockSaveError with the names of the fields that were saved, and of those
+        that weren't, if a field object can't be saved.
+        """
+        if self._buffered_writes is not None:
+            yield
+            return
+
+        self._buffered_writes = OrderedDict()
+        try:
+            yield
+            self.flush_writes()
+        finally:
+            self._buffered_writes = None
+
+    def save_field_objects(self, dirty_field_objects):
+        """
+        Save field objects, or buffer them until the end of `buffer_writes`.
+
+        `dirty_field_objects`: pairs of a field object and the names of the fields written to it
+
+        Raises KeyValueMultiSaveError with the names of the fields that were saved if a field
+        object can't be saved.
+        """
+        if self._buffered_writes is None:
+            _save_field_objects(dirty_field_objects)
+            return
+
+        for field_object, names in dirty_field_objects:
+            __, buffered_names = self._buffered_writes.setdefault(id(field_object), (field_object, []))
+            buffered_names.extend(name for name in names if name not in buffered_names)
+
+    def discard_writes(self, field_object):
+        """
+        Forget the buffered writes of `field_object`, such as when it is deleted.
+        """
+        if self._buffered_writes is not None:
+            self._buffered_writes.pop(id(field_object), None)
+
+    def flush_writes(self):
+        """
+        Save the buffered field objects now.
+
+        Raises XBlockSaveError with the names of the fields that were saved, and of those
+        that weren't, if a field object can't be saved.
+        """
+        if not self._buffered_writes:
+            return
+
+        dirty_field_objects = self._buffered_writes.values()
+        self._buffered_writes.clear()
+        try:
+            _save_field_objects(dirty_field_objects, bulk_create=True)
+        except KeyValueMultiSaveError as save_error:
+            dirty_fields = [
+                name for __, names in dirty_field_objects for name in names
+                if name not in save_error.saved_field_names
+            ]
+            raise XBlockSaveError(save_error.saved_field_names, dirty_fields)
+
+
+
+class MultiUserFieldDataCache(object):
+    """
+    A cache of django model objects needed to supply the data for a set
+    of modules to many users, such as all the students being graded or
+    rescored by a bulk operation.
+
+    The objects of all the users are fetched with a few chunked queries,
+    instead of the same queries once per user, into a FieldDataCache of
+    each user, which `for_user` returns.
+    """
+    # Users per query, small enough to leave room in each query for a
+    # chunk of usage ids without exceeding the sqlite3 parameter limit
+    USER_CHUNK_SIZE = 250
+
+    def __init__(self, descriptors, course_id, users, asides=None):
+        """
+        Arguments
+        descriptors: A list of XModuleDescriptors.
+        course_id: The id of the current course
+        users: The users for which to cache data
+        asides: The list of aside types to load, or None to prefetch no asides.
+        """
+        self.course_id = course_id
+        # Maps the ids of the users to their FieldDataCaches, which hold their objects and the
+        # objects in scopes shared by all users
+        self.user_caches = OrderedDict(
+            (user.id, FieldDataCache([], course_id, user, asides=asides))
+            for user in users if user.is_authenticated()
+        )
+        self.add_descriptors_to_cache(descriptors)
+
+    def add_descriptors_to_cache(self, descriptors):
+        """
+        Add all `descriptors` to the FieldDataCaches of the users.
+        """
+        if not self.user_caches:
+            return
+        # The FieldDataCaches of the users only differ by user, so any of them
+        # tells which objects to query and how they're cached.
+        field_data_cache = next(self.user_caches.itervalues())
+        shared_cache = {}
+        # pylint: disable=protected-access
+        for scope, fields in field_data_cache._fields_to_cache(descriptors).items():
+            for field_object in self._retrieve_fields(field_data_cache, scope, fields, descriptors):
+                cache_key = field_data_cache._cache_key_from_field_object(scope, field_object)
+                if scope.user == UserScope.ONE:
+                    self.user_caches[field_object.student_id].cache[cache_key] = field_object
+                else:
+                    shared_cache[cache_key] = field_object
+        for user_cache in self.user_caches.itervalues():
+            user_cache.cache.update(shared_cache)
+
+    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+        """
+        Add all descendents of `descriptor` to the FieldDataCaches of the users, like
+        FieldDataCache.add_descriptor_descendents.
+        """
+        self.add_descriptors_to_cache(_get_descriptor_descendents(descriptor, depth, descriptor_filter))
+
+    def for_user(self, user):
+        """
+        Return the FieldDataCache of `user`, one of the users of this cache.
+        """
+        return self.user_caches[user.id]
+
+    def _chunked_users_query(self, field_data_cache, model_class, chunk_field, items, **kwargs):
+        """
+        Queries model_class like `field_data_cache._chunked_query`, once per chunk of the users
+        """
+        return chain.from_iterable(
+            field_data_cache._chunked_query(  # pylint: disable=protected-access
+                model_class, chunk_field, items, student__in=user_ids, **kwargs
+            )
+            for user_ids in chunks(self.user_caches.keys(), self.USER_CHUNK_SIZE)
+        )
+
+    def _retrieve_fields(self, field_data_cache, scope, fields, descriptors):
+        """
+        Queries the database for all of the fields in the specified scope, for all the users,
+        like `field_data_cache._retrieve_fields` does for its user
+        """
+        # pylint: disable=protected-access
+        if scope == Scope.user_state:
+            return self._chunked_users_query(
+                field_data_cache,
+                StudentModule,
+                'module_state_key__in',
+                field_data_cache._all_usage_ids(descriptors),
+                course_id=self.course_id,
+            )
+        elif scope == Scope.preferences:
+            return self._chunked_users_query(
+                field_data_cache,
+                XModuleStudentPrefsField,
+                'module_type__in',
+                field_data_cache._all_block_types(descriptors),
+                field_name__in=set(field.name for field in fields),
+            )
+        elif scope == Scope.user_info:
+            return field_data_cache._chunked_query(
+                XModuleStudentInfoField,
+                'student__in',
+                self.user_caches.keys(),
+                field_name__in=set(field.name for field in fields),
+            )
+        else:
+            return field_data_cache._retrieve_fields(scope, fields, descriptors)
+
+
+def _save_field_objects(dirty_field_objects, bulk_create=False):
+    """
+    Save field objects, given as pairs of a field object and the names of the fields written to it.
+
+    If `bulk_create` is True, the new objects of each model other than StudentModule, which
+    needs its post_save signals, are inserted with a single query when there are several.
+
+    Raises KeyValueMultiSaveError with the names of the fields that were saved if a field
+    object can't be saved.
+    """
+    saved_fields = []
+    # Lists of field objects to save with a single query, each with the names of their fields
+    batches = []
+    new_field_objects = defaultdict(list)
+    for field_object, names in dirty_field_objects:
+        if bulk_create and field_object.pk is None and not isinstance(field_object, StudentModule):
+            new_field_objects[type(field_object)].append((field_object, names))
+        else:
+            batches.append([(field_object, names)])
+    batches.extend(new_field_objects.values())
+
+    for batch in batches:
+        names = list(chain.from_iterable(names for __, names in batch))
+        try:
+            if len(batch) == 1:
+                # Save the field object that we made above
+                field_object = batch[0][0]
+                field_object.save(force_update=field_object.pk is not None)
+            else:
+                field_objects = [field_object for field_object, __ in batch]
+                type(field_objects[0]).objects.bulk_create(field_objects)
+                _fetch_primary_keys(field_objects)
+            # If save is successful on this scope, add the saved fields to
+            # the list of successful saves
+            saved_fields.extend(names)
+        except DatabaseError:
+            log.exception('Error saving fields %r', names)
+            raise KeyValueMultiSaveError(saved_fields)
+
+
+def _fetch_primary_keys(field_objects):
+    """
+    Set the primary keys of `field_objects`, new objects of the same model which bulk_create
+    doesn't set, from the rows with the same unique fields, so that later writes update them.
+    """
+    model_class = type(field_objects[0])
+    fields = [model_class._meta.get_field(name) for name in model_class._meta.unique_together[0]]
+
+    def unique_values(values):
+        """The database values of the unique fields, from either field objects or rows"""
+        return tuple(field.get_prep_value(field.to_python(value)) for field, value in zip(fields, values))
+
+    field_objects_by_values = {
+        unique_values(getattr(field_object, field.attname) for field in fields): field_object
+        for field_object in field_objects
+    }
+    query = model_class.objects.filter(**{
+        field.name + '__in': set(getattr(field_object, field.attname) for field_object in field_objects)
+        for field in fields
+    })
+    for row in query.values_list('pk', *[field.name for field in fields]):
+        field_object = field_objects_by_values.get(unique_values(row[1:]))
+        if field_object is not None:
+            field_object.pk = row[0]
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -377,7 +630,6 @@ class DjangoKeyValueStore(KeyValueStore):
           xblock.KvsFieldData._key : value
 
         """
-        saved_fields = []
         # field_objects maps id(field_object) to a the object and a list of associated fields.
         # We use id() because FieldDataCache might return django models with no primary key
         # set, but will return the same django model each time the same key is passed in.
@@ -402,16 +654,7 @@ class DjangoKeyValueStore(KeyValueStore):
                 # we don't have to worry about conflicts
                 field_object.value = json.dumps(kv_dict[key])
 
-        for field_object, names in dirty_field_objects.values():
-            try:
-                # Save the field object that we made above
-                field_object.save(force_update=field_object.pk is not None)
-                # If save is successful on this scope, add the saved fields to
-                # the list of successful saves
-                saved_fields.extend(names)
-            except DatabaseError:
-                log.exception('Error saving fields %r', names)
-                raise KeyValueMultiSaveError(saved_fields)
+        self._field_data_cache.save_field_objects(dirty_field_objects.values())
 
     def delete(self, key):
         if key.scope not in self._allowed_scopes:
@@ -425,9 +668,12 @@ class DjangoKeyValueStore(KeyValueStore):
             state = json.loads(field_object.state)
             del state[key.field_name]
             field_object.state = json.dumps(state)
-            field_object.save(force_update=field_object.pk is not None)
+            self._field_data_cache.save_field_objects([(field_object, [key.field_name])])
         else:
-            field_object.delete()
+            self._field_data_cache.discard_writes(field_object)
+            # An object created while writes are buffered may not be saved yet
+            if field_object.pk is not None:
+                field_object.delete()
 
     def has(self, key):
         if key.scope not in self._allowed_scopes:
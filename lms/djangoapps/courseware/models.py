@@ -12,13 +12,15 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
+
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
+from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField, UsageKeyField
 
 
 class StudentModule(models.Model):
@@ -230,3 +232,155 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
+
+
+class PersistentCourseGrade(models.Model):
+    """
+    A student's course grade and progress summary, stored so that they don't
+    have to be recomputed from every problem in the course on each request.
+
+    The stored summaries are only valid for the course_version they were
+    computed against and the submissions API scores they were computed from
+    (recorded as submissions_digest), and until content is released after
+    they were computed (recorded as grade_computed and progress_computed).
+    Changes to a StudentModule grade delete the student's row, see
+    `invalidate_persisted_grades`.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    course_version = models.CharField(max_length=255, blank=True)
+    submissions_digest = models.CharField(max_length=40, blank=True)
+
+    grade_summary = models.TextField(null=True, blank=True)  # stored as JSON
+    grade_computed = models.DateTimeField(null=True, blank=True)
+    progress_summary = models.TextField(null=True, blank=True)  # stored as JSON
+    progress_computed = models.DateTimeField(null=True, blank=True)
+
+    modified = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def invalidate(cls, user_id, course_id):
+        """
+        Deletes the stored summaries of the given user in course_id.
+        """
+        cls.objects.filter(user_id=user_id, course_id=course_id).delete()
+
+    def __unicode__(self):
+        return u"[PersistentCourseGrade] {}: {} ({})".format(self.user_id, self.course_id, self.course_version)
+
+
+class PersistentSubsectionGrade(models.Model):
+    """
+    A student's scores on the problems of a graded subsection, stored so that
+    a course grade can be recomputed from the subsections that did change only.
+
+    `scores` holds the JSON list of (earned, possible, graded, display_name)
+    tuples of the subsection's problems, or null if the student never
+    attempted the subsection. `scored_blocks` holds the JSON list of the
+    usage keys of the blocks the scores depend on, so that a change to the
+    score of a block invalidates the grades of its subsection without
+    looking the block up in the modulestore.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = UsageKeyField(max_length=255)
+
+    course_version = models.CharField(max_length=255, blank=True)
+    submissions_digest = models.CharField(max_length=40, blank=True)
+
+    scores = models.TextField(null=True, blank=True)  # stored as JSON
+    scored_blocks = models.TextField(default='[]')  # stored as JSON
+
+    modified = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def invalidate(cls, user_id, course_id, block_key=None):
+        """
+        Deletes the stored scores of the given user in course_id, only those
+        of the subsections whose scores depend on the block with block_key if
+        one is given.
+        """
+        stored_grades = cls.objects.filter(user_id=user_id, course_id=course_id)
+        if block_key is not None:
+            stored_grades = stored_grades.filter(scored_blocks__contains=json.dumps(unicode(block_key)))
+        stored_grades.delete()
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} ({})".format(self.user_id, self.usage_key, self.course_version)
+
+
+# Module types whose StudentModules never carry a score.
+UNSCORED_MODULE_TYPES = frozenset(['course', 'chapter', 'sequential', 'vertical', 'video', 'html'])
+
+
+def persistent_grades_enabled():
+    """
+    Return whether computed grades are stored in and read back from
+    PersistentCourseGrade and PersistentSubsectionGrade.
+    """
+    # Randomly generated profiling scores must never be persisted.
+    return settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False) and not settings.GENERATE_PROFILE_SCORES
+
+
+def invalidate_persisted_grades(user_id, course_id, usage_key=None):
+    """
+    Deletes the persisted grades of the given user in course_id that depend
+    on the score of the block with usage_key, or all of them if no usage_key
+    is given.
+    """
+    PersistentCourseGrade.invalidate(user_id, course_id)
+    PersistentSubsectionGrade.invalidate(user_id, course_id, usage_key)
+
+
+@receiver(post_init, sender=StudentModule)
+def remember_student_module_grade(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Records the grade a StudentModule was loaded with, so that saving it only
+    invalidates persisted grades if the grade actually changed.
+    """
+    if not persistent_grades_enabled():
+        return
+    instance._loaded_grade = (instance.grade, instance.max_grade)  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_grades_on_save(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the student's persisted grades when a StudentModule grade changes.
+    """
+    if not persistent_grades_enabled():
+        return
+    loaded_grade = getattr(instance, '_loaded_grade', None)
+    current_grade = (instance.grade, instance.max_grade)
+    # A new StudentModule of a scored block changes how its subsection is
+    # graded even before it carries a grade.
+    newly_scorable = created and instance.module_type not in UNSCORED_MODULE_TYPES
+    if newly_scorable or loaded_grade != current_grade:
+        invalidate_persisted_grades(
+            instance.student_id,
+            instance.course_id,
+            instance.module_state_key.map_into_course(instance.course_id),
+        )
+    instance._loaded_grade = current_grade  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_grades_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the student's persisted grades when a StudentModule is deleted,
+    e.g. when an instructor resets a student's attempts.
+    """
+    if not persistent_grades_enabled() or instance.module_type in UNSCORED_MODULE_TYPES:
+        return
+    invalidate_persisted_grades(
+        instance.student_id,
+        instance.course_id,
+        instance.module_state_key.map_into_course(instance.course_id),
+    )
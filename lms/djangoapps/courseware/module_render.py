@@ -6,12 +6,14 @@ import hashlib
 import json
 import logging
 import mimetypes
+from datetime import datetime, timedelta
 
 import static_replace
 import xblock.reference.plugins
 
 from collections import OrderedDict
 from functools import partial
+from pytz import UTC
 from requests.auth import HTTPBasicAuth
 import dogstats_wrapper as dog_stats_api
 from opaque_keys import InvalidKeyError
@@ -27,7 +29,7 @@ from django.views.decorators.csrf import csrf_exempt
 
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
-from courseware.masquerade import setup_masquerade
+from courseware.masquerade import is_masquerading_as_student, setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
@@ -103,7 +105,7 @@ def make_track_function(request):
     return function
 
 
-def toc_for_course(request, course, active_chapter, active_section, field_data_cache):
+def toc_for_course(request, course, active_chapter, active_section, field_data_cache=None):
     '''
     Create a table of contents from the module store
 
@@ -124,49 +126,185 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     NOTE: assumes that if we got this far, user has access to course.  Returns
     None if this is not the case.
 
-    field_data_cache must include data from the course module and 2 levels of its descendents
+    The chapters and sections visible to the user are cached, see get_cached_course_outline.
+    field_data_cache is only used to build the outline if it isn't cached, and must then include
+    data from the course module and 2 levels of its descendents. If it is None, it is built then.
     '''
 
-    with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
-        if course_module is None:
+    outline = get_cached_course_outline(request, course)
+    if outline is None:
+        with modulestore().bulk_operations(course.id):
+            version = modulestore().get_course_published_version(course.id)
+            if field_data_cache is None:
+                field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                    course.id, request.user, course, depth=2
+                )
+            outline = _course_outline(request, course, field_data_cache)
+        if outline is None:
             return None
+        cache_course_outline(request, course, outline, version)
+
+    # Check to see if the course is gated on milestone-required content (such as an Entrance Exam)
+    required_content = milestones_helpers.get_required_content(course, request.user)
+
+    chapters = list()
+    for chapter in outline['chapters']:
+        # Only show required content, if there is required content
+        if required_content and chapter['location'] not in required_content:
+            continue
+
+        sections = list()
+        for section in chapter['sections']:
+            active = (chapter['url_name'] == active_chapter and
+                      section['url_name'] == active_section)
+            sections.append(dict(section, active=active))
+        chapters.append({'display_name': chapter['display_name'],
+                         'url_name': chapter['url_name'],
+                         'sections': sections,
+                         'active': chapter['url_name'] == active_chapter})
+    return chapters
+
+
+def _course_outline(request, course, field_data_cache):
+    """
+    Return the outline of `course` visible to the user of `request`, as cached by
+    cache_course_outline, or None if the user can't access the course.
+    """
+    course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
+    if course_module is None:
+        return None
+
+    chapters = list()
+    for chapter in course_module.get_display_items():
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc:
+            continue
+
+        sections = list()
+        for section in chapter.get_display_items():
+            if not section.hide_from_toc:
+                sections.append({'display_name': section.display_name_with_default,
+                                 'url_name': section.url_name,
+                                 'format': section.format if section.format is not None else '',
+                                 'due': get_extended_due_date(section),
+                                 'graded': section.graded,
+                                 })
+        chapters.append({'display_name': chapter.display_name_with_default,
+                         'url_name': chapter.url_name,
+                         'location': unicode(chapter.location),
+                         'sections': sections})
+    return {'chapters': chapters}
+
+
+def _course_outline_cache_key(course_key, user_id):
+    """
+    Return the key of the cached course outline of a user.
+    """
+    return u'courseware.course_outline.{}.{}'.format(course_key, user_id)
+
+
+def _outline_descriptors(course):
+    """
+    Yield the chapters and sections of `course`.
+    """
+    for chapter in course.get_children():
+        yield chapter
+        for section in chapter.get_children():
+            yield section
+
+
+def _outline_partition_ids(course):
+    """
+    Return the ids of the user partitions restricting access to chapters and sections of `course`.
+    """
+    partition_ids = set()
+    for descriptor in _outline_descriptors(course):
+        partition_ids.update(descriptor.group_access)
+    return sorted(partition_ids)
+
+
+def _outline_groups(user, course, partition_ids):
+    """
+    Return the groups of `user` in the user partitions of `course` with the given ids.
+    """
+    partitions = dict((partition.id, partition) for partition in course.user_partitions)
+    groups = []
+    for partition_id in partition_ids:
+        partition = partitions.get(partition_id)
+        if partition is not None:
+            group = partition.scheme.get_group_for_user(course.id, user, partition)
+            groups.append((partition_id, group.id if group is not None else None))
+    return groups
+
+
+def _next_release(course):
+    """
+    Return when the next chapter or section of `course` is released, or None if they all are.
+    """
+    now = datetime.now(UTC)
+    releases = []
+    for descriptor in _outline_descriptors(course):
+        start = descriptor.start
+        if start is None:
+            continue
+        if descriptor.days_early_for_beta is not None:
+            start -= timedelta(days=descriptor.days_early_for_beta)
+        if start > now:
+            releases.append(start)
+    return min(releases) if releases else None
+
+
+def get_cached_course_outline(request, course):
+    """
+    Return the cached outline of `course` visible to the user of `request`, or None if it
+    isn't cached, or if it was cached for another version of the course, other groups of the
+    user, or before the release of one of its chapters or sections.
+
+    Only the groups of the user in the partitions the cached outline depends on are looked up.
 
-        # Check to see if the course is gated on milestone-required content (such as an Entrance Exam)
-        required_content = milestones_helpers.get_required_content(course, request.user)
-
-        chapters = list()
-        for chapter in course_module.get_display_items():
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (boo)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
-                continue
-
-            sections = list()
-            for section in chapter.get_display_items():
-
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
-
-                if not section.hide_from_toc:
-                    sections.append({'display_name': section.display_name_with_default,
-                                     'url_name': section.url_name,
-                                     'format': section.format if section.format is not None else '',
-                                     'due': get_extended_due_date(section),
-                                     'active': active,
-                                     'graded': section.graded,
-                                     })
-            chapters.append({'display_name': chapter.display_name_with_default,
-                             'url_name': chapter.url_name,
-                             'sections': sections,
-                             'active': chapter.url_name == active_chapter})
-        return chapters
+    Staff masquerading as students don't get cached outlines.
+    """
+    user = request.user
+    if not user.is_authenticated() or is_masquerading_as_student(user, course.id):
+        return None
+
+    outline = cache.get(_course_outline_cache_key(course.id, user.id))
+    if outline is None:
+        return None
+    if outline['next_release'] is not None and outline['next_release'] <= datetime.now(UTC):
+        return None
+    if outline['version'] != modulestore().get_course_published_version(course.id):
+        return None
+    if outline['groups'] != _outline_groups(user, course, outline['partition_ids']):
+        return None
+    return outline
+
+
+def cache_course_outline(request, course, outline, version):
+    """
+    Cache the outline of `course` visible to the user of `request`, which was built from the
+    published `version` of the course.
+    """
+    user = request.user
+    if not user.is_authenticated() or is_masquerading_as_student(user, course.id):
+        return
+
+    partition_ids = _outline_partition_ids(course)
+    outline = dict(
+        outline,
+        version=version,
+        partition_ids=partition_ids,
+        groups=_outline_groups(user, course, partition_ids),
+        next_release=_next_release(course),
+    )
+    cache.set(_course_outline_cache_key(course.id, user.id), outline, settings.COURSE_OUTLINE_CACHE_TIMEOUT)
+
+
+def invalidate_course_outline(course_key, user_id):
+    """
+    Remove the cached outline of a course of a user, such as when their due dates are extended.
+    """
+    cache.delete(_course_outline_cache_key(course_key, user_id))
 
 
 def get_module(user, request, usage_key, field_data_cache,
@@ -420,8 +558,9 @@ def get_module_system_for_user(user, field_data_cache,
         # Update the grades
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
-        # Save all changes to the underlying KeyValueStore
-        student_module.save()
+        # Save all changes to the underlying KeyValueStore, along with the
+        # state of the module when writes are buffered
+        field_data_cache.save_field_objects([(student_module, [])])
 
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
@@ -441,6 +580,8 @@ def get_module_system_for_user(user, field_data_cache,
         # through the fulfillment scenarios to see if any are now applicable
         # thanks to the updated grading information that was just submitted
         if settings.FEATURES.get('MILESTONES_APP', False):
+            # The entrance exam score is computed from the saved grades
+            field_data_cache.flush_writes()
             _fulfill_content_milestones(
                 user,
                 course_id,
@@ -802,7 +943,7 @@ def _get_module_by_usage_id(request, course_id, usage_id):
     """
     Gets a module instance based on its `usage_id` in a course, for a given request/user
 
-    Returns (instance, tracking_context)
+    Returns (instance, tracking_context, field_data_cache)
     """
     user = request.user
 
@@ -849,7 +990,7 @@ def _get_module_by_usage_id(request, course_id, usage_id):
         log.debug("No module %s for user %s -- access denied?", usage_key, user)
         raise Http404
 
-    return (instance, tracking_context)
+    return (instance, tracking_context, field_data_cache)
 
 
 def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix):
@@ -870,13 +1011,15 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix):
     if error_msg:
         return JsonResponse(object={'success': error_msg}, status=413)
 
-    instance, tracking_context = _get_module_by_usage_id(request, course_id, usage_id)
+    instance, tracking_context, field_data_cache = _get_module_by_usage_id(request, course_id, usage_id)
 
     tracking_context_name = 'module_callback_handler'
     req = django_to_webob_request(request)
     try:
         with tracker.get_tracker().context(tracking_context_name, tracking_context):
-            resp = instance.handle(handler, req, suffix)
+            # Save the fields written by the handler once it returns
+            with field_data_cache.buffer_writes():
+                resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
         log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
@@ -928,7 +1071,7 @@ def xblock_view(request, course_id, usage_id, view_name):
     if not request.user.is_authenticated():
         raise PermissionDenied
 
-    instance, _ = _get_module_by_usage_id(request, course_id, usage_id)
+    instance, __, __ = _get_module_by_usage_id(request, course_id, usage_id)
 
     try:
         fragment = instance.render(view_name, context=request.GET)
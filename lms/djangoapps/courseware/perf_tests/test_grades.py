@@ -0,0 +1,67 @@
+"""
+Performance test for grading the students of a course.
+"""
+import unittest
+
+from nose.plugins.skip import SkipTest
+
+from courseware.grades import iterate_grades_for
+from courseware.tests.factories import StudentModuleFactory
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class GradeIterationPerformanceTest(ModuleStoreTestCase):
+    """
+    This class exists to time grading a course one student at a time and
+    in batches.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_STUDENTS = 200
+    NUM_PROBLEMS = 20
+
+    def setUp(self):
+        super(GradeIterationPerformanceTest, self).setUp()
+
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        homework = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        problems = [ItemFactory.create(parent=homework, category='problem') for __ in range(self.NUM_PROBLEMS)]
+        self.students = [UserFactory.create() for __ in range(self.NUM_STUDENTS)]
+        for student in self.students:
+            for problem in problems:
+                StudentModuleFactory.create(
+                    student=student,
+                    course_id=self.course.id,
+                    module_state_key=problem.location,
+                    grade=1,
+                    max_grade=1,
+                )
+
+    def test_generate_grading_timings(self):
+        """
+        Generate timings for grading all students with and without batching.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        for batched in (False, True):
+            desc = "GradeIteration:{}:{}".format("batched" if batched else "per_student", self.NUM_STUDENTS)
+            with CodeBlockTimer(desc):
+                for __ in iterate_grades_for(self.course.id, self.students, batched=batched):
+                    pass
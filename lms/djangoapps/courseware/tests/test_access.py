@@ -8,8 +8,9 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 import courseware.access as access
 from courseware.masquerade import CourseMasquerade
-from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from courseware.tests.factories import BetaTesterFactory, UserFactory, StaffFactory, InstructorFactory
 from courseware.tests.helpers import LoginEnrollmentTestCase
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory, CourseEnrollmentFactory
 from xmodule.course_module import (
     CATALOG_VISIBILITY_CATALOG_AND_ABOUT, CATALOG_VISIBILITY_ABOUT,
@@ -283,6 +284,33 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         fulfill_course_milestone(pre_requisite_course.id, user)
         self.assertTrue(access._has_access_course_desc(user, 'view_courseware_with_prerequisites', course))
 
+    @patch.dict("django.conf.settings.FEATURES", {'DISABLE_START_DATES': False})
+    def test__has_access_course_overview(self):
+        tomorrow = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+        courses = [
+            CourseFactory.create(start=tomorrow, days_early_for_beta=2),
+            CourseFactory.create(visible_to_staff_only=True),
+            CourseFactory.create(),
+        ]
+        for course in courses:
+            overview = CourseOverview.get_from_id(course.id)
+            users = [
+                UserFactory.create(),
+                StaffFactory.create(course_key=course.id),
+                BetaTesterFactory.create(course_key=course.id),
+                self.global_staff,
+                self.anonymous_user,
+            ]
+            for user in users:
+                # The access of the overviews is checked without loading the courses
+                with patch.object(access, 'modulestore') as mock_modulestore:
+                    for action in ('load', 'view_courseware_with_prerequisites', 'staff'):
+                        self.assertEqual(
+                            access.has_access(user, action, overview),
+                            access.has_access(user, action, course),
+                        )
+                self.assertFalse(mock_modulestore.called)
+
     @patch.dict("django.conf.settings.FEATURES", {'ENABLE_PREREQUISITE_COURSES': True, 'MILESTONES_APP': True})
     def test_courseware_page_unfulfilled_prereqs(self):
         """
@@ -1,14 +1,27 @@
 """
 Test grade calculation.
 """
+import ddt
+from django.conf import settings
 from django.http import Http404
+from django.test.client import RequestFactory
 from mock import patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from stevedore.extension import Extension, ExtensionManager
 
+from capa.tests.response_xml_factory import OptionResponseXMLFactory
+from courseware import grades
 from courseware.grades import grade, iterate_grades_for
+from courseware.models import PersistentCourseGrade, PersistentSubsectionGrade, StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from courseware.tests.test_group_access import MemoryUserPartitionScheme
+from student.models import anonymous_id_for_user
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from submissions import api as sub_api
+from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.partitions.partitions import Group, UserPartition, USER_PARTITION_SCHEME_NAMESPACE
 
 
 def _grade_with_errors(student, request, course, keep_raw_scores=False):
@@ -104,8 +117,17 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_batched_empty_grades(self):
+        """Batched grading gives the same results when no student has grade entries"""
+        all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students, batched=True)
+        self.assertEqual(len(all_errors), 0)
+        self.assertEqual(len(all_gradesets), 5)
+        for gradeset in all_gradesets.values():
+            self.assertIsNone(gradeset['grade'])
+            self.assertEqual(gradeset['percent'], 0.0)
+
     ################################# Helpers #################################
-    def _gradesets_and_errors_for(self, course_id, students):
+    def _gradesets_and_errors_for(self, course_id, students, batched=False):
         """Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
         gradesets, and one that has only students that could not be graded and
@@ -113,9 +135,261 @@ class TestGradeIteration(ModuleStoreTestCase):
         students_to_gradesets = {}
         students_to_errors = {}
 
-        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, batched=batched):
             students_to_gradesets[student] = gradeset
             if err_msg:
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+class TestBatchedGradeIteration(ModuleStoreTestCase):
+    """
+    Test that grading students in batches matches grading them one at a time.
+    """
+    def setUp(self):
+        super(TestBatchedGradeIteration, self).setUp()
+
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        homework = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        self.problems = [
+            ItemFactory.create(parent=homework, category='problem', display_name='p{}'.format(index))
+            for index in range(2)
+        ]
+        self.students = [UserFactory.create() for __ in range(4)]
+
+        # student0 answered everything, student1 answered one problem, the others nothing.
+        for problem in self.problems:
+            self._set_score(self.students[0], problem, 1, 1)
+        self._set_score(self.students[1], self.problems[0], 0, 1)
+
+    def _set_score(self, student, problem, grade_value, max_grade):
+        """Store a score for `student` on `problem`"""
+        StudentModuleFactory.create(
+            student=student,
+            course_id=self.course.id,
+            module_state_key=problem.location,
+            grade=grade_value,
+            max_grade=max_grade,
+        )
+
+    def _gradesets(self, batched):
+        """Return a dict of student -> gradeset"""
+        return {
+            student: gradeset
+            for student, gradeset, __ in iterate_grades_for(self.course.id, self.students, batched=batched)
+        }
+
+    def test_batched_matches_unbatched(self):
+        unbatched = self._gradesets(batched=False)
+        batched = self._gradesets(batched=True)
+
+        self.assertEqual(len(batched), len(self.students))
+        for student in self.students:
+            self.assertEqual(batched[student]['percent'], unbatched[student]['percent'])
+            self.assertEqual(batched[student]['grade'], unbatched[student]['grade'])
+            self.assertEqual(
+                batched[student]['section_breakdown'],
+                unbatched[student]['section_breakdown'],
+            )
+
+    def test_batched_scores(self):
+        gradesets = self._gradesets(batched=True)
+        self.assertEqual(gradesets[self.students[0]]['percent'], 1.0)
+        self.assertEqual(gradesets[self.students[1]]['percent'], 0.0)
+        self.assertEqual(gradesets[self.students[3]]['percent'], 0.0)
+
+    def test_batched_submissions_scores(self):
+        # student2 is scored by the submissions API only.
+        student_item = {
+            'student_id': anonymous_id_for_user(self.students[2], self.course.id),
+            'course_id': self.course.id.to_deprecated_string(),
+            'item_id': self.problems[1].location.to_deprecated_string(),
+            'item_type': 'problem',
+        }
+        submission = sub_api.create_submission(student_item, 'any answer')
+        sub_api.set_score(submission['uuid'], 1, 1)
+
+        unbatched = self._gradesets(batched=False)
+        with patch('courseware.grades.sub_api.get_scores') as mock_get_scores:
+            batched = self._gradesets(batched=True)
+        self.assertFalse(mock_get_scores.called)
+        self.assertGreater(batched[self.students[2]]['percent'], 0)
+        for student in self.students:
+            self.assertEqual(batched[student]['percent'], unbatched[student]['percent'])
+
+    @patch('courseware.grades.GRADING_BATCH_SIZE', 3)
+    def test_batched_chunks(self):
+        gradesets = self._gradesets(batched=True)
+        self.assertEqual(len(gradesets), len(self.students))
+        self.assertEqual(gradesets[self.students[0]]['percent'], 1.0)
+
+
+@ddt.ddt
+class TestGradeGroupAccess(ModuleStoreTestCase):
+    """
+    Test that problems restricted to groups only count for the students in them,
+    whether their max scores are shared between students or not.
+    """
+    def setUp(self):
+        super(TestGradeGroupAccess, self).setUp()
+
+        UserPartition.scheme_extensions = ExtensionManager.make_test_instance(
+            [Extension("memory", USER_PARTITION_SCHEME_NAMESPACE, MemoryUserPartitionScheme(), None)],
+            namespace=USER_PARTITION_SCHEME_NAMESPACE
+        )
+        cat_group = Group(10, 'cats')
+        partition = UserPartition(
+            0, 'Pet Partition', 'which animal are you?', [cat_group, Group(20, 'dogs')],
+            scheme=UserPartition.get_scheme("memory"),
+        )
+        self.course = CourseFactory.create(user_partitions=[partition])
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        homework = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        problem_xml = OptionResponseXMLFactory().build_xml(
+            question_text='The correct answer is Correct',
+            num_inputs=1,
+            options=['Correct', 'Incorrect'],
+            correct_option='Correct'
+        )
+        ItemFactory.create(parent=homework, category='problem', display_name='open', data=problem_xml)
+        ItemFactory.create(
+            parent=homework, category='problem', display_name='cats', data=problem_xml, group_access={0: [10]}
+        )
+
+        # Neither student has state for the problems, and the cat is graded first,
+        # so the max score of the restricted problem is known by the time the dog is graded.
+        self.cat = UserFactory.create()
+        self.dog = UserFactory.create()
+        partition.scheme.set_group_for_user(self.cat, partition, cat_group)
+
+    @ddt.data(True, False)
+    def test_restricted_problem(self, batched):
+        gradesets = {
+            student: gradeset
+            for student, gradeset, __ in iterate_grades_for(self.course.id, [self.cat, self.dog], batched=batched)
+        }
+        self.assertEqual(gradesets[self.cat]['totaled_scores']['Homework'][0].possible, 2)
+        self.assertEqual(gradesets[self.dog]['totaled_scores']['Homework'][0].possible, 1)
+
+
+@patch.dict(settings.FEATURES, {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentGrades(ModuleStoreTestCase):
+    """
+    Test that grades are persisted and recomputed when scores change.
+    """
+    def setUp(self):
+        super(TestPersistentGrades, self).setUp()
+
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.homework = ItemFactory.create(parent=self.chapter, category='sequential', graded=True, format='Homework')
+        self.problem = ItemFactory.create(parent=self.homework, category='problem')
+        self.student = UserFactory.create()
+        self.student_module = StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=1,
+            max_grade=2,
+        )
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _grade(self, **kwargs):
+        """Grade the student in the course"""
+        course = self.store.get_course(self.course.id)
+        return grade(self.student, self.request, course, **kwargs)
+
+    def test_grades_are_persisted(self):
+        self.assertEqual(self._grade()['percent'], 0.5)
+        self.assertEqual(PersistentCourseGrade.objects.filter(user=self.student).count(), 1)
+        subsection_grade = PersistentSubsectionGrade.objects.get(user=self.student)
+        self.assertEqual(subsection_grade.usage_key, self.homework.location)
+
+        with patch('courseware.grades.get_score') as mock_get_score:
+            gradeset = self._grade()
+        self.assertFalse(mock_get_score.called)
+        self.assertEqual(gradeset['percent'], 0.5)
+        self.assertEqual(gradeset['totaled_scores']['Homework'][0].earned, 1)
+
+    def test_score_change_invalidates(self):
+        self._grade()
+        student_module = StudentModule.objects.get(pk=self.student_module.pk)
+        student_module.grade = 2
+        student_module.save()
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student).exists())
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(user=self.student).exists())
+        self.assertEqual(self._grade()['percent'], 1.0)
+
+    def test_score_change_invalidates_its_subsection(self):
+        other_homework = ItemFactory.create(parent=self.chapter, category='sequential', graded=True, format='Homework')
+        ItemFactory.create(parent=other_homework, category='problem')
+        self._grade()
+        self.assertEqual(PersistentSubsectionGrade.objects.filter(user=self.student).count(), 2)
+
+        student_module = StudentModule.objects.get(pk=self.student_module.pk)
+        student_module.grade = 2
+        student_module.save()
+        subsection_grades = PersistentSubsectionGrade.objects.filter(user=self.student)
+        self.assertEqual([grade_row.usage_key for grade_row in subsection_grades], [other_homework.location])
+
+    def test_release_invalidates_grade_summary(self):
+        self._grade()
+        # The grade summary is computed again from the subsection grades.
+        with patch('courseware.grades._released_since', return_value=True):
+            with patch('courseware.grades.grade_for_percentage', wraps=grades.grade_for_percentage) as mock_grade:
+                self.assertEqual(self._grade()['percent'], 0.5)
+        self.assertTrue(mock_grade.called)
+
+    def test_staff_grades_not_persisted(self):
+        self.student.is_staff = True
+        self.student.save()
+        self._grade()
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student).exists())
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(user=self.student).exists())
+
+    def test_state_change_keeps_grades(self):
+        self._grade()
+        student_module = StudentModule.objects.get(pk=self.student_module.pk)
+        student_module.state = '{"position": 2}'
+        student_module.save()
+        self.assertTrue(PersistentCourseGrade.objects.filter(user=self.student).exists())
+
+    def test_force_recompute(self):
+        self._grade()
+        # Change the score behind the back of the invalidation signals.
+        StudentModule.objects.filter(pk=self.student_module.pk).update(grade=2)
+        self.assertEqual(self._grade()['percent'], 0.5)
+        self.assertEqual(self._grade(force_recompute=True)['percent'], 1.0)
+
+    def test_new_course_version(self):
+        self._grade()
+        StudentModule.objects.filter(pk=self.student_module.pk).update(grade=2)
+        with patch.object(MixedModuleStore, 'get_course_published_version', return_value=u'republished'):
+            self.assertEqual(self._grade()['percent'], 1.0)
+
+    def test_raw_scores_from_subsection_grades(self):
+        self._grade()
+        with patch('courseware.grades.get_score') as mock_get_score:
+            gradeset = self._grade(keep_raw_scores=True)
+        self.assertFalse(mock_get_score.called)
+        self.assertEqual([score.earned for score in gradeset['raw_scores']], [1])
+
+    @patch.dict(settings.FEATURES, {'ENABLE_PERSISTENT_GRADES': False})
+    def test_disabled(self):
+        self._grade()
+        self.assertFalse(grades.persistent_grades_enabled())
+        self.assertFalse(PersistentCourseGrade.objects.exists())
+
+    @patch.dict(settings.FEATURES, {'ENABLE_PERSISTENT_GRADES': False})
+    def test_disabled_skips_invalidation(self):
+        student_module = StudentModule.objects.get(pk=self.student_module.pk)
+        student_module.grade = 2
+        with patch('courseware.models.invalidate_persisted_grades') as mock_invalidate:
+            student_module.save()
+            student_module.delete()
+        self.assertFalse(mock_invalidate.called)
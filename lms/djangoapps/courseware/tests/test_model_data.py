@@ -6,7 +6,7 @@ from mock import Mock, patch
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
+from courseware.model_data import InvalidScopeError, FieldDataCache, MultiUserFieldDataCache
 from courseware.models import StudentModule
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -16,7 +16,7 @@ from courseware.tests.factories import UserStateSummaryFactory
 from courseware.tests.factories import StudentPrefsFactory, StudentInfoFactory
 
 from xblock.fields import Scope, BlockScope, ScopeIds
-from xblock.exceptions import KeyValueMultiSaveError
+from xblock.exceptions import KeyValueMultiSaveError, XBlockSaveError
 from xblock.core import XBlock
 from django.test import TestCase
 from django.db import DatabaseError
@@ -397,3 +397,135 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestBufferedWrites(TestCase):
+    """Tests for the writes buffered by FieldDataCache.buffer_writes"""
+    def setUp(self):
+        super(TestBufferedWrites, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+        self.field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field'), mock_field(Scope.user_info, 'info_field')])],
+            course_id,
+            self.user
+        )
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_combine_writes_to_row(self):
+        # A single update of courseware_studentmodule, and its history
+        with self.assertNumQueries(2):
+            with self.field_data_cache.buffer_writes():
+                with self.assertNumQueries(0):
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    self.kvs.set_many({user_state_key('b_field'): 'b_value'})
+                    self.kvs.delete(user_state_key('a_field'))
+        self.assertEquals({'b_field': 'b_value'}, json.loads(StudentModule.objects.get().state))
+
+    def test_insert_new_rows_together(self):
+        # One insert, and one query for the ids of the new rows
+        with self.assertNumQueries(2):
+            with self.field_data_cache.buffer_writes():
+                self.kvs.set_many({user_info_key('info_field'): 'info', user_info_key('other_field'): 'other'})
+        self.assertEquals(2, XModuleStudentInfoField.objects.count())
+
+        # The new rows are updated by later writes
+        with self.assertNumQueries(1):
+            self.kvs.set(user_info_key('info_field'), 'new_info')
+        self.assertEquals(2, XModuleStudentInfoField.objects.count())
+        self.assertEquals(
+            json.dumps('new_info'),
+            XModuleStudentInfoField.objects.get(field_name='info_field').value
+        )
+
+    def test_delete_unsaved_row(self):
+        with self.assertNumQueries(0):
+            with self.field_data_cache.buffer_writes():
+                self.kvs.set(user_info_key('info_field'), 'info')
+                self.kvs.delete(user_info_key('info_field'))
+        self.assertEquals(0, XModuleStudentInfoField.objects.count())
+
+    def test_flush_failure(self):
+        with patch('django.db.models.Model.save', side_effect=[None, DatabaseError]):
+            with self.assertRaises(XBlockSaveError) as exception_context:
+                with self.field_data_cache.buffer_writes():
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    self.kvs.set(user_info_key('info_field'), 'info')
+        self.assertEquals(exception_context.exception.saved_fields, ['a_field'])
+        self.assertEquals(exception_context.exception.dirty_fields, ['info_field'])
+
+    def test_save_field_objects_failure(self):
+        with patch(
+            'courseware.model_data._save_field_objects', side_effect=KeyValueMultiSaveError(['a_field'])
+        ) as save_field_objects:
+            with self.assertRaises(XBlockSaveError) as exception_context:
+                with self.field_data_cache.buffer_writes():
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    self.kvs.set(user_info_key('info_field'), 'info')
+        self.assertEquals(save_field_objects.call_count, 1)
+        self.assertEquals(exception_context.exception.saved_fields, ['a_field'])
+        self.assertEquals(exception_context.exception.dirty_fields, ['info_field'])
+
+        # The buffer is gone, later writes are saved right away
+        with self.assertNumQueries(1):
+            self.kvs.set(user_info_key('info_field'), 'info')
+
+    def test_writes_dropped_on_error(self):
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValueError):
+                with self.field_data_cache.buffer_writes():
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    raise ValueError
+        self.assertEquals({'a_field': 'a_value'}, json.loads(StudentModule.objects.get().state))
+
+
+class TestMultiUserFieldDataCache(TestCase):
+    """Tests for MultiUserFieldDataCache"""
+    def setUp(self):
+        super(TestMultiUserFieldDataCache, self).setUp()
+        self.users = [UserFactory.create() for __ in range(3)]
+        for index, user in enumerate(self.users[:2]):
+            StudentModuleFactory(student=user, state=json.dumps({'a_field': index}))
+            StudentPrefsFactory(student=user, value=json.dumps(index))
+            StudentInfoFactory(student=user, value=json.dumps(index))
+        UserStateSummaryFactory()
+
+        self.mock_descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.user_state_summary, 'existing_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.user_info, 'existing_field'),
+        ])
+
+    def test_queries_for_all_users(self):
+        # One query per scope, whatever the number of users
+        with self.assertNumQueries(4):
+            field_data_cache = MultiUserFieldDataCache([self.mock_descriptor], course_id, self.users)
+
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users[:2]):
+                kvs = DjangoKeyValueStore(field_data_cache.for_user(user))
+                usage_id = location('usage_id')
+                state_key = DjangoKeyValueStore.Key(Scope.user_state, user.id, usage_id, 'a_field')
+                self.assertEquals(index, kvs.get(state_key))
+                prefs_key = DjangoKeyValueStore.Key(Scope.preferences, user.id, 'mock_problem', 'existing_field')
+                self.assertEquals(index, kvs.get(prefs_key))
+                info_key = DjangoKeyValueStore.Key(Scope.user_info, user.id, None, 'existing_field')
+                self.assertEquals(index, kvs.get(info_key))
+                summary_key = DjangoKeyValueStore.Key(Scope.user_state_summary, None, usage_id, 'existing_field')
+                self.assertEquals('old_value', kvs.get(summary_key))
+
+    def test_user_without_data(self):
+        field_data_cache = MultiUserFieldDataCache([self.mock_descriptor], course_id, self.users)
+        user = self.users[2]
+        user_field_data_cache = field_data_cache.for_user(user)
+        self.assertIsInstance(user_field_data_cache, FieldDataCache)
+        kvs = DjangoKeyValueStore(user_field_data_cache)
+        state_key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+        with self.assertNumQueries(0):
+            self.assertFalse(kvs.has(state_key))
+
+        # The data of the user is written like with a FieldDataCache of the user
+        kvs.set(state_key, 2)
+        self.assertEquals(json.loads(StudentModule.objects.get(student=user).state), {'a_field': 2})
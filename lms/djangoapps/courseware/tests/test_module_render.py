@@ -458,11 +458,12 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
+    # Mongo makes 1 query to render the toc, to read the published version of the course.
     # Split makes 6 queries to render the toc:
     #     - it loads the active version at the start of the bulk operation
     #     - it loads 5 definitions, because it instantiates the a CourseModule and 4 VideoModules
     #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 6))
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 1), (ModuleStoreEnum.Type.split, 6, 0, 6))
     @ddt.unpack
     def test_toc_toy_from_chapter(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -496,11 +497,12 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 2 queries to render the toc:
+    # Mongo makes 1 query to render the toc, to read the published version of the course.
+    # Split makes 6 queries to render the toc:
     #     - it loads the active version at the start of the bulk operation
     #     - it loads 5 definitions, because it instantiates the a CourseModule and 4 VideoModules
     #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 6))
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 1), (ModuleStoreEnum.Type.split, 6, 0, 6))
     @ddt.unpack
     def test_toc_toy_from_section(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -528,6 +530,33 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_toc_from_cache(self, default_ms):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, 3 if default_ms == ModuleStoreEnum.Type.mongo else 6, 0)
+            render.toc_for_course(self.request, self.toy_course, self.chapter, None)
+
+            # The outline is cached, only the active flags change. Only the published version
+            # of the course is read, and no field data is loaded.
+            with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+                with patch('courseware.module_render.FieldDataCache') as mock_field_data_cache:
+                    with patch('courseware.module_render._outline_groups', return_value=[]) as mock_groups:
+                        with check_mongo_calls(1):
+                            toc = render.toc_for_course(self.request, self.toy_course, self.chapter, 'Welcome')
+            self.assertFalse(mock_get_module.called)
+            self.assertFalse(mock_field_data_cache.cache_for_descriptor_descendents.called)
+            # The toy course has no group restricted chapters or sections
+            mock_groups.assert_called_once_with(self.request.user, self.toy_course, [])
+            overview = [chapter for chapter in toc if chapter['url_name'] == self.chapter][0]
+            self.assertTrue(overview['active'])
+            self.assertEqual(
+                [section['url_name'] for section in overview['sections'] if section['active']], ['Welcome']
+            )
+
+            # Due date extensions invalidate the cached outline
+            render.invalidate_course_outline(self.toy_course.id, self.request.user.id)
+            self.assertIsNone(render.get_cached_course_outline(self.request, self.toy_course))
+
 
 @ddt.ddt
 class TestHtmlModifiers(ModuleStoreTestCase):
@@ -276,7 +276,6 @@ def single_thread(request, course_key, discussion_id, thread_id):
     course = get_course_with_access(request.user, 'load_forum', course_key)
     course_settings = make_course_settings(course, request.user)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
     is_moderator = cached_has_permission(request.user, "see_all_cohorts", course_key)
 
     # Verify that the student has access to this thread if belongs to a discussion module
@@ -286,17 +285,23 @@ def single_thread(request, course_key, discussion_id, thread_id):
     # Currently, the front end always loads responses via AJAX, even for this
     # page; it would be a nice optimization to avoid that extra round trip to
     # the comments service.
+    thread = cc.Thread.find(thread_id)
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
-            recursive=request.is_ajax(),
-            user_id=request.user.id,
-            response_skip=request.GET.get("resp_skip"),
-            response_limit=request.GET.get("resp_limit")
-        )
+        # The user and the thread are independent, so they are retrieved concurrently
+        cc.utils.perform_concurrently([
+            cc_user.retrieve,
+            lambda: thread.retrieve(
+                recursive=request.is_ajax(),
+                user_id=request.user.id,
+                response_skip=request.GET.get("resp_skip"),
+                response_limit=request.GET.get("resp_limit")
+            ),
+        ])
     except cc.utils.CommentClientRequestError as e:
         if e.status_code == 404:
             raise Http404
         raise
+    user_info = cc_user.to_dict()
 
     # verify that the thread belongs to the requesting student's cohort
     if is_commentable_cohorted(course_key, discussion_id) and not is_moderator:
@@ -393,10 +398,15 @@ def user_profile(request, course_key, user_id):
         else:
             profiled_user = cc.User(id=user_id, course_id=course_key)
 
-        threads, page, num_pages = profiled_user.active_threads(query_params)
+        cc_user = cc.User.from_django_user(request.user)
+        # The threads and the user are independent, so they are retrieved concurrently
+        (threads, page, num_pages), __ = cc.utils.perform_concurrently([
+            lambda: profiled_user.active_threads(query_params),
+            cc_user.retrieve,
+        ])
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
+        user_info = cc_user.to_dict()
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_key, threads, request.user, user_info)
@@ -1 +1,5 @@
-# This file is intentionally blank. It has been moved to common/djangoapps/django_comment_common
+# The models of the forum have been moved to common/djangoapps/django_comment_common
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
@@ -0,0 +1,104 @@
+"""
+Performance test for the requests of the comments service client.
+"""
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+import json
+from SocketServer import ThreadingMixIn
+import threading
+import time
+import unittest
+
+from django.test import TestCase
+from mock import patch
+from nose.plugins.skip import SkipTest
+import requests
+
+from lms.lib.comment_client import utils
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+class StubCommentServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of GET requests to the stub comments service, which keeps connections alive
+    and takes some time to respond, like the comments service does.
+    """
+    protocol_version = 'HTTP/1.1'
+    RESPONSE = json.dumps({'id': '1', 'username': 'user', 'collection': [], 'page': 1, 'num_pages': 1})
+    LATENCY = 0.005
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Respond to any GET request with RESPONSE"""
+        time.sleep(self.LATENCY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.RESPONSE)))
+        self.end_headers()
+        self.wfile.write(self.RESPONSE)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Don't log the requests"""
+        pass
+
+
+class StubCommentServiceServer(ThreadingMixIn, HTTPServer):
+    """Stub comments service handling each connection in a thread of its own"""
+    daemon_threads = True
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class CommentClientPerformanceTest(TestCase):
+    """
+    Compare the time requests to a local stub comments service take with a new connection
+    each, with a pooled session, and with a pooled session and concurrent calls.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    NUM_PAGES = 100
+    # The requests made to render a thread page: user, thread and thread list
+    CALLS_PER_PAGE = 3
+
+    def setUp(self):
+        super(CommentClientPerformanceTest, self).setUp()
+        self.server = StubCommentServiceServer(('127.0.0.1', 0), StubCommentServiceRequestHandler)
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://127.0.0.1:{}/api/v1/users/1'.format(self.server.server_port)
+
+    def _calls(self):
+        """Return the calls made to render a page"""
+        return [lambda: utils.perform_request('get', self.url)] * self.CALLS_PER_PAGE
+
+    def test_requests(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        # A new session for each request makes a new connection for each, like requests.request
+        with patch('lms.lib.comment_client.utils.get_session', requests.Session):
+            with CodeBlockTimer("CommentClient:{}:new_connections".format(self.NUM_PAGES)):
+                for __ in xrange(self.NUM_PAGES):
+                    for call in self._calls():
+                        call()
+
+        with CodeBlockTimer("CommentClient:{}:pooled".format(self.NUM_PAGES)):
+            for __ in xrange(self.NUM_PAGES):
+                for call in self._calls():
+                    call()
+
+        with CodeBlockTimer("CommentClient:{}:pooled_concurrent".format(self.NUM_PAGES)):
+            with patch('lms.lib.comment_client.settings.MAX_CONCURRENT_REQUESTS', 4):
+                for __ in xrange(self.NUM_PAGES):
+                    utils.perform_concurrently(self._calls())
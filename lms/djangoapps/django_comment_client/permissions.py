@@ -7,6 +7,8 @@ from types import NoneType
 from django.core import cache
 from lms.lib.comment_client import Thread
 from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 
 CACHE = cache.get_cache('default')
 CACHE_LIFESPAN = 60
@@ -35,6 +37,30 @@ def has_permission(user, permission, course_id=None):
     return False
 
 
+def get_permissions(user, course_id):
+    """
+    Return the names of all the permissions that has_permission grants the user
+    in the course, with one query for the roles and one for their permissions.
+    Like with cached_has_permission, a change in the user's roles or their
+    permissions only becomes effective after CACHE_LIFESPAN seconds.
+    """
+    assert isinstance(course_id, (NoneType, CourseKey))
+    key = u"permissions_{user_id:d}_{course_id}".format(user_id=user.id, course_id=course_id)
+    permissions = CACHE.get(key, None)
+    if permissions is None:
+        permissions = set()
+        roles = list(user.roles.filter(course_id=course_id).prefetch_related('permissions'))
+        if roles:
+            course = modulestore().get_course(course_id)
+            if course is None:
+                raise ItemNotFoundError(course_id)
+            for role in roles:
+                permissions.update(role.get_permission_names(course))
+        permissions = frozenset(permissions)
+        CACHE.set(key, permissions, CACHE_LIFESPAN)
+    return permissions
+
+
 CONDITIONS = ['is_open', 'is_author', 'is_question_author']
 
 
@@ -130,3 +156,69 @@ def check_permissions_by_view(user, course_id, content, name):
     except KeyError:
         logging.warning("Permission for view named %s does not exist in permissions.py" % name)
     return _check_conditions_permissions(user, p, course_id, content)
+
+
+class PermissionEvaluator(object):
+    """
+    Checks the view permissions of a user on many contents of a course, giving
+    the same results as check_permissions_by_view.
+
+    The permissions of the user are resolved once. The conditions of a content
+    that only depend on it and the user are evaluated once per content, and the
+    results of the views are shared by the contents with the same conditions.
+    """
+    # The conditions that don't need other content than the one checked
+    CONTENT_CONDITIONS = ('is_open', 'is_author')
+
+    def __init__(self, user, course_id):
+        assert isinstance(course_id, CourseKey)
+        self.user = user
+        self.course_id = course_id
+        self.permissions = get_permissions(user, course_id)
+        self._results = {}
+
+    def get_conditions(self, content):
+        """
+        Return the CONTENT_CONDITIONS of content, to pass to check.
+        """
+        return tuple(_check_condition(self.user, condition, content) for condition in self.CONTENT_CONDITIONS)
+
+    def check(self, content, name, conditions=None):
+        """
+        Return whether the user has the permission of the view with the given name
+        on content, whose conditions may be given.
+        """
+        expression = VIEW_PERMISSIONS[name]
+        if conditions is None:
+            conditions = self.get_conditions(content)
+        if not _expression_conditions(expression) <= set(self.CONTENT_CONDITIONS):
+            # The result depends on other contents, so it can't be shared
+            return self._evaluate(expression, dict(zip(self.CONTENT_CONDITIONS, conditions)), content)
+
+        key = (name, conditions)
+        if key not in self._results:
+            self._results[key] = self._evaluate(expression, dict(zip(self.CONTENT_CONDITIONS, conditions)), content)
+        return self._results[key]
+
+    def _evaluate(self, expression, conditions, content, operator="or"):
+        """
+        Evaluate a permission expression like _check_conditions_permissions does,
+        without evaluating the items that don't change the result.
+        """
+        if isinstance(expression, basestring):
+            if expression in CONDITIONS:
+                if expression in conditions:
+                    return conditions[expression]
+                return _check_condition(self.user, expression, content)
+            return expression in self.permissions
+        results = (self._evaluate(item, conditions, content, operator="and") for item in expression)
+        return any(results) if operator == "or" else all(results)
+
+
+def _expression_conditions(expression):
+    """
+    Return the set of conditions in a permission expression.
+    """
+    if isinstance(expression, basestring):
+        return {expression} if expression in CONDITIONS else set()
+    return set().union(*(_expression_conditions(item) for item in expression))
@@ -0,0 +1,18 @@
+"""
+Signal handlers of the forum.
+"""
+from django.core.cache import cache
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached index of the discussion modules of a course when it is published.
+    """
+    # Import here to avoid a circular import.
+    from .utils import discussion_modules_cache_key
+
+    cache.delete(discussion_modules_cache_key(course_key))
@@ -0,0 +1,107 @@
+"""
+Tests of the connection pooling, concurrency and response cache of the comments service client.
+"""
+import json
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import translation
+from mock import patch
+import requests
+
+from lms.lib.comment_client import utils
+
+
+def make_response(data):
+    """Return a successful response of the comments service with the given data"""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(data)  # pylint: disable=protected-access
+    return response
+
+
+class SessionTestCase(TestCase):
+    def test_session_reused(self):
+        session = utils.get_session()
+        self.assertIs(utils.get_session(), session)
+        adapter = session.get_adapter('http://localhost:4567')
+        self.assertEqual(adapter._pool_maxsize, 10)  # pylint: disable=protected-access
+
+    @patch('requests.Session.request', return_value=make_response({'id': '1'}))
+    def test_request_through_session(self, mock_request):
+        self.assertEqual(utils.perform_request('get', 'http://localhost:4567/api/v1/users/1'), {'id': '1'})
+        self.assertEqual(mock_request.call_count, 1)
+
+
+@patch('lms.lib.comment_client.settings.MAX_CONCURRENT_REQUESTS', 4)
+class PerformConcurrentlyTestCase(TestCase):
+    def test_results_in_order(self):
+        def make_function(index):
+            """Return a function returning index, the later ones sooner"""
+            def function():  # pylint: disable=missing-docstring
+                time.sleep(0.01 * (5 - index))
+                return index, threading.current_thread().name, translation.get_language()
+            return function
+
+        translation.activate('eo')
+        self.addCleanup(translation.deactivate)
+        results = utils.perform_concurrently([make_function(index) for index in range(5)])
+
+        self.assertEqual([result[0] for result in results], range(5))
+        self.assertTrue(all(result[1] != threading.current_thread().name for result in results))
+        self.assertEqual(set(result[2] for result in results), {'eo'})
+
+    def test_exception(self):
+        def fail():  # pylint: disable=missing-docstring
+            raise utils.CommentClientRequestError('Not found', 404)
+
+        with self.assertRaises(utils.CommentClientRequestError):
+            utils.perform_concurrently([lambda: 1, fail])
+
+    def test_nested(self):
+        # Calls in the threads of the pool don't wait for the busy pool
+        results = utils.perform_concurrently([
+            lambda: utils.perform_concurrently([lambda: 1, lambda: 2])
+        ] * 8)
+        self.assertEqual(results, [[1, 2]] * 8)
+
+    @patch('lms.lib.comment_client.settings.MAX_CONCURRENT_REQUESTS', 1)
+    def test_sequential(self):
+        results = utils.perform_concurrently([lambda: threading.current_thread().name] * 2)
+        self.assertEqual(results, [threading.current_thread().name] * 2)
+
+
+@patch('requests.Session.request', return_value=make_response({'id': '1'}))
+@patch('lms.lib.comment_client.settings.CACHE_TIMEOUT', 60)
+class ResponseCacheTestCase(TestCase):
+    URL = 'http://localhost:4567/api/v1/users/1'
+
+    def setUp(self):
+        super(ResponseCacheTestCase, self).setUp()
+        cache.clear()
+
+    def test_cacheable(self, mock_request):
+        for __ in range(2):
+            self.assertEqual(utils.perform_request('get', self.URL, {'complete': True}, cacheable=True), {'id': '1'})
+        self.assertEqual(mock_request.call_count, 1)
+
+        utils.perform_request('get', self.URL, {'complete': False}, cacheable=True)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_not_cacheable(self, mock_request):
+        for __ in range(2):
+            utils.perform_request('get', self.URL, {'complete': True})
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_not_get(self, mock_request):
+        for __ in range(2):
+            utils.perform_request('put', self.URL, {'username': 'test'}, cacheable=True)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('lms.lib.comment_client.settings.CACHE_TIMEOUT', 0)
+    def test_disabled(self, mock_request):
+        for __ in range(2):
+            utils.perform_request('get', self.URL, {'complete': True}, cacheable=True)
+        self.assertEqual(mock_request.call_count, 2)
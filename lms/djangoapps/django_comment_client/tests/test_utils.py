@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import datetime
+import ddt
 import json
 import mock
 from pytz import UTC
@@ -8,6 +9,7 @@ from django.utils.timezone import UTC as django_utc
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from edxmako import add_lookup
@@ -15,9 +17,13 @@ from edxmako import add_lookup
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
 from django_comment_client.tests.utils import ContentGroupTestCase
+from django_comment_client.permissions import PermissionEvaluator, check_permissions_by_view
 import django_comment_client.utils as utils
+from django_comment_common.models import FORUM_ROLE_MODERATOR, Role
+from django_comment_common.utils import seed_permissions_roles
 
-from courseware.tests.factories import InstructorFactory
+from courseware.access import has_access
+from courseware.tests.factories import BetaTesterFactory, InstructorFactory
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_settings
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -90,6 +96,82 @@ class AccessUtilsTestCase(ModuleStoreTestCase):
         self.assertFalse(ret)
 
 
+@ddt.ddt
+class AbilityTestCase(ModuleStoreTestCase):
+    """
+    Test that get_ability gives the same results as checking the permissions
+    of each view with check_permissions_by_view
+    """
+    def setUp(self):
+        super(AbilityTestCase, self).setUp(create_user=False)
+        cache.clear()
+        self.student = UserFactory.create()
+        self.moderator = UserFactory.create()
+
+    def _create_course(self, blackout):
+        """Create a course, in a discussion blackout if set, whose users are self.student and self.moderator"""
+        now = datetime.datetime.now(UTC)
+        blackouts = [[
+            (now - datetime.timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+            (now + datetime.timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+        ]] if blackout else []
+        course = CourseFactory.create(discussion_blackouts=blackouts)
+        seed_permissions_roles(course.id)
+        for user in (self.student, self.moderator):
+            CourseEnrollmentFactory(user=user, course_id=course.id)
+        Role.objects.get(name=FORUM_ROLE_MODERATOR, course_id=course.id).users.add(self.moderator)
+        return course
+
+    def _contents(self, user):
+        """Return threads and comments, open and closed, by user and by another user"""
+        contents = []
+        for content_type in ('thread', 'comment'):
+            for closed in (True, False):
+                for author_id in (user.id, user.id + 1000):
+                    contents.append({
+                        'id': str(len(contents)), 'type': content_type, 'closed': closed, 'user_id': str(author_id)
+                    })
+        return contents
+
+    @ddt.data(True, False)
+    def test_same_as_views(self, blackout):
+        course = self._create_course(blackout)
+        for user in (self.student, self.moderator):
+            evaluator = PermissionEvaluator(user, course.id)
+            for content in self._contents(user):
+                is_thread = content['type'] == 'thread'
+                expected = {
+                    'editable': check_permissions_by_view(
+                        user, course.id, content, "update_thread" if is_thread else "update_comment"
+                    ),
+                    'can_reply': check_permissions_by_view(
+                        user, course.id, content, "create_comment" if is_thread else "create_sub_comment"
+                    ),
+                    'can_delete': check_permissions_by_view(
+                        user, course.id, content, "delete_thread" if is_thread else "delete_comment"
+                    ),
+                    'can_openclose': (
+                        check_permissions_by_view(user, course.id, content, "openclose_thread") if is_thread else False
+                    ),
+                    'can_vote': check_permissions_by_view(
+                        user, course.id, content, "vote_for_thread" if is_thread else "vote_for_comment"
+                    ),
+                }
+                self.assertEqual(utils.get_ability(course.id, content, user, evaluator), expected)
+                self.assertEqual(utils.get_ability(course.id, content, user), expected)
+
+    def test_metadata_queries(self):
+        course = self._create_course(blackout=False)
+        user_info = {'upvoted_ids': [], 'downvoted_ids': [], 'subscribed_thread_ids': []}
+        contents = self._contents(self.student)
+        comments = [content for content in contents if content['type'] == 'comment']
+        threads = [dict(content, children=comments) for content in contents if content['type'] == 'thread']
+        # The roles and their permissions, regardless of the number of contents
+        with self.assertNumQueries(2):
+            metadata = utils.get_metadata_for_threads(course.id, threads, self.student, user_info)
+        self.assertEqual(sorted(metadata), sorted(content['id'] for content in contents))
+
+
 class CoursewareContextTestCase(ModuleStoreTestCase):
     """
     Base testcase class for courseware context for the
@@ -758,6 +840,67 @@ class CategoryMapTestCase(CategoryMapTestMixin, ModuleStoreTestCase):
             ["Topic_A", "Topic_B", "Topic_C", "discussion1", "discussion2", "discussion3"]
         )
 
+    def test_discussion_modules_cached(self):
+        self.create_discussion("Chapter 1", "Discussion 1")
+        utils.get_discussion_categories_ids(self.course, self.user)
+
+        with mock.patch.object(self.store, 'get_items') as get_items:
+            ids = utils.get_discussion_categories_ids(self.course, self.user)
+        self.assertFalse(get_items.called)
+        self.assertEqual(ids, ["discussion1"])
+
+    def test_discussion_modules_invalidated_on_publish(self):
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+
+        self.create_discussion("Chapter 2", "Discussion 2")
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.user),
+            ["discussion1", "discussion2"]
+        )
+
+    def test_discussion_modules_access(self):
+        later = datetime.datetime(datetime.MAXYEAR, 1, 1, tzinfo=django_utc())
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.create_discussion("Chapter 1", "Discussion 2", start=later)
+        self.create_discussion("Chapter 1", "Discussion 3", visible_to_staff_only=True)
+
+        self.assertEqual(
+            [module.discussion_id for module in utils.get_accessible_discussion_modules(self.course, self.user)],
+            ["discussion1"]
+        )
+        self.assertItemsEqual(
+            [module.discussion_id for module in utils.get_accessible_discussion_modules(self.course, self.instructor)],
+            ["discussion1", "discussion2", "discussion3"]
+        )
+        self.assertItemsEqual(
+            [module.discussion_id for module in utils.get_accessible_discussion_modules(
+                self.course, self.user, include_all=True
+            )],
+            ["discussion1", "discussion2", "discussion3"]
+        )
+
+    def test_discussion_modules_access_matches_descriptors(self):
+        now = datetime.datetime.now(django_utc())
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.create_discussion("Chapter 1", "Discussion 2", start=now + datetime.timedelta(days=1))
+        self.create_discussion(
+            "Chapter 1", "Discussion 3", start=now + datetime.timedelta(days=1), days_early_for_beta=2
+        )
+        self.create_discussion("Chapter 1", "Discussion 4", visible_to_staff_only=True)
+        beta_tester = BetaTesterFactory(course_key=self.course.id)
+
+        descriptors = self.store.get_items(self.course.id, qualifiers={'category': 'discussion'})
+        for user in (self.user, beta_tester, self.instructor):
+            self.assertItemsEqual(
+                [module.discussion_id for module in utils.get_accessible_discussion_modules(self.course, user)],
+                [
+                    descriptor.discussion_id for descriptor in descriptors
+                    if has_access(user, 'load', descriptor, self.course.id)
+                ]
+            )
+
+
 
 class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase):
     """
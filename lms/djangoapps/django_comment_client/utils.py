@@ -1,24 +1,26 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from datetime import datetime
 import json
 import logging
 
 import pytz
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
 from django.utils.timezone import UTC
 import pystache_custom as pystache
 from opaque_keys.edx.locations import i4xEncoder
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from xmodule.modulestore.django import modulestore
+from xmodule.split_test_module import get_split_user_partitions
 
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
-from django_comment_client.permissions import check_permissions_by_view, cached_has_permission
+from django_comment_client.permissions import PermissionEvaluator, cached_has_permission
 from edxmako import lookup_template
 
-from courseware.access import has_access
+from courseware.access import _can_load_descriptor, _has_access_to_course, _has_group_access_to_partitions
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_commentable_cohorted, is_course_cohorted
 )
@@ -61,12 +63,44 @@ def has_forum_access(uname, course_id, rolename):
     return role.users.filter(username=uname).exists()
 
 
-def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
+# Seconds the index of the discussion modules of a course is cached, in case a publish is missed
+DISCUSSION_MODULES_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+class DiscussionModule(namedtuple('DiscussionModule', [
+    'usage_id', 'discussion_id', 'discussion_category', 'discussion_target', 'sort_key',
+    'start', 'days_early_for_beta', 'visible_to_staff_only', 'group_access',
+])):
     """
-    Return a list of all valid discussion modules in this course that
-    are accessible to the given user.
+    The fields of a discussion module that the forum needs, with the ones its access depends on.
+    """
+    __slots__ = ()
+
+    @property
+    def location(self):
+        """The usage key of the discussion module"""
+        return UsageKey.from_string(self.usage_id)
+
+
+def discussion_modules_cache_key(course_key):
     """
-    all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
+    Return the key of the cached index of the discussion modules of a course.
+    """
+    return u'django_comment_client.discussion_modules.{}'.format(course_key)
+
+
+def get_discussion_modules(course):
+    """
+    Return the `DiscussionModule` of every valid discussion module in this course.
+
+    The index is cached per published version of the course, so that the
+    discussion modules are only loaded from the modulestore once per publish.
+    """
+    cache_key = discussion_modules_cache_key(course.id)
+    version = modulestore().get_course_published_version(course.id)
+    cached = cache.get(cache_key)
+    if cached is not None and cached['version'] == version:
+        return cached['modules']
 
     def has_required_keys(module):
         for key in ('discussion_id', 'discussion_category', 'discussion_target'):
@@ -75,10 +109,84 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
                 return False
         return True
 
-    return [
-        module for module in all_modules
-        if has_required_keys(module) and (include_all or has_access(user, 'load', module, course.id))
+    modules = [
+        DiscussionModule(
+            usage_id=unicode(module.location),
+            discussion_id=module.discussion_id,
+            discussion_category=module.discussion_category,
+            discussion_target=module.discussion_target,
+            sort_key=module.sort_key,
+            start=module.start,
+            days_early_for_beta=module.days_early_for_beta,
+            visible_to_staff_only=module.visible_to_staff_only,
+            group_access=module.merged_group_access,
+        )
+        for module in modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
+        if has_required_keys(module)
     ]
+    cache.set(cache_key, {'version': version, 'modules': modules}, DISCUSSION_MODULES_CACHE_TIMEOUT)
+    return modules
+
+
+class DiscussionModuleAccess(object):
+    """
+    Checks whether a user may load the discussion modules of a course, like
+    `has_access(user, 'load', module)` does for their descriptors.
+
+    The staff access and partition groups of the user are looked up once, and
+    shared by the checks of all the modules.
+    """
+    def __init__(self, course, user):
+        self.course = course
+        self.user = user if user is not None else AnonymousUser()
+        self._is_staff = None
+        self._user_groups = {}
+        # Only the partitions not used by split_test restrict the access to modules,
+        # as split_test handles its own access via updating its children.
+        self._check_groups = len(course.user_partitions) != len(get_split_user_partitions(course.user_partitions))
+
+    def _has_staff_access(self):
+        """Whether the user has staff access to the discussion modules of the course"""
+        if self._is_staff is None:
+            self._is_staff = _has_access_to_course(self.user, 'staff', self.course.id)
+        return self._is_staff
+
+    def _get_user_group(self, partition):
+        """Return the group of the user in the given partition"""
+        if partition.id not in self._user_groups:
+            self._user_groups[partition.id] = partition.scheme.get_group_for_user(self.course.id, self.user, partition)
+        return self._user_groups[partition.id]
+
+    def _has_group_access(self, module):
+        """Whether the groups of the user satisfy the group access of the module"""
+        if not self._check_groups:
+            return True
+        return _has_group_access_to_partitions(module.group_access, self.course.user_partitions, self._get_user_group)
+
+    def can_load(self, module):
+        """
+        Whether the user may load the given `DiscussionModule`.
+        """
+        return _can_load_descriptor(
+            self.user,
+            module,
+            self.course.id,
+            has_staff_access=self._has_staff_access,
+            has_group_access=lambda: self._has_group_access(module),
+        )
+
+
+def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
+    """
+    Return a list of all valid discussion modules in this course that
+    are accessible to the given user, as `DiscussionModule`s.
+    """
+    modules = get_discussion_modules(course)
+    if include_all:
+        return modules
+
+    access = DiscussionModuleAccess(course, user)
+    return [module for module in modules if access.can_load(module)]
 
 
 def get_discussion_id_map(course, user):
@@ -345,19 +453,34 @@ class QueryCountDebugMiddleware(object):
         return response
 
 
-def get_ability(course_id, content, user):
+def get_ability(course_id, content, user, evaluator=None):
+    """
+    Return what the user can do with content. To get the abilities on many contents
+    at once, pass the same PermissionEvaluator of the user for all of them.
+    """
+    if evaluator is None:
+        evaluator = PermissionEvaluator(user, course_id)
+    conditions = evaluator.get_conditions(content)
+    if content['type'] == 'thread':
+        return {
+            'editable': evaluator.check(content, "update_thread", conditions),
+            'can_reply': evaluator.check(content, "create_comment", conditions),
+            'can_delete': evaluator.check(content, "delete_thread", conditions),
+            'can_openclose': evaluator.check(content, "openclose_thread", conditions),
+            'can_vote': evaluator.check(content, "vote_for_thread", conditions),
+        }
     return {
-        'editable': check_permissions_by_view(user, course_id, content, "update_thread" if content['type'] == 'thread' else "update_comment"),
-        'can_reply': check_permissions_by_view(user, course_id, content, "create_comment" if content['type'] == 'thread' else "create_sub_comment"),
-        'can_delete': check_permissions_by_view(user, course_id, content, "delete_thread" if content['type'] == 'thread' else "delete_comment"),
-        'can_openclose': check_permissions_by_view(user, course_id, content, "openclose_thread") if content['type'] == 'thread' else False,
-        'can_vote': check_permissions_by_view(user, course_id, content, "vote_for_thread" if content['type'] == 'thread' else "vote_for_comment"),
+        'editable': evaluator.check(content, "update_comment", conditions),
+        'can_reply': evaluator.check(content, "create_sub_comment", conditions),
+        'can_delete': evaluator.check(content, "delete_comment", conditions),
+        'can_openclose': False,
+        'can_vote': evaluator.check(content, "vote_for_comment", conditions),
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_info(course_id, content, user, user_info):
+def get_annotated_content_info(course_id, content, user, user_info, evaluator=None):
     """
     Get metadata for an individual content (thread or comment)
     """
@@ -369,20 +492,22 @@ def get_annotated_content_info(course_id, content, user, user_info):
     return {
         'voted': voted,
         'subscribed': content['id'] in user_info['subscribed_thread_ids'],
-        'ability': get_ability(course_id, content, user),
+        'ability': get_ability(course_id, content, user, evaluator),
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_infos(course_id, thread, user, user_info):
+def get_annotated_content_infos(course_id, thread, user, user_info, evaluator=None):
     """
     Get metadata for a thread and its children
     """
     infos = {}
+    if evaluator is None:
+        evaluator = PermissionEvaluator(user, course_id)
 
     def annotate(content):
-        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info)
+        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info, evaluator)
         for child in (
                 content.get('children', []) +
                 content.get('endorsed_responses', []) +
@@ -394,10 +519,13 @@ def get_annotated_content_infos(course_id, thread, user, user_info):
 
 
 def get_metadata_for_threads(course_id, threads, user, user_info):
-    def infogetter(thread):
-        return get_annotated_content_infos(course_id, thread, user, user_info)
-
-    metadata = reduce(merge_dict, map(infogetter, threads), {})
+    """
+    Get metadata for threads and their children, resolving the permissions of the user once
+    """
+    evaluator = PermissionEvaluator(user, course_id)
+    metadata = {}
+    for thread in threads:
+        metadata.update(get_annotated_content_infos(course_id, thread, user, user_info, evaluator))
     return metadata
 
 # put this method in utils.py to avoid circular import dependency between helpers and mustache_helpers
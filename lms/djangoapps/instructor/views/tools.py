@@ -10,7 +10,8 @@ from django.http import HttpResponseBadRequest
 from django.utils.timezone import utc
 from django.utils.translation import ugettext as _
 
-from courseware.models import StudentModule
+from courseware.models import PersistentCourseGrade, StudentModule
+from courseware.module_render import invalidate_course_outline
 from xmodule.fields import Date
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
@@ -248,6 +249,10 @@ def set_due_date_extension(course, unit, student, due_date):
             set_due_date(child)
 
     set_due_date(unit)
+    # The persisted progress summary and the cached courseware navigation
+    # of the student show the old due date.
+    PersistentCourseGrade.invalidate(student.id, course.id)
+    invalidate_course_outline(course.id, student.id)
 
 
 def dump_module_extensions(course, unit):
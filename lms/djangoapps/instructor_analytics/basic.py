@@ -35,6 +35,9 @@ AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at')
 COUPON_FEATURES = ('code', 'course_id', 'percentage_discount', 'description', 'expiration_date', 'is_active')
 
+# Number of students queried at a time by iter_enrolled_students_features
+STUDENTS_CHUNK_SIZE = 1000
+
 
 def sale_order_record_features(course_id, features):
     """
@@ -159,6 +162,18 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features))
+
+
+def iter_enrolled_students_features(course_key, features):
+    """
+    Like `enrolled_students_features`, but lazily yields the dictionaries
+    one student at a time, in the order of their usernames.
+
+    The students are queried STUDENTS_CHUNK_SIZE at a time, so that they're
+    not all held in memory: prefetch_related() can't be used with
+    iterator(), so the cohorts are prefetched for each chunk instead.
+    """
     include_cohort_column = 'cohort' in features
 
     students = User.objects.filter(
@@ -169,6 +184,17 @@ def enrolled_students_features(course_key, features):
     if include_cohort_column:
         students = students.prefetch_related('course_groups')
 
+    def iter_students():
+        """ yield the students, querying the ones after the last username of each chunk """
+        chunk_students = students
+        while True:
+            chunk = list(chunk_students[:STUDENTS_CHUNK_SIZE])
+            for student in chunk:
+                yield student
+            if len(chunk) < STUDENTS_CHUNK_SIZE:
+                return
+            chunk_students = students.filter(username__gt=chunk[-1].username)
+
     def extract_student(student, features):
         """ convert student to dictionary """
         student_features = [x for x in STUDENT_FEATURES if x in features]
@@ -206,7 +232,7 @@ def enrolled_students_features(course_key, features):
             )
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    return (extract_student(student, features) for student in iter_students())
 
 
 def coupon_codes_features(features, coupons_list):
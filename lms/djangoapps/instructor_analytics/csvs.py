@@ -64,6 +64,17 @@ def format_dictlist(dictlist, features):
     }
     """
 
+    header, datarows = iter_format_dictlist(dictlist, features)
+    return header, list(datarows)
+
+
+def iter_format_dictlist(dictlist, features):
+    """
+    Like `format_dictlist`, but `dictlist` may be any iterable of
+    dictionaries, and the datarows are returned as a generator that converts
+    them one at a time.
+    """
+
     def dict_to_entry(dct):
         """ Convert dictionary to a list for a csv row """
         relevant_items = [(k, v) for (k, v) in dct.items() if k in features]
@@ -72,7 +83,7 @@ def format_dictlist(dictlist, features):
         return vals
 
     header = features
-    datarows = map(dict_to_entry, dictlist)
+    datarows = (dict_to_entry(dct) for dct in dictlist)
 
     return header, datarows
 
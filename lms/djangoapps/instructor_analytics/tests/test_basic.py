@@ -65,6 +65,15 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
             self.assertIn(userreport['email'], [user.email for user in self.users])
             self.assertIn(userreport['name'], [user.profile.name for user in self.users])
 
+    @patch('instructor_analytics.basic.STUDENTS_CHUNK_SIZE', 7)
+    def test_enrolled_students_features_chunks(self):
+        # The 30 students are queried 7 at a time, in the order of their usernames
+        with self.assertNumQueries(5):
+            userreports = enrolled_students_features(self.course_key, ('id', 'username'))
+        self.assertEqual(
+            [report['username'] for report in userreports], sorted(user.username for user in self.users)
+        )
+
     def test_enrolled_students_meta_features_keys(self):
         """
         Assert that we can query individual fields in the 'meta' field in the UserProfile
@@ -109,6 +118,10 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
             else:
                 self.assertEqual(report['cohort'], '[unassigned]')
 
+        # The cohorts are prefetched for each chunk of students
+        with patch('instructor_analytics.basic.STUDENTS_CHUNK_SIZE', 4), self.assertNumQueries(6):
+            self.assertEqual(enrolled_students_features(course.id, query_features), userreports)
+
     def test_available_features(self):
         self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES))
         self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES))
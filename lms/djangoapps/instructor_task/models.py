@@ -14,11 +14,13 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import TemporaryFile, mkstemp
 from uuid import uuid4
 import csv
 import json
 import hashlib
 import os.path
+import shutil
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,9 +195,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows are written out as they are produced by the iterable passed
+    to `store_rows()`, so callers can pass a generator instead of building the
+    whole dataset in memory. Only complete files ever become visible.
     """
     @classmethod
     def from_config(cls):
@@ -218,6 +220,73 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file object containing a utf-8 encoded CSV, yield its rows
+        with their cells decoded back to unicode strings.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+
+# Size of the parts in which reports are uploaded to S3. S3 requires
+# every part of a multipart upload except the last to be at least 5MB.
+S3_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+
+class S3ChunkedUpload(object):
+    """
+    A write-only file-like object that uploads the data written to it to an
+    S3 key, holding at most S3_UPLOAD_PART_SIZE bytes in memory.
+
+    Data is sent as a multipart upload once it outgrows a single part, so
+    the key only becomes visible when `complete()` is called. Call
+    `cancel()` to abandon the upload instead.
+    """
+    def __init__(self, bucket, key, headers):
+        self.bucket = bucket
+        self.key = key
+        self.headers = headers
+        self.buffer = StringIO()
+        self.multipart_upload = None
+        self.num_parts = 0
+
+    def write(self, data):
+        """Buffer `data`, uploading a part whenever the buffer is full."""
+        self.buffer.write(data)
+        if self.buffer.tell() >= S3_UPLOAD_PART_SIZE:
+            self._upload_part()
+
+    def flush(self):
+        """Data is flushed in whole parts, so there is nothing to do here."""
+        pass
+
+    def _upload_part(self):
+        """Upload the buffered data as the next part of the multipart upload."""
+        if self.multipart_upload is None:
+            self.multipart_upload = self.bucket.initiate_multipart_upload(self.key.key, headers=self.headers)
+        self.num_parts += 1
+        self.buffer.seek(0)
+        self.multipart_upload.upload_part_from_file(self.buffer, self.num_parts)
+        self.buffer = StringIO()
+
+    def complete(self):
+        """Upload any remaining data and make the key visible."""
+        if self.multipart_upload is None:
+            data = self.buffer.getvalue()
+            headers = dict(self.headers, **{"Content-Length": len(data)})
+            self.key.size = len(data)
+            self.key.set_contents_from_string(data, headers=headers)
+        else:
+            if self.buffer.tell() > 0:
+                self._upload_part()
+            self.multipart_upload.complete_upload()
+
+    def cancel(self):
+        """Abandon the upload, discarding any parts uploaded so far."""
+        if self.multipart_upload is not None:
+            self.multipart_upload.cancel_upload()
+
 
 class S3ReportStore(ReportStore):
     """
@@ -308,19 +377,92 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file to S3.
+
+        `rows` is consumed lazily. The compressed data is sent as a multipart
+        upload in parts of at most S3_UPLOAD_PART_SIZE bytes, which S3 only
+        makes visible once the upload is completed; small files are uploaded
+        in a single request.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        self._store_gzipped_rows(
+            self.key_for(course_id, filename),
+            rows,
+            {"Content-Encoding": "gzip", "Content-Type": "text/csv"}
+        )
 
-        self.store(course_id, filename, output_buffer)
+    def _store_gzipped_rows(self, key, rows, headers):
+        """
+        Write `rows` to `key` as a gzip'd csv file, with the HTTP `headers`.
+        """
+        upload = S3ChunkedUpload(self.bucket, key, headers)
+        try:
+            gzip_file = GzipFile(fileobj=upload, mode="wb")
+            csvwriter = csv.writer(gzip_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
+            upload.complete()
+        except Exception:
+            upload.cancel()
+            raise
+
+    def partial_key_for(self, course_id, partial_id, filename):
+        """
+        Return the S3 key used for the partial file `filename` of the report
+        identified by `partial_id`. Partial files are kept out of the course
+        directory, so they never show up in `links_for()`.
+        """
+        hashed_course_id = hashlib.sha1(course_id.to_deprecated_string())
+
+        key = Key(self.bucket)
+        key.key = "{}/partial/{}/{}/{}".format(
+            self.root_path,
+            hashed_course_id.hexdigest(),
+            partial_id,
+            filename
+        )
+
+        return key
+
+    def store_partial_rows(self, course_id, partial_id, filename, rows):
+        """
+        Store `rows` as the partial file `filename` of the report identified
+        by `partial_id`. Partial files are gzip'd csv files, like reports.
+        """
+        self._store_gzipped_rows(self.partial_key_for(course_id, partial_id, filename), rows, {})
+
+    def has_partial(self, course_id, partial_id, filename):
+        """
+        Return whether the partial file `filename` of the report identified by
+        `partial_id` was stored.
+        """
+        return self.partial_key_for(course_id, partial_id, filename).exists()
+
+    def iter_partial_rows(self, course_id, partial_id, filename):
+        """
+        Yield the rows of the partial file `filename` of the report
+        identified by `partial_id`, or nothing if it does not exist.
+        """
+        key = self.partial_key_for(course_id, partial_id, filename)
+        if not key.exists():
+            return
+
+        # GzipFile needs a seekable file to read from, so download to a
+        # temporary file instead of reading the key directly.
+        with TemporaryFile() as temp_file:
+            key.get_contents_to_file(temp_file)
+            temp_file.seek(0)
+            for row in self._get_utf8_decoded_rows(GzipFile(fileobj=temp_file, mode="rb")):
+                yield row
+
+    def delete_partials(self, course_id, partial_id):
+        """
+        Delete all partial files of the report identified by `partial_id`.
+        """
+        partial_dir = self.partial_key_for(course_id, partial_id, '')
+        self.bucket.delete_keys([key.key for key in self.bucket.list(prefix=partial_dir.key)])
 
     def links_for(self, course_id):
         """
@@ -334,6 +476,15 @@ class S3ReportStore(ReportStore):
         ]
 
 
+def _default_file_mode():
+    """
+    Return the permissions `open()` creates files with under the current umask.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0666 & ~umask
+
+
 class LocalFSReportStore(ReportStore):
     """
     LocalFS implementation of a ReportStore. This is meant for debugging
@@ -390,12 +541,89 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        `rows` is consumed lazily and written to a temporary file outside of
+        the course directory, which is moved into place once complete. The
+        report gets the permissions of a file created under the current
+        umask, rather than the owner-only ones of the temporary file, so
+        that the web server serving ROOT_PATH can read it.
+        """
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        temp_fd, temp_path = mkstemp(dir=self.root_path)
+        try:
+            with os.fdopen(temp_fd, "wb") as f:
+                csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+            os.chmod(temp_path, _default_file_mode())
+            os.rename(temp_path, full_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def partial_path_to(self, course_id, partial_id, filename):
+        """
+        Return the full path to the partial file `filename` of the report
+        identified by `partial_id`. Partial files are kept out of the course
+        directory, so they never show up in `links_for()`.
+        """
+        return os.path.join(
+            self.root_path,
+            'partial',
+            urllib.quote(course_id.to_deprecated_string(), safe=''),
+            partial_id,
+            filename
+        )
+
+    def store_partial_rows(self, course_id, partial_id, filename, rows):
+        """
+        Store `rows` as the partial file `filename` of the report identified
+        by `partial_id`.
+
+        As with `store_rows`, the rows are written to a temporary file which
+        is moved into place once complete.
+        """
+        full_path = self.partial_path_to(course_id, partial_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temp_fd, temp_path = mkstemp(dir=directory)
+        try:
+            with os.fdopen(temp_fd, "wb") as f:
+                csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_path, full_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def has_partial(self, course_id, partial_id, filename):
+        """
+        Return whether the partial file `filename` of the report identified by
+        `partial_id` was stored.
+        """
+        return os.path.exists(self.partial_path_to(course_id, partial_id, filename))
+
+    def iter_partial_rows(self, course_id, partial_id, filename):
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        Yield the rows of the partial file `filename` of the report
+        identified by `partial_id`, or nothing if it does not exist.
+        """
+        full_path = self.partial_path_to(course_id, partial_id, filename)
+        if not os.path.exists(full_path):
+            return
+
+        with open(full_path, "rb") as f:
+            for row in self._get_utf8_decoded_rows(f):
+                yield row
 
-        self.store(course_id, filename, output_buffer)
+    def delete_partials(self, course_id, partial_id):
+        """
+        Delete all partial files of the report identified by `partial_id`.
+        """
+        shutil.rmtree(self.partial_path_to(course_id, partial_id, ''), ignore_errors=True)
 
     def links_for(self, course_id):
         """
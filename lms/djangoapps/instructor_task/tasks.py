@@ -27,6 +27,7 @@ from django.utils.translation import ugettext_noop
 
 from celery import task
 from bulk_email.tasks import perform_delegate_email_batches
+from instructor_task.subtasks import SubtaskStatus
 from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
@@ -34,7 +35,8 @@ from instructor_task.tasks_helper import (
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
-    upload_grades_csv,
+    delegate_grade_report_shards,
+    upload_grades_csv_shard,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -70,7 +72,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, prefetch_field_data=True)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -143,6 +145,9 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    Courses with more than settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK enrolled
+    students are graded by `calculate_grades_csv_shard` subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
@@ -151,10 +156,38 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(delegate_grade_report_shards, _create_grade_report_shard, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grade_report_shard(entry_id, shard_index, student_list, initial_subtask_status):
+    """Creates a subtask to grade a shard of the students of a course."""
+    return calculate_grades_csv_shard.subtask(
+        (
+            entry_id,
+            shard_index,
+            student_list,
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, shard_index, student_list, subtask_status_dict):
+    """
+    Grade a shard of the students of a course for the grade report of the
+    InstructorTask `entry_id`, and merge the report once all shards are done.
+
+    `student_list` is a list of dicts containing the 'pk' of each student in
+    the shard, and `subtask_status_dict` is the initial SubtaskStatus of this
+    subtask as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    return upload_grades_csv_shard(entry_id, shard_index, student_list, subtask_status)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -5,13 +5,17 @@ running state of a course.
 """
 import json
 from datetime import datetime
+from itertools import chain, count
 from time import time
+import traceback
 import unicodecsv
 import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -25,11 +29,17 @@ from xmodule.split_test_module import get_split_user_partitions
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, MultiUserFieldDataCache, chunks
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iter_enrolled_students_features
+from instructor_analytics.csvs import iter_format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -49,6 +59,10 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# The number of StudentModules whose students' field data is fetched at once
+# by perform_module_state_update.
+MODULE_STATE_UPDATE_CHUNK_SIZE = 100
+
 
 class BaseInstructorTask(Task):
     """
@@ -145,6 +159,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class GradeReportMergeError(Exception):
+    """
+    Error signaling that the shards of a grade report can't be merged into
+    a complete report, because some of them failed or stored no rows.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -263,7 +285,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                prefetch_field_data=False):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -281,6 +304,9 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prefetch_field_data` is True, the field data of the students is fetched for chunks of StudentModules
+    at once, and the `update_fcn` is also passed the FieldDataCache of the student as `field_data_cache`.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -341,23 +367,37 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    for modules_chunk in chunks(modules_to_update.select_related('student'), MODULE_STATE_UPDATE_CHUNK_SIZE):
+        if prefetch_field_data:
+            # fetch the data of the modules of all the students in the chunk at once
+            field_data_cache = MultiUserFieldDataCache(
+                [], course_id, set(module_to_update.student for module_to_update in modules_chunk)
+            )
+            for module_descriptor in set(problems[unicode(module.module_state_key)] for module in modules_chunk):
+                field_data_cache.add_descriptor_descendents(module_descriptor)
+
+        for module_to_update in modules_chunk:
+            task_progress.attempted += 1
+            module_descriptor = problems[unicode(module_to_update.module_state_key)]
+            kwargs = {}
+            if prefetch_field_data:
+                kwargs['field_data_cache'] = field_data_cache.for_user(module_to_update.student)
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            with dog_stats_api.timer(
+                'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+            ):
+                update_status = update_fcn(module_descriptor, module_to_update, **kwargs)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    # If the update_fcn returns true, then it performed some kind of work.
+                    # Logging of failures is left to the update_fcn itself.
+                    task_progress.succeeded += 1
+                elif update_status == UPDATE_STATUS_FAILED:
+                    task_progress.failed += 1
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    task_progress.skipped += 1
+                else:
+                    raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
     return task_progress.update_task_state()
 
@@ -389,16 +429,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    `field_data_cache` is the FieldDataCache of `student` for the module, if it was already fetched.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -432,10 +475,11 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
 
 
 @transaction.autocommit
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
-    performs rescoring on the student's problem submission.
+    performs rescoring on the student's problem submission. `field_data_cache`
+    is the student's FieldDataCache for the problem, if it was already fetched.
 
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
@@ -448,7 +492,10 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        field_data_cache=field_data_cache
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -534,6 +581,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This may be any iterable, such as a generator; rows are
+            written out as they are produced.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -549,6 +598,72 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
+class GradeReportFormatter(object):
+    """
+    Turns the gradesets of a course into the rows of its grade report CSV.
+    """
+    ERROR_HEADER = ["id", "username", "error_msg"]
+
+    def __init__(self, course):
+        self.course_id = course.id
+        self.course_is_cohorted = is_course_cohorted(course.id)
+        self.experiment_partitions = get_split_user_partitions(course.user_partitions)
+        self.section_labels = None
+
+    def header_row(self, gradeset):
+        """
+        Return the header row of the report. The section columns are taken
+        from `gradeset`, which must be the first gradeset in the report.
+        """
+        self.section_labels = [section['label'] for section in gradeset[u'section_breakdown']]
+        cohorts_header = ['Cohort Name'] if self.course_is_cohorted else []
+        group_configs_header = [
+            u'Experiment Group ({})'.format(partition.name) for partition in self.experiment_partitions
+        ]
+        return ["id", "email", "username", "grade"] + self.section_labels + cohorts_header + group_configs_header
+
+    def row(self, student, gradeset):
+        """
+        Return the report row for a `student` who was graded successfully.
+        """
+        if self.section_labels is None:
+            self.header_row(gradeset)
+
+        percents = {
+            section['label']: section.get('percent', 0.0)
+            for section in gradeset[u'section_breakdown']
+            if 'label' in section
+        }
+
+        cohorts_group_name = []
+        if self.course_is_cohorted:
+            group = get_cohort(student, self.course_id, assign=False)
+            cohorts_group_name.append(group.name if group else '')
+
+        group_configs_group_names = []
+        for partition in self.experiment_partitions:
+            group = LmsPartitionService(student, self.course_id).get_group(partition, assign=False)
+            group_configs_group_names.append(group.name if group else '')
+
+        # Not everybody has the same gradable items. If the item is not
+        # found in the user's gradeset, just assume it's a 0. The aggregated
+        # grades for their sections and overall course will be calculated
+        # without regard for the item they didn't have access to, so it's
+        # possible for a student to have a 0.0 show up in their row but
+        # still have 100% for the course.
+        row_percents = [percents.get(label, 0.0) for label in self.section_labels]
+        return (
+            [student.id, student.email, student.username, gradeset['percent']] +
+            row_percents + cohorts_group_name + group_configs_group_names
+        )
+
+    def error_row(self, student, err_msg):
+        """
+        Return the error report row for a `student` who could not be graded.
+        """
+        return [student.id, student.username, err_msg]
+
+
 def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
@@ -578,20 +693,14 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
     course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
+    report_formatter = GradeReportFormatter(course)
 
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
-
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
+    # Only the error rows are kept in memory; grade rows are written out as
+    # students are graded.
+    err_rows = [GradeReportFormatter.ERROR_HEADER]
     current_step = {'step': 'Calculating Grades'}
 
     total_enrolled_students = enrolled_students.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -599,81 +708,55 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 1000 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_enrolled_students
-            )
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header + group_configs_header
+    def _grade_rows():
+        """Loop over all our students, yielding the rows of the grade report."""
+        student_counter = 0
+        for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, batched=True):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 1000 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_enrolled_students
                 )
 
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
-
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
-
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                if report_formatter.section_labels is None:
+                    yield report_formatter.header_row(gradeset)
+                yield report_formatter.row(student, gradeset)
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append(report_formatter.error_row(student, err_msg))
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_enrolled_students
+        )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+        # The rows are all written, what remains is completing the upload.
+        current_step['step'] = 'Uploading CSVs'
+        task_progress.update_task_state(extra_meta=current_step)
+        TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+    # Perform the actual upload, grading students as their rows are written
+    upload_csv_to_report_store(_grade_rows(), 'grade_report', course_id, start_date)
 
     # If there are any error rows (don't count the header), write them out as well
     if len(err_rows) > 1:
@@ -684,6 +767,201 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def delegate_grade_report_shards(create_shard_fcn, xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Generate the grades CSV of a course, fanning the work out into subtasks
+    for large courses.
+
+    Courses with no more than settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    enrolled students are graded inline by `upload_grades_csv`. Otherwise the
+    enrolled students are split by increasing id into shards of that size,
+    and a subtask is queued for each shard. Each subtask grades its students
+    and stores partial CSVs; the last one to finish merges them into the
+    report (see `upload_grades_csv_shard`).
+
+    `create_shard_fcn` is a function of four arguments, `entry_id`,
+    `shard_index`, the list of student dicts for the shard and the initial
+    SubtaskStatus, that returns the subtask to queue.
+    """
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id).order_by('id')
+    if enrolled_students.count() <= students_per_task:
+        return upload_grades_csv(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, the task may be requeued after its subtasks have
+    # already been defined. Don't queue a second set of subtasks for it.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its grade report shards! InstructorTask = %s",
+                         entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    shard_indices = count()
+
+    def _create_shard(student_list, initial_subtask_status):
+        """Creates a subtask to grade a shard of the enrolled students."""
+        return create_shard_fcn(entry_id, next(shard_indices), student_list, initial_subtask_status)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_shard,
+        [enrolled_students],
+        [],
+        students_per_task,
+    )
+
+
+def upload_grades_csv_shard(entry_id, shard_index, student_list, subtask_status):
+    """
+    Grade one shard of the students of a sharded grade report, and store
+    the resulting rows as partial CSVs of the report.
+
+    `student_list` is a list of dicts containing the 'pk' of each student
+    in the shard. Each shard stores its own header row; rows of students
+    that could not be graded go to a separate partial error CSV.
+
+    Once every shard has reported its status, the shard that finishes last
+    merges the partial CSVs into the grade report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        course = get_course_by_id(course_id)
+        report_formatter = GradeReportFormatter(course)
+        report_store = ReportStore.from_config()
+        students = User.objects.filter(pk__in=[student['pk'] for student in student_list]).order_by('id')
+
+        err_rows = []
+
+        def _grade_rows():
+            """Yield the report rows of the shard, starting with its header."""
+            for student, gradeset, err_msg in iterate_grades_for(course_id, students, batched=True):
+                if gradeset:
+                    if report_formatter.section_labels is None:
+                        yield report_formatter.header_row(gradeset)
+                    yield report_formatter.row(student, gradeset)
+                    subtask_status.increment(succeeded=1)
+                else:
+                    err_rows.append(report_formatter.error_row(student, err_msg))
+                    subtask_status.increment(failed=1)
+
+        report_store.store_partial_rows(
+            course_id, entry.task_id, _grade_report_shard_filename('grade_report', shard_index), _grade_rows()
+        )
+        if err_rows:
+            report_store.store_partial_rows(
+                course_id,
+                entry.task_id,
+                _grade_report_shard_filename('grade_report_err', shard_index),
+                [GradeReportFormatter.ERROR_HEADER] + err_rows
+            )
+    except Exception:
+        TASK_LOG.exception(u"Grade report shard %s of instructor task %s failed unexpectedly!", shard_index, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        _merge_grade_report_shards_if_done(entry_id)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    _merge_grade_report_shards_if_done(entry_id)
+    return subtask_status.to_dict()
+
+
+def _grade_report_shard_filename(csv_name, shard_index):
+    """
+    Return the name of the partial CSV `csv_name` of a grade report shard.
+    """
+    return u"{}_{:05d}.csv".format(csv_name, shard_index)
+
+
+def _merge_grade_report_shards_if_done(entry_id):
+    """
+    Merge the partial CSVs of a sharded grade report into the report once
+    all of its subtasks have completed.
+
+    Only one caller gets to merge; a cache lock guards against several
+    shards completing at the same time. If any shard failed or stored no
+    partial CSV, or the merge fails, the task is marked as failed instead
+    of producing an incomplete report. Either way the partial CSVs are
+    deleted.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    lock_key = u"grade-report-merge-{}".format(entry_id)
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    report_store = ReportStore.from_config()
+    num_shards = subtask_dict['total']
+    try:
+        if subtask_dict['failed']:
+            raise GradeReportMergeError(
+                u"{} of the {} grade report shards failed".format(subtask_dict['failed'], num_shards)
+            )
+        missing_shards = [
+            shard_index for shard_index in xrange(num_shards)
+            if not report_store.has_partial(
+                entry.course_id, entry.task_id, _grade_report_shard_filename('grade_report', shard_index)
+            )
+        ]
+        if missing_shards:
+            raise GradeReportMergeError(u"Grade report shards {} stored no rows".format(missing_shards))
+
+        for csv_name in ('grade_report', 'grade_report_err'):
+            shard_rows = [
+                report_store.iter_partial_rows(
+                    entry.course_id, entry.task_id, _grade_report_shard_filename(csv_name, shard_index)
+                )
+                for shard_index in xrange(num_shards)
+            ]
+            merged_rows = _merge_shard_rows(shard_rows)
+            if csv_name == 'grade_report_err':
+                # As in upload_grades_csv, only write an error report if there are errors.
+                first_row = next(merged_rows, None)
+                if first_row is None:
+                    continue
+                merged_rows = chain([first_row], merged_rows)
+            upload_csv_to_report_store(merged_rows, csv_name, entry.course_id, entry.created or datetime.now(UTC))
+    except Exception as exception:
+        TASK_LOG.exception(u"Merging the grade report shards of instructor task %s failed unexpectedly!", entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+        raise
+    else:
+        TASK_LOG.info(u"Merged %s grade report shards of instructor task %s", num_shards, entry_id)
+    finally:
+        report_store.delete_partials(entry.course_id, entry.task_id)
+        cache.delete(lock_key)
+
+
+def _merge_shard_rows(shard_rows):
+    """
+    Given a list of row iterators of partial CSVs, each beginning with the
+    same header row, lazily yield the header followed by the data rows of
+    every partial CSV in order.
+    """
+    header_seen = False
+    for rows in shard_rows:
+        header = next(rows, None)
+        if header is None:
+            continue
+        if not header_seen:
+            header_seen = True
+            yield header
+        for row in rows:
+            yield row
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -698,19 +976,24 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
 
     # compute the student features table and format it
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
+    student_data = iter_enrolled_students_features(course_id, query_features)
+    header, rows = iter_format_dictlist(student_data, query_features)
 
-    rows.insert(0, header)
+    def _counted_rows():
+        """Yield the header and the data rows, counting the students."""
+        yield header
+        for row in rows:
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            yield row
 
-    current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+        # The rows are all written, what remains is completing the upload.
+        task_progress.skipped = task_progress.total - task_progress.attempted
+        current_step['step'] = 'Uploading CSV'
+        task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    # Perform the upload, computing the profile info as its rows are written
+    upload_csv_to_report_store(_counted_rows(), 'student_profile_info', course_id, start_date)
 
     return task_progress.update_task_state(extra_meta=current_step)
 
@@ -786,15 +1069,14 @@ def cohort_students_and_upload(_xmodule_instance_args, _entry_id, course_id, tas
 
     # Filter the output of `add_users_to_cohorts` in order to upload the result.
     output_header = ['Cohort Name', 'Exists', 'Students Added', 'Students Not Found']
-    output_rows = [
+    output_rows = (
         [
             ','.join(status_dict.get(column_name, '')) if column_name == 'Students Not Found'
             else status_dict[column_name]
             for column_name in output_header
         ]
         for _cohort_name, status_dict in cohorts_status.iteritems()
-    ]
-    output_rows.insert(0, output_header)
-    upload_csv_to_report_store(output_rows, 'cohort_results', course_id, start_date)
+    )
+    upload_csv_to_report_store(chain([output_header], output_rows), 'cohort_results', course_id, start_date)
 
     return task_progress.update_task_state(extra_meta=current_step)
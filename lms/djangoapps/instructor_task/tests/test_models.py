@@ -4,11 +4,13 @@ Tests for instructor_task/models.py.
 
 from cStringIO import StringIO
 import mock
+import os
+import stat
 import time
 from datetime import datetime
 from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from instructor_task.models import LocalFSReportStore, S3ChunkedUpload, S3ReportStore
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -93,6 +95,69 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_store_rows_is_atomic(self):
+        """
+        Test that a report whose rows fail to generate is never made visible.
+        """
+        def failing_rows():
+            """Yield a row, then fail."""
+            yield [u'id']
+            raise ValueError("no more rows")
+
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', failing_rows())
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.store_rows(self.course_id, 'report.csv', ([index] for index in range(3)))
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
+    def test_store_rows_permissions(self):
+        """
+        Test that reports are readable like files created under the umask, not only by their owner.
+        """
+        report_store = self.create_report_store()
+        old_umask = os.umask(0022)
+        try:
+            report_store.store_rows(self.course_id, 'report.csv', [[u'id']])
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(stat.S_IMODE(os.stat(report_store.path_to(self.course_id, 'report.csv')).st_mode), 0644)
+
+    def test_store_partial_rows_is_atomic(self):
+        """
+        Test that a partial file whose rows fail to generate is never stored.
+        """
+        def failing_rows():
+            """Yield a row, then fail."""
+            yield [u'id']
+            raise ValueError("no more rows")
+
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            report_store.store_partial_rows(self.course_id, 'task_id', 'part_0.csv', failing_rows())
+        self.assertFalse(report_store.has_partial(self.course_id, 'task_id', 'part_0.csv'))
+
+    def test_partial_rows(self):
+        """
+        Test that partial files can be read back, and are not listed as reports.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [1, u'ni\xf1o']]
+        report_store.store_partial_rows(self.course_id, 'task_id', 'part_0.csv', rows)
+
+        self.assertEqual(
+            list(report_store.iter_partial_rows(self.course_id, 'task_id', 'part_0.csv')),
+            [[u'id', u'name'], [u'1', u'ni\xf1o']]
+        )
+        self.assertEqual(list(report_store.iter_partial_rows(self.course_id, 'task_id', 'part_1.csv')), [])
+        self.assertTrue(report_store.has_partial(self.course_id, 'task_id', 'part_0.csv'))
+        self.assertFalse(report_store.has_partial(self.course_id, 'task_id', 'part_1.csv'))
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete_partials(self.course_id, 'task_id')
+        self.assertEqual(list(report_store.iter_partial_rows(self.course_id, 'task_id', 'part_0.csv')), [])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +170,39 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+
+@mock.patch('instructor_task.models.S3_UPLOAD_PART_SIZE', 10)
+class S3ChunkedUploadTestCase(TestCase):
+    """
+    Test uploading data to S3 in parts.
+    """
+    def setUp(self):
+        super(S3ChunkedUploadTestCase, self).setUp()
+        self.bucket = mock.Mock()
+        self.key = mock.Mock(key='report.csv')
+        self.upload = S3ChunkedUpload(self.bucket, self.key, {'Content-Type': 'text/csv'})
+
+    def test_small_upload(self):
+        self.upload.write('small')
+        self.upload.complete()
+        self.key.set_contents_from_string.assert_called_once_with(
+            'small', headers={'Content-Type': 'text/csv', 'Content-Length': 5}
+        )
+        self.assertFalse(self.bucket.initiate_multipart_upload.called)
+
+    def test_multipart_upload(self):
+        self.upload.write('a' * 12)
+        self.upload.write('b' * 4)
+        self.upload.complete()
+        multipart_upload = self.bucket.initiate_multipart_upload.return_value
+        self.assertEqual(multipart_upload.upload_part_from_file.call_count, 2)
+        multipart_upload.complete_upload.assert_called_once_with()
+        self.assertFalse(self.key.set_contents_from_string.called)
+
+    def test_cancel(self):
+        self.upload.write('a' * 12)
+        self.upload.cancel()
+        multipart_upload = self.bucket.initiate_multipart_upload.return_value
+        multipart_upload.cancel_upload.assert_called_once_with()
+        self.assertFalse(multipart_upload.complete_upload.called)
@@ -7,10 +7,15 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
 import unicodecsv
 
+from celery.states import FAILURE
+from django.core.cache import cache
+from django.test.utils import override_settings
+
 from xmodule.modulestore.tests.factories import CourseFactory
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
@@ -20,8 +25,18 @@ from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitio
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import _create_grade_report_shard
+from instructor_task.tasks_helper import (
+    GradeReportMergeError,
+    _grade_report_shard_filename,
+    _merge_grade_report_shards_if_done,
+    cohort_students_and_upload,
+    delegate_grade_report_shards,
+    upload_grades_csv,
+    upload_students_csv,
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
 
 
@@ -67,6 +82,95 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         report_store = ReportStore.from_config()
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_sharded_grade_report(self):
+        """
+        Test that a grade report split across subtasks contains every student once, in id order.
+        """
+        students = [self.create_student('student{}'.format(index)) for index in range(5)]
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-task-id', task_output=''
+        )
+
+        progress = delegate_grade_report_shards(
+            _create_grade_report_shard, None, entry.id, self.course.id, {}, 'graded'
+        )
+        self.assertEqual(progress['total'], len(students))
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 3)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            usernames = [row['username'] for row in unicodecsv.DictReader(csv_file)]
+        self.assertEqual(usernames, [student.username for student in students])
+
+    @patch('instructor_task.tasks_helper.upload_csv_to_report_store')
+    def test_sharded_grade_report_merge_failure(self, mock_upload_csv_to_report_store):
+        """
+        Test that a failure to merge the shards of a grade report fails the task and cleans up after it.
+        """
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-task-id', task_output='',
+            subtasks=json.dumps({'total': 1, 'succeeded': 1, 'failed': 0, 'status': {}}),
+        )
+        report_store = ReportStore.from_config()
+        shard_filename = _grade_report_shard_filename('grade_report', 0)
+        report_store.store_partial_rows(self.course.id, entry.task_id, shard_filename, [['username'], ['student']])
+        mock_upload_csv_to_report_store.side_effect = IOError('The report store is unavailable')
+
+        with self.assertRaises(IOError):
+            _merge_grade_report_shards_if_done(entry.id)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'IOError')
+        self.assertEqual(list(report_store.iter_partial_rows(self.course.id, entry.task_id, shard_filename)), [])
+        # The merge lock is released.
+        self.assertTrue(cache.add(u"grade-report-merge-{}".format(entry.id), 'true'))
+
+    def test_sharded_grade_report_shard_failure(self):
+        """
+        Test that a grade report isn't merged from the shards that completed when any shard failed.
+        """
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-task-id', task_output='',
+            subtasks=json.dumps({'total': 2, 'succeeded': 1, 'failed': 1, 'status': {}}),
+        )
+        report_store = ReportStore.from_config()
+        shard_filename = _grade_report_shard_filename('grade_report', 0)
+        report_store.store_partial_rows(self.course.id, entry.task_id, shard_filename, [['username'], ['student']])
+
+        with self.assertRaises(GradeReportMergeError):
+            _merge_grade_report_shards_if_done(entry.id)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(report_store.links_for(self.course.id), [])
+        self.assertFalse(report_store.has_partial(self.course.id, entry.task_id, shard_filename))
+
+    def test_sharded_grade_report_missing_shard(self):
+        """
+        Test that a grade report isn't merged when a shard stored no rows.
+        """
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-task-id', task_output='',
+            subtasks=json.dumps({'total': 2, 'succeeded': 2, 'failed': 0, 'status': {}}),
+        )
+        report_store = ReportStore.from_config()
+        report_store.store_partial_rows(
+            self.course.id, entry.task_id, _grade_report_shard_filename('grade_report', 1), [['username']]
+        )
+
+        with self.assertRaises(GradeReportMergeError):
+            _merge_grade_report_shards_if_done(entry.id)
+
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, FAILURE)
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
     def _verify_cell_data_for_user(self, username, course_id, column_header, expected_cell_content):
         """
         Verify cell data in the grades CSV for a particular user.
@@ -278,6 +382,20 @@ class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertEquals(len(links), 1)
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
+    def test_uploading_step(self):
+        self.create_student('student', 'student@example.com')
+        steps = []
+
+        def upload(rows, _csv_name, _course_id, _timestamp):
+            """Write out the rows, recording the step reported before the upload completes."""
+            list(rows)
+            steps.append(mock_current_task.return_value.update_state.call_args[1]['meta']['step'])
+
+        with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+            with patch('instructor_task.tasks_helper.upload_csv_to_report_store', side_effect=upload):
+                upload_students_csv(None, None, self.course.id, {'features': []}, 'calculated')
+        self.assertEqual(steps, ['Uploading CSV'])
+
     @ddt.data([u'student', u'student\xec'])
     def test_unicode_usernames(self, students):
         """
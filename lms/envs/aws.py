@@ -250,6 +250,10 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_SIZE = ENV_TOKENS.get("COMMENTS_SERVICE_POOL_SIZE", 10)
+COMMENTS_SERVICE_MAX_RETRIES = ENV_TOKENS.get("COMMENTS_SERVICE_MAX_RETRIES", 0)
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = ENV_TOKENS.get("COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS", 4)
+COMMENTS_SERVICE_CACHE_TIMEOUT = ENV_TOKENS.get("COMMENTS_SERVICE_CACHE_TIMEOUT", 0)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -391,6 +395,8 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+ASSET_DISK_CACHE_DIR = ENV_TOKENS.get('ASSET_DISK_CACHE_DIR', ASSET_DISK_CACHE_DIR)
+ASSET_DISK_CACHE_MAX_SIZE = ENV_TOKENS.get('ASSET_DISK_CACHE_MAX_SIZE', ASSET_DISK_CACHE_MAX_SIZE)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -464,6 +470,9 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_STUDENTS_PER_TASK", GRADES_DOWNLOAD_STUDENTS_PER_TASK
+)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
@@ -539,6 +548,9 @@ API_DATE_FORMAT = ENV_TOKENS.get('API_DATE_FORMAT', API_DATE_FORMAT)
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = ENV_TOKENS.get('ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT', 60)
 
+# Courseware navigation Cache Timeout
+COURSE_OUTLINE_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OUTLINE_CACHE_TIMEOUT', COURSE_OUTLINE_CACHE_TIMEOUT)
+
 # PDF RECEIPT/INVOICE OVERRIDES
 PDF_RECEIPT_TAX_ID = ENV_TOKENS.get('PDF_RECEIPT_TAX_ID', PDF_RECEIPT_TAX_ID)
 PDF_RECEIPT_FOOTER_TEXT = ENV_TOKENS.get('PDF_RECEIPT_FOOTER_TEXT', PDF_RECEIPT_FOOTER_TEXT)
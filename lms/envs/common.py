@@ -255,6 +255,10 @@ FEATURES = {
     # grades CSV files to S3 and give links for downloads.
     'ENABLE_S3_GRADE_DOWNLOADS': False,
 
+    # Store computed course and subsection grades, so that they are only
+    # recomputed when a student's scores or the course change.
+    'ENABLE_PERSISTENT_GRADES': False,
+
     # whether to use password policy enforcement or not
     'ENFORCE_PASSWORD_POLICY': True,
 
@@ -640,6 +644,11 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Directory of the local cache of assets too large for memcached, and the most bytes it may take.
+# The cache is disabled if the directory isn't set.
+ASSET_DISK_CACHE_DIR = None
+ASSET_DISK_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -700,6 +709,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of sandboxed Python workers with the modules problems use imported, to run the code
+    # of problems in instead of starting a sandboxed Python for each.  A size of 0 disables it.
+    'worker_pool': {
+        # How many workers can each process start?
+        'size': 0,
+        # After how many executions is a worker replaced?
+        'max_executions': 100,
+        # Above how much memory (in bytes) is a worker replaced?  0 means never.
+        'max_memory': 0,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1662,6 +1682,7 @@ INSTALLED_APPS = (
     'lms.djangoapps.lms_xblock',
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
     'course_structure_api',
 
     # CORS and cross-domain CSRF
@@ -1836,6 +1857,10 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Grade reports for courses with more enrolled students than this are
+# generated by subtasks, each grading at most this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 5000
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
@@ -2131,6 +2156,9 @@ API_DATE_FORMAT = '%Y-%m-%d'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# Seconds the chapters and sections of a course visible to a student are cached for the courseware navigation
+COURSE_OUTLINE_CACHE_TIMEOUT = 60 * 60
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
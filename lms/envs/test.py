@@ -52,6 +52,10 @@ FEATURES['DISABLE_START_DATES'] = True
 # the one in cms/envs/test.py
 FEATURES['ENABLE_DISCUSSION_SERVICE'] = False
 
+# Make the requests to the mocked comments service one after the other, in a
+# predictable order.
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = 1
+
 FEATURES['ENABLE_SERVICE_STATUS'] = True
 
 FEATURES['ENABLE_HINTER_INSTRUCTOR_VIEW'] = True
@@ -6,3 +6,17 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# Connections to the comments service that each process keeps alive
+POOL_SIZE = getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 10)
+
+# Times a request is retried when it fails to connect to the comments service
+MAX_RETRIES = getattr(settings, 'COMMENTS_SERVICE_MAX_RETRIES', 0)
+
+# Threads of each process making independent requests concurrently; with 1,
+# they are made one after the other
+MAX_CONCURRENT_REQUESTS = getattr(settings, 'COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS', 4)
+
+# Seconds the responses of read-only requests, such as user info and thread
+# lists, are cached; they may be that much out of date. 0 disables the cache.
+CACHE_TIMEOUT = getattr(settings, 'COMMENTS_SERVICE_CACHE_TIMEOUT', 0)
@@ -1,14 +1,29 @@
 from contextlib import contextmanager
 import dogstats_wrapper as dog_stats_api
+import hashlib
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
 from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
+from . import settings as cc_settings
+
 log = logging.getLogger(__name__)
 
+# The requests session and thread pool of this process, see get_session
+_per_process = {}
+_per_process_lock = threading.Lock()
+# Set in the threads of the pool, which run the functions of perform_concurrently
+_pool_thread = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,8 +65,95 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _get_per_process(name, factory):
+    """
+    Return the object of this process with the given name, creating it with
+    factory if it doesn't exist yet. Objects holding connections or threads
+    can't be shared with forked processes, so each process creates its own.
+    """
+    key = (name, os.getpid())
+    if key not in _per_process:
+        with _per_process_lock:
+            if key not in _per_process:
+                _per_process[key] = factory()
+    return _per_process[key]
+
+
+def _create_session():
+    """
+    Return a requests session keeping up to POOL_SIZE connections to the
+    comments service alive.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=cc_settings.POOL_SIZE, max_retries=cc_settings.MAX_RETRIES)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """
+    Return the requests session of this process, which reuses the connections
+    to the comments service across requests.
+    """
+    return _get_per_process('session', _create_session)
+
+
+def _init_pool_thread():
+    """Mark the current thread as a thread of the pool of perform_concurrently."""
+    _pool_thread.active = True
+
+
+def perform_concurrently(functions):
+    """
+    Call the given functions, which make independent requests to the comments
+    service, in up to MAX_CONCURRENT_REQUESTS threads, and return their results
+    in order. The exception raised by the first failing function is raised.
+
+    The functions mustn't use the database: the threads have connections of
+    their own, which don't see the uncommitted changes of the caller.
+    """
+    if len(functions) < 2 or cc_settings.MAX_CONCURRENT_REQUESTS < 2 or getattr(_pool_thread, 'active', False):
+        # Functions called in the pool run sequentially, so that they don't
+        # wait for threads of the pool that are waiting for them.
+        return [function() for function in functions]
+
+    language = get_language()
+
+    def call(function):
+        """Call function in the language of the caller, which is set per thread."""
+        translation.activate(language)
+        try:
+            return function()
+        finally:
+            translation.deactivate()
+
+    pool = _get_per_process(
+        'pool', lambda: ThreadPool(cc_settings.MAX_CONCURRENT_REQUESTS, initializer=_init_pool_thread)
+    )
+    results = [pool.apply_async(call, (function,)) for function in functions]
+    return [result.get() for result in results]
+
+
+def _response_cache_key(url, params, raw):
+    """
+    Return the cache key of the response of a GET request to the comments service.
+    """
+    request_hash = hashlib.md5(
+        repr((url, sorted(params.items()), raw, get_language())).encode('utf-8')
+    ).hexdigest()
+    return u'comment_client.response.{}'.format(request_hash)
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False, cacheable=False):
+    """
+    Make a request to the comments service and return its response, parsed from
+    JSON unless raw is set.
+
+    The responses of GET requests that are cacheable are cached for
+    CACHE_TIMEOUT seconds, if set.
+    """
 
     if metric_tags is None:
         metric_tags = []
@@ -62,6 +164,15 @@ def perform_request(method, url, data_or_params=None, raw=False,
 
     if data_or_params is None:
         data_or_params = {}
+
+    cache_key = None
+    if cacheable and method == 'get' and cc_settings.CACHE_TIMEOUT:
+        cache_key = _response_cache_key(url, data_or_params, raw)
+        cached_response = cache.get(cache_key)
+        if cached_response is not None:
+            dog_stats_api.increment('comment_client.request.cache_hit', tags=metric_tags)
+            return cached_response
+
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
         'Accept-Language': get_language(),
@@ -76,7 +187,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
@@ -102,7 +213,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         raise CommentClient500Error(response.text)
     else:
         if raw:
-            return response.text
+            data = response.text
         else:
             try:
                 data = response.json()
@@ -129,7 +240,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
                     value=data.get('num_pages', 1),
                     tags=metric_tags
                 )
-            return data
+        if cache_key:
+            cache.set(cache_key, data, cc_settings.CACHE_TIMEOUT)
+        return data
 
 
 class CommentClientError(Exception):
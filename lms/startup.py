@@ -30,6 +30,8 @@ def run():
 
     add_mimetypes()
 
+    configure_safe_exec_worker_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
@@ -65,6 +67,15 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def configure_safe_exec_worker_pool():
+    """
+    Configure the pool of sandboxed Python workers the code of capa problems runs in.
+    """
+    from capa.safe_exec import configure_worker_pool
+
+    configure_worker_pool(**settings.CODE_JAIL.get('worker_pool', {}))
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
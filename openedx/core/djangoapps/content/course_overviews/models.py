@@ -0,0 +1,179 @@
+"""
+Cached overviews of courses, for the pages listing many courses.
+"""
+from datetime import datetime
+
+from django.core.cache import cache
+from django.utils.translation import ugettext as _
+from pytz import UTC
+
+from opaque_keys.edx.keys import CourseKey
+from util.date_utils import strftime_localized
+from xmodule.course_module import course_end_datetime_text, course_start_date_is_default, course_start_datetime_text
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore.django import modulestore
+
+
+class CourseOverview(object):
+    """
+    The information about a course shown in lists of courses, such as the student
+    dashboard: its names, dates, image, org, mobile and certificate flags and the
+    fields the access checks of the dashboard need.
+
+    Overviews are cached, so that these lists are rendered without loading the
+    course descriptors, and dropped from the cache when their course is published.
+    """
+    # Seconds an overview is cached, in case the publish of its course is missed
+    CACHE_TIMEOUT = 60 * 60
+
+    # The attributes copied from the course descriptor
+    FIELDS = (
+        'display_name', 'display_name_with_default', 'display_number_with_default', 'display_org_with_default',
+        'number', 'org', 'start', 'end', 'advertised_start', 'days_early_for_beta', 'group_access',
+        'mobile_available', 'visible_to_staff_only', 'cert_name_short', 'cert_name_long',
+        'certificates_display_behavior', 'certificates_show_before_end', 'end_of_course_survey_url',
+        'pre_requisite_courses',
+    )
+
+    def __init__(self, course_id, course_image_url, **fields):
+        # Course keys are cached as strings
+        self._course_id = unicode(course_id)
+        self.course_image_url = course_image_url
+        for name in self.FIELDS:
+            setattr(self, name, fields[name])
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        """The id of the course"""
+        return CourseKey.from_string(self._course_id)
+
+    @classmethod
+    def _from_course(cls, course):
+        """
+        Return the overview of a course descriptor.
+        """
+        # Import here to avoid importing the LMS courseware into Studio, which only invalidates overviews.
+        from courseware.courses import course_image_url
+
+        return cls(
+            course.id, course_image_url(course), **{name: getattr(course, name) for name in cls.FIELDS}
+        )
+
+    @staticmethod
+    def _cache_key(course_id):
+        """
+        Return the key of the cached overview of a course.
+        """
+        return u'course_overviews.{}'.format(course_id)
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Return the overview of the course with the given id, or None if it doesn't exist.
+        """
+        return cls.get_from_ids([course_id]).get(course_id)
+
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Return the overviews of the courses with the given ids that exist, keyed by course id.
+
+        The courses whose overviews aren't cached are loaded from the modulestore at once.
+        """
+        overviews = cls._get_cached(course_ids)
+        missing_ids = [course_id for course_id in course_ids if course_id not in overviews]
+        if missing_ids:
+            overviews.update(cls.get_from_courses(modulestore().get_courses_by_ids(missing_ids)))
+        return overviews
+
+    @classmethod
+    def get_from_courses(cls, courses):
+        """
+        Return the overviews of the given course descriptors, keyed by course id, caching
+        the ones that aren't.
+        """
+        courses = [course for course in courses if not isinstance(course, ErrorDescriptor)]
+        overviews = cls._get_cached([course.id for course in courses])
+        new_overviews = {
+            course.id: cls._from_course(course)
+            for course in courses
+            if course.id not in overviews
+        }
+        if new_overviews:
+            cache.set_many(
+                {cls._cache_key(course_id): overview for course_id, overview in new_overviews.iteritems()},
+                cls.CACHE_TIMEOUT
+            )
+        overviews.update(new_overviews)
+        return overviews
+
+    @classmethod
+    def _get_cached(cls, course_ids):
+        """
+        Return the cached overviews of the courses with the given ids, keyed by course id.
+        """
+        cache_keys = {cls._cache_key(course_id): course_id for course_id in course_ids}
+        return {
+            cache_keys[cache_key]: overview
+            for cache_key, overview in cache.get_many(cache_keys.keys()).iteritems()
+        }
+
+    @classmethod
+    def invalidate(cls, course_id):
+        """
+        Drop the cached overview of a course, such as when it is published.
+        """
+        cache.delete(cls._cache_key(course_id))
+
+    def has_started(self):
+        """
+        Returns True if the current time is after the course start date.
+        """
+        return datetime.now(UTC) > self.start
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the specified course end date.
+        Returns False if there is no end date specified.
+        """
+        if self.end is None:
+            return False
+
+        return datetime.now(UTC) > self.end
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        show_early = (
+            self.certificates_display_behavior in ('early_with_info', 'early_no_info') or
+            self.certificates_show_before_end
+        )
+        return show_early or self.has_ended()
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, like
+        CourseDescriptor.start_date_is_still_default.
+        """
+        return course_start_date_is_default(self.start, self.advertised_start)
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the desired text corresponding the course's start date and time in UTC, like
+        CourseDescriptor.start_datetime_text.
+        """
+        return course_start_datetime_text(self.start, self.advertised_start, format_string, _, strftime_localized)
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the end date or date_time for the course formatted as a string, or an empty
+        string if the course has no end date.
+        """
+        return course_end_datetime_text(self.end, format_string, strftime_localized)
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
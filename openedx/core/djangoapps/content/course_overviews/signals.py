@@ -0,0 +1,11 @@
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    # Import here to avoid a circular import.
+    from .models import CourseOverview
+
+    CourseOverview.invalidate(course_key)
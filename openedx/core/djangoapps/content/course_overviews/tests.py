@@ -0,0 +1,72 @@
+"""
+Tests for the cached course overviews.
+"""
+import datetime
+
+from django.core.cache import cache
+from mock import patch
+from pytz import UTC
+
+from xmodule.course_module import DEFAULT_START_DATE
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+class CourseOverviewTests(ModuleStoreTestCase):
+    def setUp(self):
+        super(CourseOverviewTests, self).setUp()
+        cache.clear()
+        self.course = CourseFactory.create(
+            display_name='Overview Course',
+            start=datetime.datetime(2014, 1, 1, tzinfo=UTC),
+            end=datetime.datetime(2015, 1, 1, tzinfo=UTC),
+            mobile_available=True,
+        )
+
+    def test_get_from_id(self):
+        overview = CourseOverview.get_from_id(self.course.id)
+
+        self.assertEqual(overview.id, self.course.id)
+        for name in CourseOverview.FIELDS:
+            self.assertEqual(getattr(overview, name), getattr(self.course, name))
+        self.assertTrue(overview.has_started())
+        self.assertTrue(overview.has_ended())
+        self.assertTrue(overview.may_certify())
+        self.assertEqual(overview.start_datetime_text(), self.course.start_datetime_text())
+        self.assertEqual(overview.end_datetime_text("DATE_TIME"), self.course.end_datetime_text("DATE_TIME"))
+
+    def test_start_datetime_text(self):
+        # Courses without an announced start date, or advertising it as text
+        courses = [
+            CourseFactory.create(start=DEFAULT_START_DATE),
+            CourseFactory.create(advertised_start='Fall 2015'),
+        ]
+        for course in courses:
+            overview = CourseOverview.get_from_id(course.id)
+            self.assertEqual(overview.start_date_is_still_default, course.start_date_is_still_default)
+            for format_string in ("SHORT_DATE", "DATE_TIME"):
+                self.assertEqual(overview.start_datetime_text(format_string), course.start_datetime_text(format_string))
+
+    def test_get_from_ids_missing_course(self):
+        missing_id = self.course.id.replace(course='missing')
+        overviews = CourseOverview.get_from_ids([self.course.id, missing_id])
+
+        self.assertEqual(overviews.keys(), [self.course.id])
+        self.assertIsNone(CourseOverview.get_from_id(missing_id))
+
+    def test_cached(self):
+        CourseOverview.get_from_id(self.course.id)
+
+        with patch.object(self.store, 'get_courses_by_ids') as get_courses_by_ids:
+            overviews = CourseOverview.get_from_ids([self.course.id])
+        self.assertFalse(get_courses_by_ids.called)
+        self.assertEqual(overviews[self.course.id].display_name, 'Overview Course')
+
+    def test_invalidated_on_publish(self):
+        CourseOverview.get_from_id(self.course.id)
+
+        self.course.display_name = 'Renamed Course'
+        self.store.update_item(self.course, self.user.id)
+
+        self.assertEqual(CourseOverview.get_from_id(self.course.id).display_name, 'Renamed Course')
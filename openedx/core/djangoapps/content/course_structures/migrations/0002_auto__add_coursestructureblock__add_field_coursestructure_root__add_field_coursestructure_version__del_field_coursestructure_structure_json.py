@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseStructureBlock'
+        db.create_table('course_structures_coursestructureblock', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('structure', self.gf('django.db.models.fields.related.ForeignKey')(related_name='blocks', to=orm['course_structures.CourseStructure'])),
+            ('usage_key', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('block_type', self.gf('django.db.models.fields.CharField')(max_length=64, db_index=True)),
+            ('version', self.gf('django.db.models.fields.CharField')(max_length=255, blank=True)),
+            ('block_json', self.gf('django.db.models.fields.TextField')()),
+        ))
+        db.send_create_signal('course_structures', ['CourseStructureBlock'])
+
+        # Adding unique constraint on 'CourseStructureBlock', fields ['structure', 'usage_key']
+        db.create_unique('course_structures_coursestructureblock', ['structure_id', 'usage_key'])
+
+        # Adding field 'CourseStructure.root'
+        db.add_column('course_structures_coursestructure', 'root',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=255, blank=True),
+                      keep_default=False)
+
+        # Adding field 'CourseStructure.version'
+        db.add_column('course_structures_coursestructure', 'version',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=255, blank=True),
+                      keep_default=False)
+
+        # Deleting field 'CourseStructure.structure_json'
+        db.delete_column('course_structures_coursestructure', 'structure_json')
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'CourseStructureBlock', fields ['structure', 'usage_key']
+        db.delete_unique('course_structures_coursestructureblock', ['structure_id', 'usage_key'])
+
+        # Deleting model 'CourseStructureBlock'
+        db.delete_table('course_structures_coursestructureblock')
+
+        # Deleting field 'CourseStructure.root'
+        db.delete_column('course_structures_coursestructure', 'root')
+
+        # Deleting field 'CourseStructure.version'
+        db.delete_column('course_structures_coursestructure', 'version')
+
+        # Adding field 'CourseStructure.structure_json'
+        db.add_column('course_structures_coursestructure', 'structure_json',
+                      self.gf('django.db.models.fields.TextField')(null=True, blank=True),
+                      keep_default=False)
+
+
+    models = {
+        'course_structures.coursestructure': {
+            'Meta': {'object_name': 'CourseStructure'},
+            'course_id': ('xmodule_django.models.CourseKeyField', [], {'unique': 'True', 'max_length': '255', 'db_index': 'True'}),
+            'created': ('model_utils.fields.AutoCreatedField', [], {'default': 'datetime.datetime.now'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'modified': ('model_utils.fields.AutoLastModifiedField', [], {'default': 'datetime.datetime.now'}),
+            'root': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'version': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'})
+        },
+        'course_structures.coursestructureblock': {
+            'Meta': {'unique_together': "(('structure', 'usage_key'),)", 'object_name': 'CourseStructureBlock'},
+            'block_json': ('django.db.models.fields.TextField', [], {}),
+            'block_type': ('django.db.models.fields.CharField', [], {'max_length': '64', 'db_index': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'structure': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'blocks'", 'to': "orm['course_structures.CourseStructure']"}),
+            'usage_key': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'version': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['course_structures']
@@ -1,9 +1,9 @@
 import json
 import logging
 
+from django.db import models
 from model_utils.models import TimeStampedModel
 
-from util.models import CompressedTextField
 from xmodule_django.models import CourseKeyField
 
 
@@ -13,18 +13,92 @@ logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 class CourseStructure(TimeStampedModel):
     course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
 
-    # Right now the only thing we do with the structure doc is store it and
-    # send it on request. If we need to store a more complex data model later,
-    # we can do so and build a migration. The only problem with a normalized
-    # data model for this is that it will likely involve hundreds of rows, and
-    # we'd have to be careful about caching.
-    structure_json = CompressedTextField(verbose_name='Structure JSON', blank=True, null=True)
+    # The blocks of the structure are stored one per row, so that subtrees and the blocks of
+    # some types can be read without loading the rest of the structure.
+    root = models.CharField(max_length=255, blank=True, verbose_name='Root usage key')
+
+    # The published version of the course the blocks were generated from, if the modulestore
+    # of the course versions them. Only the blocks changed since are generated again.
+    version = models.CharField(max_length=255, blank=True)
+
+    # The number of usage keys filtered on per query, to remain within the limits of the database.
+    QUERY_CHUNK_SIZE = 500
 
     @property
     def structure(self):
-        if self.structure_json:
-            return json.loads(self.structure_json)
-        return None
+        """
+        The whole structure: the usage key of its root and its blocks keyed by usage key.
+        """
+        if not self.root:
+            return None
+        return {
+            "root": self.root,
+            "blocks": self.get_blocks(),
+        }
+
+    def get_blocks(self, root=None, block_types=None):
+        """
+        Return the blocks of the structure keyed by usage key, or only the ones in the subtree
+        of the block whose usage key is `root` if given, and of the types in `block_types` if given.
+        """
+        if root is None:
+            block_records = self.blocks.all()
+            if block_types is not None:
+                block_records = block_records.filter(block_type__in=block_types)
+            return {record.usage_key: record.block for record in block_records}
+
+        # Read the subtree one level at a time, and only keep the blocks of the types asked for.
+        blocks = {}
+        subtree_blocks = {}
+        level_keys = [root]
+        while level_keys:
+            level_blocks = self._get_blocks_by_usage_keys(level_keys)
+            subtree_blocks.update(level_blocks)
+            level_keys = [
+                child for block in level_blocks.itervalues() for child in block['children']
+                if child not in subtree_blocks
+            ]
+            blocks.update(
+                (usage_key, block) for usage_key, block in level_blocks.iteritems()
+                if block_types is None or block['block_type'] in block_types
+            )
+        return blocks
+
+    def _get_blocks_by_usage_keys(self, usage_keys):
+        """
+        Return the blocks of the structure with the given usage keys, keyed by usage key.
+        """
+        blocks = {}
+        for index in xrange(0, len(usage_keys), self.QUERY_CHUNK_SIZE):
+            blocks.update(
+                (record.usage_key, record.block)
+                for record in self.blocks.filter(usage_key__in=usage_keys[index:index + self.QUERY_CHUNK_SIZE])
+            )
+        return blocks
+
+
+class CourseStructureBlock(models.Model):
+    """
+    A block of a course structure.
+    """
+    structure = models.ForeignKey(CourseStructure, related_name='blocks')
+    usage_key = models.CharField(max_length=255)
+    block_type = models.CharField(max_length=64, db_index=True)
+
+    # The version of the block in the modulestore, if it versions blocks
+    version = models.CharField(max_length=255, blank=True)
+
+    block_json = models.TextField()
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('structure', 'usage_key'),)
+
+    @property
+    def block(self):
+        """
+        The JSON-parsed block.
+        """
+        return json.loads(self.block_json)
 
 # Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
 # at the end of this file to avoid circular dependencies.
@@ -2,54 +2,168 @@ import json
 import logging
 
 from celery.task import task
-from opaque_keys.edx.keys import CourseKey
+from django.db import transaction
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
 
 log = logging.getLogger('edx.celery.task')
 
 
-def _generate_course_structure(course_key):
+def _usage_key_string(usage_key):
     """
-    Generates a course structure dictionary for the specified course.
+    Returns the usage key as a string, without the version and branch Split modulestore keys carry.
     """
-    course = modulestore().get_course(course_key, depth=None)
-    blocks_stack = [course]
-    blocks_dict = {}
-    while blocks_stack:
-        curr_block = blocks_stack.pop()
-        children = curr_block.get_children() if curr_block.has_children else []
-        key = unicode(curr_block.scope_ids.usage_id)
-        block = {
-            "usage_key": key,
-            "block_type": curr_block.category,
-            "display_name": curr_block.display_name,
-            "children": [unicode(child.scope_ids.usage_id) for child in children]
-        }
-
-        # Retrieve these attributes separately so that we can fail gracefully if the block doesn't have the attribute.
-        attrs = (('graded', False), ('format', None))
-        for attr, default in attrs:
-            if hasattr(curr_block, attr):
-                block[attr] = getattr(curr_block, attr, default)
-            else:
-                log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
-                block[attr] = default
+    if hasattr(usage_key, 'version_agnostic'):
+        usage_key = usage_key.version_agnostic()
+    if hasattr(usage_key, 'for_branch'):
+        usage_key = usage_key.for_branch(None)
+    return unicode(usage_key)
+
+
+def _generate_block(block, children):
+    """
+    Returns the structure dictionary of a block, given the usage keys of its children.
+    """
+    key = _usage_key_string(block.scope_ids.usage_id)
+    block_dict = {
+        "usage_key": key,
+        "block_type": block.category,
+        "display_name": block.display_name,
+        "children": [_usage_key_string(child) for child in children]
+    }
 
-        blocks_dict[key] = block
+    # Retrieve these attributes separately so that we can fail gracefully if the block doesn't have the attribute.
+    attrs = (('graded', False), ('format', None))
+    for attr, default in attrs:
+        if hasattr(block, attr):
+            block_dict[attr] = getattr(block, attr, default)
+        else:
+            log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
+            block_dict[attr] = default
 
-        # Add this blocks children to the stack so that we can traverse them as well.
-        blocks_stack.extend(children)
+    return block_dict
+
+
+def _generate_course_structure(course_key):
+    """
+    Generates a course structure dictionary for the specified course.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        course = store.get_course(course_key, depth=None)
+        blocks_stack = [course]
+        blocks_dict = {}
+        while blocks_stack:
+            curr_block = blocks_stack.pop()
+            children = curr_block.get_children() if curr_block.has_children else []
+            block = _generate_block(curr_block, [child.scope_ids.usage_id for child in children])
+            blocks_dict[block['usage_key']] = block
+
+            # Add this blocks children to the stack so that we can traverse them as well.
+            blocks_stack.extend(children)
     return {
-        "root": unicode(course.scope_ids.usage_id),
+        "root": _usage_key_string(course.scope_ids.usage_id),
         "blocks": blocks_dict
     }
 
 
+def _get_block_versions(course_key):
+    """
+    Returns the published version of the specified course, the usage key of its root and the versions
+    of its blocks keyed by usage key, if it is stored in a modulestore which versions blocks.
+    Returns None otherwise.
+    """
+    versions = modulestore().get_block_versions(course_key)
+    if versions is None:
+        return None
+    version, root, block_versions = versions
+    block_versions = {
+        _usage_key_string(usage_key): unicode(block_version)
+        for usage_key, block_version in block_versions.iteritems()
+    }
+    return unicode(version), _usage_key_string(root), block_versions
+
+
+def _generate_changed_blocks(course_key, changed_keys, block_versions, stored_blocks):
+    """
+    Generates the structure dictionaries of the blocks of the specified course whose usage keys are
+    `changed_keys`, and of the blocks which inherit changed values from them, keyed by usage key.
+
+    `block_versions` are the versions of the blocks of the published course keyed by usage key, and
+    `stored_blocks` the records of the stored blocks keyed by usage key.
+    """
+    store = modulestore()
+    blocks = {}
+    blocks_stack = list(changed_keys)
+    with store.bulk_operations(course_key):
+        with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            while blocks_stack:
+                usage_key = blocks_stack.pop()
+                if usage_key in blocks or usage_key not in block_versions:
+                    continue
+                block = store.get_item(UsageKey.from_string(usage_key))
+                block_dict = blocks[usage_key] = _generate_block(block, block.children if block.has_children else [])
+
+                # The children of a block inherit its grading: if it didn't change, only the
+                # children moved to the block may inherit another one.
+                stored_record = stored_blocks.get(usage_key)
+                if stored_record is not None and stored_record.block['graded'] == block_dict['graded']:
+                    stored_children = set(stored_record.block['children'])
+                    blocks_stack.extend(child for child in block_dict['children'] if child not in stored_children)
+                else:
+                    blocks_stack.extend(block_dict['children'])
+    return blocks
+
+
+def _store_course_structure(structure, blocks, block_versions, stored_blocks):
+    """
+    Stores the given blocks of the course structure, keyed by usage key, replacing the stored ones that changed.
+    Removes the stored blocks no longer in `block_versions` if given, or in `blocks` otherwise.
+
+    `stored_blocks` are the records of the stored blocks keyed by usage key.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructureBlock
+
+    usage_keys = set(block_versions if block_versions is not None else blocks)
+    for usage_key, record in stored_blocks.iteritems():
+        if usage_key not in usage_keys:
+            record.delete()
+
+    new_records = []
+    for usage_key in usage_keys:
+        version = block_versions[usage_key] if block_versions is not None else u''
+        record = stored_blocks.get(usage_key)
+        if usage_key in blocks:
+            block = blocks[usage_key]
+            block_json = json.dumps(block)
+            if record is None:
+                new_records.append(CourseStructureBlock(
+                    structure=structure, usage_key=usage_key, block_type=block['block_type'],
+                    version=version, block_json=block_json
+                ))
+                continue
+            if record.block_json == block_json and record.version == version:
+                continue
+            record.block_type = block['block_type']
+            record.block_json = block_json
+        elif record is None or record.version == version:
+            continue
+        # The blocks which weren't generated again are stored as they were, at their new version
+        record.version = version
+        record.save()
+    CourseStructureBlock.objects.bulk_create(new_records)
+
+
 @task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
 def update_course_structure(course_key):
     """
     Regenerates and updates the course structure (in the database) for the specified course.
+
+    For courses whose modulestore versions blocks, only the blocks which changed since
+    the version of the stored structure are generated again.
     """
     # Import here to avoid circular import.
     from .models import CourseStructure
@@ -61,19 +175,35 @@ def update_course_structure(course_key):
 
     course_key = CourseKey.from_string(course_key)
 
-    try:
-        structure = _generate_course_structure(course_key)
-    except Exception as ex:
-        log.exception('An error occurred while generating course structure: %s', ex.message)
-        raise
-
-    structure_json = json.dumps(structure)
+    # Store the blocks of the structure all at once, so that it is never read partly updated
+    with transaction.commit_on_success():
+        structure, __ = CourseStructure.objects.get_or_create(course_id=course_key)
+        stored_blocks = {record.usage_key: record for record in structure.blocks.all()}
+        try:
+            versions = _get_block_versions(course_key)
+            if versions is None:
+                version, block_versions = u'', None
+            else:
+                version, root, block_versions = versions
+                if structure.root and version == structure.version:
+                    return
+                changed_keys = [
+                    usage_key for usage_key, block_version in block_versions.iteritems()
+                    if usage_key not in stored_blocks or stored_blocks[usage_key].version != block_version
+                ]
+
+            # Loading the whole course at once is quicker than loading most of its blocks one by one
+            if block_versions is None or len(changed_keys) > len(block_versions) / 2:
+                course_structure = _generate_course_structure(course_key)
+                root, blocks = course_structure['root'], course_structure['blocks']
+            else:
+                blocks = _generate_changed_blocks(course_key, changed_keys, block_versions, stored_blocks)
+        except Exception as ex:
+            log.exception('An error occurred while generating course structure: %s', ex.message)
+            raise
 
-    cs, created = CourseStructure.objects.get_or_create(
-        course_id=course_key,
-        defaults={'structure_json': structure_json}
-    )
+        _store_course_structure(structure, blocks, block_versions, stored_blocks)
+        structure.root = root
+        structure.version = version
+        structure.save()
 
-    if not created:
-        cs.structure_json = structure_json
-        cs.save()
@@ -1,5 +1,9 @@
 import json
 
+from mock import patch
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -54,42 +58,42 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         actual = _generate_course_structure(self.course.id)
         self.assertDictEqual(actual, expected)
 
-    def test_structure_json(self):
+    def _create_structure(self):
         """
-        Although stored as compressed data, CourseStructure.structure_json should always return the uncompressed string.
+        Creates and returns a stored course structure with a chapter containing a problem and a video.
         """
-        course_id = 'a/b/c'
-        structure = {
-            'root': course_id,
-            'blocks': {
-                course_id: {
-                    'id': course_id
-                }
-            }
+        def block(usage_key, block_type, children=()):  # pylint: disable=missing-docstring
+            return {'usage_key': usage_key, 'block_type': block_type, 'children': list(children)}
+
+        self.blocks = {
+            'course': block('course', 'course', ['chapter']),
+            'chapter': block('chapter', 'chapter', ['problem', 'video']),
+            'problem': block('problem', 'problem'),
+            'video': block('video', 'video'),
         }
-        structure_json = json.dumps(structure)
-        cs = CourseStructure.objects.create(course_id=self.course.id, structure_json=structure_json)
-        self.assertEqual(cs.structure_json, structure_json)
-
-        # Reload the data to ensure the init signal is fired to decompress the data.
-        cs = CourseStructure.objects.get(course_id=self.course.id)
-        self.assertEqual(cs.structure_json, structure_json)
+        cs = CourseStructure.objects.create(course_id=self.course.id, root='course')
+        for usage_key, block in self.blocks.iteritems():
+            cs.blocks.create(usage_key=usage_key, block_type=block['block_type'], block_json=json.dumps(block))
+        return cs
 
     def test_structure(self):
         """
-        CourseStructure.structure should return the uncompressed, JSON-parsed course structure.
+        CourseStructure.structure should return the JSON-parsed course structure.
         """
-        structure = {
-            'root': 'a/b/c',
-            'blocks': {
-                'a/b/c': {
-                    'id': 'a/b/c'
-                }
-            }
-        }
-        structure_json = json.dumps(structure)
-        cs = CourseStructure.objects.create(course_id=self.course.id, structure_json=structure_json)
-        self.assertDictEqual(cs.structure, structure)
+        cs = self._create_structure()
+        self.assertDictEqual(cs.structure, {'root': 'course', 'blocks': self.blocks})
+
+        self.assertIsNone(CourseStructure.objects.create(course_id=CourseKey.from_string('a/b/c')).structure)
+
+    def test_get_blocks(self):
+        """
+        CourseStructure.get_blocks should only return the blocks of the subtree and of the types asked for.
+        """
+        cs = self._create_structure()
+        self.assertEqual(set(cs.get_blocks(block_types=['problem', 'video'])), {'problem', 'video'})
+        self.assertEqual(set(cs.get_blocks(root='chapter')), {'chapter', 'problem', 'video'})
+        self.assertEqual(set(cs.get_blocks(root='chapter', block_types=['video'])), {'video'})
+        self.assertEqual(cs.get_blocks(root='missing'), {})
 
     def test_block_with_missing_fields(self):
         """
@@ -128,3 +132,35 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         cs = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(cs.course_id, course_id)
         self.assertEqual(cs.structure, structure)
+
+    def test_update_course_structure_incrementally(self):
+        """
+        Only the blocks of a Split course which changed since the stored structure are generated again.
+        """
+        # Update the structure explicitly rather than on each publish
+        SignalHandler.course_published.disconnect(listen_for_course_publish)
+        self.addCleanup(SignalHandler.course_published.connect, listen_for_course_publish)
+
+        course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+        chapter = ItemFactory.create(parent=course, category='chapter', display_name='Week 1')
+        sequential = ItemFactory.create(parent=chapter, category='sequential', display_name='Lesson 1')
+        self.store.publish(course.location, self.user.id)
+        update_course_structure(unicode(course.id))
+
+        sequential.display_name = 'Lesson 2'
+        self.store.update_item(sequential, self.user.id)
+        self.store.publish(sequential.location, self.user.id)
+        with patch.object(self.store, 'get_item', wraps=self.store.get_item) as get_item:
+            update_course_structure(unicode(course.id))
+        self.assertEqual(get_item.call_count, 1)
+
+        cs = CourseStructure.objects.get(course_id=course.id)
+        self.assertEqual(cs.structure, _generate_course_structure(course.id))
+        self.assertEqual(cs.get_blocks(block_types=['sequential']).values()[0]['display_name'], 'Lesson 2')
+
+        # Nothing is generated again when the published course didn't change
+        with patch('openedx.core.djangoapps.content.course_structures.tasks._generate_course_structure') as generate:
+            with patch.object(self.store, 'get_item') as get_item:
+                update_course_structure(unicode(course.id))
+        self.assertFalse(generate.called)
+        self.assertFalse(get_item.called)